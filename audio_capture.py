@@ -1,19 +1,255 @@
 import subprocess
 import numpy as np
-import sounddevice as sd
 import queue
+import shutil
+import tempfile
 import threading
 import os
 import time
 
+from segmenter import AudioChunk, PauseSegmenter
+from ring_buffer import PCMRing
+from pcm_cache import get_pcm_cache, source_key
+from metrics import get_metrics
+
+# Live catch-up policy (see AudioCapture._enqueue), overridable from .env
+LIVE_MAX_BUFFER_SECONDS = float(os.getenv("LIVE_MAX_BUFFER_SECONDS", "60"))
+LIVE_CATCHUP_SECONDS = float(os.getenv("LIVE_CATCHUP_SECONDS", "15"))
+# Live interim text: seconds of new audio between two looks at the chunk still being captured
+INTERIM_SECONDS = float(os.getenv("INTERIM_SECONDS", "1.5"))
+# 'stream': pipe yt-dlp straight into ffmpeg, 'download': fetch the whole WAV first (old behavior)
+VOD_MODE = os.getenv("VOD_MODE", "stream")
+
+
+def download_vod(url, dest_dir, sample_rate=16000, status_callback=None):
+    """
+    Downloads the audio of `url` as a mono WAV at `sample_rate` into `dest_dir`, which should belong
+    to this job alone (parallel workers must not share it). Returns the file path, or None.
+    """
+    if status_callback:
+        status_callback("[System] Initializing Download...\n")
+
+    cmd =[
+        # Also updated fallback to ba/b here to prevent VODs from failing
+        'yt-dlp', '-f', 'ba/b', 
+        '-x', '--audio-format', 'wav', 
+        '-o', os.path.join(dest_dir, 'audio.%(ext)s'),
+        '--postprocessor-args', f'ffmpeg:-ar {sample_rate} -ac 1',
+        '--user-agent', 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+        '--no-check-certificate'
+    ]
+
+    # --- YT-DLP COOKIE INJECTION (BYPASS BLOCKING) - COMMENTED OUT FOR NOW ---
+    # cookie_path = os.getenv("YTDLP_COOKIES")
+    # if cookie_path and os.path.exists(cookie_path):
+    #     cmd.extend(['--cookies', cookie_path])
+
+    # Always append URL *last* when passing arguments to subprocess
+    cmd.append(url)
+
+    process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, bufsize=1)
+
+    for line in process.stdout:
+        if status_callback:
+            if "[download]" in line: status_callback(line.strip())
+            elif "ERROR" in line: status_callback(f"[YT-DLP LOG]: {line.strip()}")
+
+    process.wait()
+
+    path = os.path.join(dest_dir, "audio.wav")
+    return path if os.path.exists(path) else None
+
+
+class AudioQueue(queue.Queue):
+    """
+    queue.Queue of AudioChunks that also knows how many seconds of audio it holds.
+    Chunks whose audio still lives in the capture ring are copied out on get() (the copy Whisper
+    gets to keep), which frees their ring slot.
+    """
+
+    def __init__(self, sample_rate=16000, ring=None):
+        self.sample_rate = sample_rate
+        self.ring = ring
+        super().__init__()
+
+    def _init(self, maxsize):
+        super()._init(maxsize)
+        self.seconds = 0.0
+
+    def _put(self, chunk):
+        super()._put(chunk)
+        self.seconds += len(chunk.audio) / self.sample_rate
+
+    def _get(self):
+        chunk = self._pop()
+        if self.ring is not None and self.ring.offset(chunk.audio) is not None:
+            slot = chunk.audio
+            chunk = chunk._replace(audio=slot.copy())
+            self.ring.release(slot)
+        return chunk
+
+    def _pop(self):
+        chunk = super()._get()
+        self.seconds = max(0.0, self.seconds - len(chunk.audio) / self.sample_rate)
+        return chunk
+
+    def drop_oldest(self, max_seconds):
+        """
+        Drops the oldest chunks until at most `max_seconds` are buffered (the newest chunk is always kept).
+        The chunk that is now first carries the length of the whole gap in `skipped`.
+        Returns the seconds of audio dropped by this call.
+        """
+        with self.mutex:
+            gap_start, dropped = None, 0.0
+            while len(self.queue) > 1 and self.seconds > max_seconds:
+                chunk = self._pop()
+                if self.ring is not None: self.ring.release(chunk.audio)
+                dropped += len(chunk.audio) / self.sample_rate
+                if gap_start is None: gap_start = chunk.start - chunk.skipped
+            if gap_start is None: return 0.0
+
+            # The gap runs up to the new first chunk (silence skipped in between included).
+            # Its overlap refers to audio that was just dropped, so it is no longer a repeat.
+            head = self.queue[0]
+            self.queue[0] = head._replace(skipped=head.start - gap_start, overlap=0.0)
+            return dropped
+
+
 class AudioCapture:
-    def __init__(self, sample_rate=16000, chunk_seconds=8):
+    def __init__(self, sample_rate=16000, chunk_seconds=8, segment_mode="fixed",
+                 min_segment_seconds=1.5, max_segment_seconds=8.0, overlap_seconds=0.5,
+                 max_buffer_seconds=LIVE_MAX_BUFFER_SECONDS, catchup_seconds=LIVE_CATCHUP_SECONDS):
         self.sample_rate = sample_rate
         self.chunk_samples = sample_rate * chunk_seconds
-        self.audio_queue = queue.Queue()
+        # Live sources (stream / mic) may lose audio to keep up, VODs and files never do
+        self.is_live = False
+        self.max_buffer_seconds = max_buffer_seconds
+        self.catchup_seconds = min(catchup_seconds, max_buffer_seconds)
+        # Captured PCM is written into one preallocated ring. It holds the live backlog limit plus a few
+        # chunks in flight; a file read faster than it is transcribed waits for space instead of growing.
+        self.ring = PCMRing(int(sample_rate * (max_buffer_seconds + 3 * chunk_seconds)), self.chunk_samples)
+        self.audio_queue = AudioQueue(sample_rate, self.ring)
+        self.silence_threshold = 0.01  # RMS of the loudest 100 ms block, below that a chunk has no speech
         self.is_capturing = False
         self.process = None
-        self.temp_filename = "temp_vod.wav"
+        self.source_process = None  # yt-dlp feeding ffmpeg's stdin in progressive VOD mode
+        self.vod_mode = VOD_MODE
+        # Decoded PCM of files/VODs is kept for re-runs (see pcm_cache.py)
+        self.cache = get_pcm_cache()
+        self.cache_writer = None
+        self._stream_complete = False
+        self.temp_dir = None  # Download directory this instance created (download fallback), removed on stop()
+        self.stream_samples = 0
+        self.stream_started_at = time.monotonic()
+        self.metrics = get_metrics()
+        # Gets the audio of the chunk still being captured every INTERIM_SECONDS (live only, see ProcessingPipeline.submit_interim)
+        self.interim_callback = None
+        self.interim_samples = int(sample_rate * INTERIM_SECONDS)
+        self._interim_at = 0
+        # Seconds of audio already taken off audio_queue but not transcribed yet (e.g. ProcessingPipeline.queued_seconds);
+        # it lags just as much, so the live catch-up counts it too
+        self.downstream_seconds = None
+        self.configure_segmentation(segment_mode, min_segment_seconds, max_segment_seconds, overlap_seconds)
+
+    def configure_segmentation(self, mode="fixed", min_segment_seconds=1.5, max_segment_seconds=8.0, overlap_seconds=0.5,
+                               interim=False):
+        """
+        'fixed' : cut every chunk_seconds (original behavior)
+        'vad'   : cut at pauses, between min/max seconds, with overlap on forced cuts.
+                  Shorter segments = lower latency, longer ones = more context for Whisper.
+        interim : on live sources, hand the growing chunk to `interim_callback` as it is captured
+        """
+        self.segment_mode = mode
+        self.segment_opts = {"min_segment_seconds": min_segment_seconds, "max_segment_seconds": max_segment_seconds,
+                             "overlap_seconds": overlap_seconds}
+        self.interim = interim
+        self._build_segmenter()
+
+    def _build_segmenter(self):
+        if self.segment_mode == "vad":
+            self.segmenter = PauseSegmenter(self.sample_rate, **self.segment_opts)
+        elif self.interim and self.is_live:
+            # Fixed-length chunks, but read in small steps so the growing chunk can be looked at
+            chunk_seconds = self.chunk_samples / self.sample_rate
+            self.segmenter = PauseSegmenter(self.sample_rate, min_segment_seconds=chunk_seconds - 0.05,
+                                            max_segment_seconds=chunk_seconds, overlap_seconds=0.0)
+        else:
+            self.segmenter = None
+        # Size of each read from ffmpeg / mic block. The segmenter wants small steps.
+        self.read_samples = self.sample_rate // 10 if self.segmenter else self.chunk_samples
+
+    def _reset_stream_clock(self):
+        self.stream_samples = 0
+        self.stream_started_at = time.monotonic()
+        self._interim_at = 0
+        # Built per stream: whether interim text applies depends on the source being live
+        self._build_segmenter()
+
+    def _emit_audio(self, audio_np, read_at=None):
+        """Sends freshly captured PCM to the queue, either as-is (fixed) or through the segmenter (vad)"""
+        if self.segmenter:
+            # The segmenter keeps its own copy, so the ring slot is free again right away
+            chunks = self.segmenter.feed(audio_np)
+            self.ring.release(audio_np)
+            if self.interim_callback and self.interim and self.is_live: self._emit_interim(bool(chunks))
+        else:
+            chunks = [AudioChunk(audio_np, self.stream_samples / self.sample_rate, 0.0)]
+        self.stream_samples += len(audio_np)
+        self._enqueue(chunks, read_at)
+
+    def _emit_interim(self, cut):
+        seg = self.segmenter
+        if cut: self._interim_at = 0
+        pending = len(seg.buffer) - seg.carried_overlap
+        if seg.voiced and pending >= self._interim_at + self.interim_samples:
+            self._interim_at = pending
+            self.interim_callback(AudioChunk(seg.buffer.copy(), seg.buffer_offset / self.sample_rate,
+                                             seg.carried_overlap / self.sample_rate))
+
+    def _flush_segmenter(self):
+        if self.segmenter:
+            self._enqueue(self.segmenter.flush())
+
+    def _enqueue(self, chunks, read_at=None):
+        """
+        Lossless for VODs/files. For live sources, once the backlog passes `catchup_seconds`:
+          1. silent chunks are skipped (nothing is lost, the timestamps of the rest don't move)
+          2. the backlog (backlog_seconds()) drives the quality controller, see quality.py
+          3. past `max_buffer_seconds` the oldest queued audio is dropped; the next chunk carries a "[skipped N s]" marker
+        The backlog includes audio the consumer already took (downstream_seconds), so the bound holds end to end.
+        """
+        for chunk in chunks:
+            if self.is_live and self.backlog_seconds() > self.catchup_seconds and self._is_silent(chunk.audio):
+                self.ring.release(chunk.audio)
+                self.metrics.inc("catchup_seconds_total", len(chunk.audio) / self.sample_rate, action="silence_skipped")
+                continue
+
+            now = time.monotonic()
+            self.audio_queue.put(chunk._replace(enqueued_at=now))
+            if read_at is not None:
+                self.metrics.observe("stage_seconds", now - read_at, stage="capture_to_enqueue")
+
+            downstream = self.downstream_seconds() if self.downstream_seconds else 0.0
+            if self.is_live and self.audio_queue.seconds + downstream > self.max_buffer_seconds:
+                dropped = self.audio_queue.drop_oldest(max(0.0, self.max_buffer_seconds - downstream))
+                if dropped:
+                    self.metrics.inc("catchup_seconds_total", dropped, action="dropped")
+                    print(f"[Audio] Live backlog over {self.max_buffer_seconds:.0f}s, skipped {dropped:.1f}s of the oldest audio.")
+
+        self.metrics.set("queue_depth", self.audio_queue.qsize(), queue="audio")
+        self.metrics.set("buffered_seconds", self.backlog_seconds())
+        self.metrics.set("ring_used_seconds", self.ring.used_samples() / self.sample_rate)
+
+    def backlog_seconds(self):
+        """Captured audio not transcribed yet: the queue plus whatever the consumer still holds"""
+        return self.audio_queue.seconds + (self.downstream_seconds() if self.downstream_seconds else 0.0)
+
+    def _is_silent(self, audio):
+        block = min(self.sample_rate // 10, len(audio))
+        if block == 0: return True
+        n = len(audio) // block
+        rms = np.sqrt(np.square(audio[:n * block]).reshape(n, block).mean(axis=1))
+        return float(rms.max()) < self.silence_threshold
 
     def get_live_stream_url(self, url):
         try:
@@ -39,71 +275,85 @@ class AudioCapture:
             print(f"[Error extracting Live URL]: {e}")
         return None
 
-    def _download_vod(self, url, status_callback=None):
-        if os.path.exists(self.temp_filename):
-            try: os.remove(self.temp_filename)
-            except: pass
-            
-        if status_callback:
-            status_callback("[System] Initializing Download...\n")
-
-        cmd =[
-            # Also updated fallback to ba/b here to prevent VODs from failing
-            'yt-dlp', '-f', 'ba/b', 
-            '-x', '--audio-format', 'wav', 
-            '-o', 'temp_vod.%(ext)s',
-            '--postprocessor-args', f'ffmpeg:-ar {self.sample_rate} -ac 1',
-            '--force-overwrites',
-            '--user-agent', 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-            '--no-check-certificate'
-        ]
-
-        # --- YT-DLP COOKIE INJECTION (BYPASS BLOCKING) - COMMENTED OUT FOR NOW ---
-        # cookie_path = os.getenv("YTDLP_COOKIES")
-        # if cookie_path and os.path.exists(cookie_path):
-        #     cmd.extend(['--cookies', cookie_path])
-
-        # Always append URL *last* when passing arguments to subprocess
-        cmd.append(url)
-
-        process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, bufsize=1)
-
-        for line in process.stdout:
-            if status_callback:
-                if "[download]" in line: status_callback(line.strip())
-                elif "ERROR" in line: status_callback(f"[YT-DLP LOG]: {line.strip()}")
-
-        process.wait()
+    def _process_ffmpeg_stream(self, input_source, realtime=False):
+        self._run_ffmpeg(input_source, realtime=realtime)
+        self._finish_stream()
 
-        if os.path.exists("temp_vod.wav"): return "temp_vod.wav"
-        return None
-
-    def _process_ffmpeg_stream(self, input_source):
+    def _run_ffmpeg(self, input_source, stdin=None, realtime=False):
+        """
+        Decodes `input_source` ('pipe:0' reads `stdin`) into the queue. Returns the samples read.
+        realtime: ffmpeg reads the input at playback speed (-re), like a livestream delivers it.
+        """
         ffmpeg_cmd =[
-            'ffmpeg', '-i', input_source, 
+            'ffmpeg', *(['-re'] if realtime else []), '-i', input_source, 
             '-f', 's16le', '-ac', '1',
             '-ar', str(self.sample_rate), '-acodec', 'pcm_s16le', '-loglevel', 'quiet', '-'
         ]
         
-        self.process = subprocess.Popen(ffmpeg_cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        self.process = subprocess.Popen(ffmpeg_cmd, stdin=stdin, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        # ffmpeg owns the pipe now; closing our end lets it see EOF / yt-dlp see a broken pipe
+        if stdin is not None: stdin.close()
+        self._reset_stream_clock()
+        samples = 0
 
         while self.is_capturing:
-            raw_audio = self.process.stdout.read(self.chunk_samples * 2)
-            if not raw_audio: break
-            
-            audio_np = np.frombuffer(raw_audio, dtype=np.int16).astype(np.float32) / 32768.0
-            self.audio_queue.put(audio_np)
-        
-        if input_source == "temp_vod.wav" and os.path.exists(input_source):
-            try: os.remove(input_source)
-            except: pass
+            # Wait for ring space (only happens when transcription is far behind a file/VOD)
+            slot = self.ring.reserve(self.read_samples, timeout=0.5)
+            if slot is None: continue
+            audio_np = self.ring.read_block(self.process.stdout, self.read_samples, slot)
+            if audio_np is None:
+                self._stream_complete = self.process.wait() == 0
+                break
+            if self.cache_writer: self.cache_writer.write(memoryview(self.ring.raw)[:len(audio_np) * 2])
+            samples += len(audio_np)
+            self._emit_audio(audio_np, time.monotonic())
+        return samples
+
+    def _play_cached(self, pcm):
+        """Replays memory-mapped PCM from the cache: no network, no ffmpeg"""
+        self._reset_stream_clock()
+        pos = 0
+        while self.is_capturing and pos < len(pcm):
+            slot = self.ring.reserve(min(self.read_samples, len(pcm) - pos), timeout=0.5)
+            if slot is None: continue
+            audio_np = self.ring.convert(pcm[pos:pos + len(slot)], slot)
+            pos += len(audio_np)
+            self._emit_audio(audio_np, time.monotonic())
+        self._finish_stream()
+
+    def _start_cached(self, source, status_callback=None):
+        """Starts replaying `source` from the cache if it is there, otherwise arms the cache writer"""
+        key = source_key(source)
+        pcm = self.cache.load(key, source)
+        if pcm is not None:
+            if status_callback: status_callback(f"[Audio] Using cached audio ({len(pcm) / self.sample_rate / 60:.1f} min).\n")
+            threading.Thread(target=self._play_cached, args=(pcm,), daemon=True).start()
+            return True
+        self.cache_writer = self.cache.writer(key, source)
+        self._stream_complete = False
+        return False
+
+    def _finish_stream(self):
+        if self.cache_writer:
+            # Only a stream decoded to its end is worth keeping
+            if self._stream_complete: self.cache_writer.commit()
+            else: self.cache_writer.abort()
+            self.cache_writer = None
+        if self.is_capturing: self._flush_segmenter()
         self.stop()
 
-    def _mic_callback(self, indata, frames, time, status):
-        if self.is_capturing: self.audio_queue.put(indata.copy().flatten())
+    def _mic_callback(self, indata, frames, time_info, status):
+        if not self.is_capturing: return
+        # The audio callback must never block: no ring space means the block is lost
+        slot = self.ring.reserve(frames, timeout=0)
+        if slot is None:
+            self.metrics.inc("catchup_seconds_total", frames / self.sample_rate, action="dropped")
+            return
+        self._emit_audio(self.ring.write(indata, slot), time.monotonic())
 
     def start_youtube(self, url, is_live, status_callback=None):
         self.is_capturing = True
+        self.is_live = is_live
         if is_live:
             if status_callback: status_callback("[Audio] Live Mode: Connecting to stream...\n")
             stream_url = self.get_live_stream_url(url)
@@ -112,31 +362,80 @@ class AudioCapture:
             else:
                 if status_callback: status_callback("⚠️ Failed to get Live URL.\n")
                 self.is_capturing = False
-        else:
-            threading.Thread(target=self._handle_vod_download_and_play, args=(url, status_callback), daemon=True).start()
+        elif not self._start_cached(url, status_callback):
+            handler = self._handle_vod_stream if self.vod_mode == "stream" else self._handle_vod_download_and_play
+            threading.Thread(target=handler, args=(url, status_callback), daemon=True).start()
+
+    def _handle_vod_stream(self, url, status_callback):
+        """
+        Progressive VOD: yt-dlp writes the audio to stdout, ffmpeg decodes it as it arrives,
+        so transcription starts within seconds and no WAV is written to disk.
+        Falls back to the download path if no audio comes out at all.
+        """
+        if status_callback: status_callback("[Audio] VOD Mode: Streaming audio...\n")
+        cmd = [
+            'yt-dlp', '-f', 'ba/b', '-o', '-', '--quiet', '--progress', '--newline',
+            '--user-agent', 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+            '--no-check-certificate',
+            url
+        ]
+        try:
+            self.source_process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        except OSError as e:
+            print(f"[YT-DLP Error]: {e}")
+            self.source_process = None
+
+        samples = 0
+        if self.source_process:
+            threading.Thread(target=self._relay_ytdlp_log, args=(self.source_process.stderr, status_callback), daemon=True).start()
+            samples = self._run_ffmpeg("pipe:0", stdin=self.source_process.stdout)
+            # A yt-dlp failure mid-way still ends in a clean EOF for ffmpeg
+            if self.source_process.wait() != 0: self._stream_complete = False
+
+        if samples == 0 and self.is_capturing:
+            if status_callback: status_callback("[Audio] Streaming produced no audio, falling back to download...\n")
+            self._handle_vod_download_and_play(url, status_callback)
+            return
+        self._finish_stream()
+
+    def _relay_ytdlp_log(self, stderr, status_callback):
+        for raw in stderr:
+            line = raw.decode("utf-8", "replace").strip()
+            if not status_callback or not line: continue
+            if "[download]" in line: status_callback(line)
+            elif "ERROR" in line: status_callback(f"[YT-DLP LOG]: {line}")
 
     def _handle_vod_download_and_play(self, url, status_callback):
-        filename = self._download_vod(url, status_callback)
+        self.temp_dir = tempfile.mkdtemp(prefix="vod_")
+        filename = download_vod(url, self.temp_dir, self.sample_rate, status_callback)
         if filename:
             if status_callback: status_callback(f"\n[Audio] Download complete. Processing...\n{'='*50}\n")
             self._process_ffmpeg_stream(filename)
         else:
             if status_callback: status_callback("\n[Critical Error] Download failed.\n")
-            self.is_capturing = False
+            self._finish_stream()
 
-    def start_file(self, file_path):
+    def start_file(self, file_path, realtime=False):
+        """realtime: play the file at normal speed and treat it as a live source (stand-in for a livestream in tests)"""
         self.is_capturing = True
-        threading.Thread(target=self._process_ffmpeg_stream, args=(file_path,), daemon=True).start()
+        self.is_live = realtime
+        if not realtime and self._start_cached(file_path): return
+        threading.Thread(target=self._process_ffmpeg_stream, args=(file_path, realtime), daemon=True).start()
 
     def start_mic(self):
+        # Imported here so headless/server use doesn't need PortAudio installed
+        import sounddevice as sd
         self.is_capturing = True
-        self.mic_stream = sd.InputStream(samplerate=self.sample_rate, channels=1, dtype='float32', blocksize=self.chunk_samples, callback=self._mic_callback)
+        self.is_live = True
+        self._reset_stream_clock()
+        self.mic_stream = sd.InputStream(samplerate=self.sample_rate, channels=1, dtype='float32', blocksize=self.read_samples, callback=self._mic_callback)
         self.mic_stream.start()
 
     def stop(self):
         self.is_capturing = False
         if self.process: self.process.kill()
+        if self.source_process: self.source_process.kill()
         if hasattr(self, 'mic_stream'): self.mic_stream.stop(); self.mic_stream.close()
-        if os.path.exists(self.temp_filename):
-            try: os.remove(self.temp_filename)
-            except: pass
\ No newline at end of file
+        if self.temp_dir:
+            shutil.rmtree(self.temp_dir, ignore_errors=True)
+            self.temp_dir = None
\ No newline at end of file
@@ -0,0 +1,138 @@
+"""
+Overnight batch jobs: spread many files over a pool of worker processes, each with its own AIEngine.
+
+    python batch_runner.py recordings/ --src ja --tgt en --workers 4 --offline
+    python batch_runner.py a.mp4 b.mp4 c.mkv --workers 2 --out-dir subs
+
+The CPU cores are split between the workers (Whisper cpu_threads + torch intra-op threads),
+so N processes don't fight over the same cores. Progress is kept in <out-dir>/manifest.json:
+re-running the same command skips inputs that are already done.
+All cli.py options (--formats, --gloss-backend, --offline, ...) are accepted.
+"""
+import json
+import multiprocessing as mp
+import os
+import time
+
+import cli
+
+MEDIA_EXTENSIONS = {".wav", ".mp3", ".m4a", ".aac", ".flac", ".ogg", ".opus", ".mp4", ".mkv", ".webm", ".mov", ".ts"}
+
+
+def expand_inputs(inputs):
+    """Directories become the media files inside them (recursively), everything else is kept as-is"""
+    found = []
+    for item in inputs:
+        if os.path.isdir(item):
+            for root, _, files in os.walk(item):
+                for name in sorted(files):
+                    if os.path.splitext(name)[1].lower() in MEDIA_EXTENSIONS:
+                        found.append(os.path.abspath(os.path.join(root, name)))
+        elif os.path.exists(item):
+            found.append(os.path.abspath(item))
+        else:
+            found.append(item)  # URL
+    return found
+
+
+# --- MANIFEST ---
+def load_manifest(path):
+    if os.path.exists(path):
+        try:
+            with open(path, "r") as f: return json.load(f)
+        except: pass
+    return {"jobs": {}}
+
+def save_manifest(path, manifest):
+    # Write-then-rename so an interrupted run never leaves a half-written manifest
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f: json.dump(manifest, f, indent=4, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+# --- WORKER PROCESS ---
+_worker = {}
+
+def _init_worker(engine_args, args, threads):
+    os.environ["OMP_NUM_THREADS"] = str(threads)
+    import torch
+    torch.set_num_threads(threads)
+    try: torch.set_num_interop_threads(1)
+    except RuntimeError: pass
+
+    args.cpu_threads = threads
+    _worker["engine_args"] = engine_args
+    _worker["args"] = args
+
+def _run_job(source):
+    try:
+        summary = cli.run_input(source, _worker["engine_args"], _worker["args"])
+        summary["status"] = "done"
+    except (Exception, SystemExit) as e:
+        summary = {"source": source, "status": "failed", "error": str(e) or type(e).__name__}
+    summary["worker"] = os.getpid()
+    return summary
+
+
+def main(argv=None):
+    parser = cli.build_parser()
+    parser.description = "Parallel batch transcription over a pool of worker processes"
+    parser.add_argument("--workers", type=int, default=0, help="Worker processes (default: cores / 4)")
+    parser.add_argument("--retry-failed", action="store_true", help="Also re-run inputs that failed last time")
+    args = parser.parse_args(argv)
+
+    cores = os.cpu_count() or 1
+    workers = args.workers or max(1, cores // 4)
+    threads = args.cpu_threads or max(1, cores // workers)
+    if args.device is None: args.device = "cpu"
+
+    os.makedirs(args.out_dir, exist_ok=True)
+    manifest_path = os.path.join(args.out_dir, "manifest.json")
+    manifest = load_manifest(manifest_path)
+    jobs = manifest["jobs"]
+
+    sources = expand_inputs(args.inputs)
+    for source in sources:
+        jobs.setdefault(source, {"status": "pending"})
+
+    skip = {"done"} if args.retry_failed else {"done", "failed"}
+    todo = [s for s in sources if jobs[s]["status"] not in skip]
+    print(f"[BATCH] {len(sources)} inputs, {len(sources) - len(todo)} already handled, {len(todo)} to run "
+          f"on {workers} workers x {threads} threads")
+    save_manifest(manifest_path, manifest)
+    if not todo: return
+
+    engine_args = cli.resolve_engine_args(args)
+    t0 = time.perf_counter()
+
+    ctx = mp.get_context("spawn")
+    with ctx.Pool(workers, initializer=_init_worker, initargs=(engine_args, args, threads)) as pool:
+        for summary in pool.imap_unordered(_run_job, todo):
+            jobs[summary["source"]] = summary
+            save_manifest(manifest_path, manifest)
+            done = sum(1 for s in todo if jobs[s]["status"] in ("done", "failed"))
+            print(f"[BATCH] {done}/{len(todo)} {summary['status'].upper()}: {summary['source']}", flush=True)
+
+    # --- SUMMARY ---
+    wall = time.perf_counter() - t0
+    finished = [jobs[s] for s in todo if jobs[s]["status"] == "done"]
+    failed = [jobs[s] for s in todo if jobs[s]["status"] == "failed"]
+    audio = sum(j["audio_seconds"] for j in finished)
+    compute = sum(j["elapsed"] for j in finished)
+
+    print(f"\n[SUMMARY] {len(finished)} done, {len(failed)} failed, wall time {cli.format_clock(wall)}")
+    if audio:
+        print(f"[SUMMARY] {cli.format_clock(audio)} of audio -> {audio / wall:.2f} audio-hours per hour "
+              f"(per worker RTF {compute / audio:.3f}, {workers} workers)")
+    for job in failed:
+        print(f"[SUMMARY] FAILED {job['source']}: {job.get('error')}")
+
+    manifest["last_run"] = {
+        "workers": workers, "threads_per_worker": threads, "wall_seconds": round(wall, 1),
+        "audio_seconds": round(audio, 1), "audio_hours_per_hour": round(audio / wall, 3) if wall else 0.0,
+    }
+    save_manifest(manifest_path, manifest)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,525 @@
+"""
+Benchmarks for the transcription pipeline.
+
+    python benchmark.py gloss --dict JMdict_e.gz --model Helsinki-NLP/opus-mt-ja-en
+    python benchmark.py offline stream.mp4 --limit 600
+    python benchmark.py stages --backend stub --seconds 120 --output results.json
+    python benchmark.py stages --backend real --whisper-size tiny --model Helsinki-NLP/opus-mt-ja-en --audio sample.wav
+    python benchmark.py capture --seconds 3600 --lag 4
+    python benchmark.py translate --model Helsinki-NLP/opus-mt-ja-en --repeat 5
+
+`stages` times every step of the pipeline separately (PCM convert, Whisper, sentence translation,
+pykakasi, gloss, formatting) plus the end-to-end real-time factor, serial and pipelined.
+With --backend stub no model is downloaded, so it runs anywhere on CPU.
+
+`capture` replays a long s16le stream through AudioCapture, once with the old read path (bytes + two
+new arrays per read) and once through the ring buffer, and reports bytes allocated per audio hour
+and peak RSS growth. Each run is a separate process so the RSS numbers don't mix.
+
+`translate` runs the sentence and gloss translation calls through the PyTorch backend and the
+CTranslate2 int8 one, and reports items/second for each and how many outputs are identical.
+"""
+import argparse
+import json
+import platform
+import time
+
+import numpy as np
+
+import gloss_dictionary
+
+# Used when no --text file is given. Typical stream chatter.
+SAMPLE_JA = [
+    "皆さんこんにちは、今日も配信に来てくれてありがとうございます",
+    "週間の次は一年行きましょう",
+    "スパチャありがとうございます、めっちゃ嬉しいです",
+    "今日はゲームをやっていきたいと思います",
+    "ちょっと待って、これ難しくない？",
+    "それではまた明日会いましょう、おつかれさまでした",
+]
+
+
+def load_sentences(text_path=None):
+    if not text_path: return list(SAMPLE_JA)
+    with open(text_path, "r", encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def tokenize_sentences(sentences):
+    """Same tokenization as AIEngine.build_records: pykakasi tokens, grouped per sentence"""
+    import pykakasi
+    kks = pykakasi.kakasi()
+    return [kks.convert(s) for s in sentences]
+
+
+class NeuralGlosser:
+    """Minimal copy of the AIEngine gloss call path (one generate() per sentence's token batch)"""
+
+    def __init__(self, model_id, device="cpu"):
+        from transformers import MarianMTModel, MarianTokenizer
+        self.device = device
+        self.tokenizer = MarianTokenizer.from_pretrained(model_id)
+        self.model = MarianMTModel.from_pretrained(model_id).to(device)
+
+    def gloss(self, words):
+        inputs = self.tokenizer(words, return_tensors="pt", padding=True).to(self.device)
+        generated = self.model.generate(**inputs, max_length=50)
+        return self.tokenizer.batch_decode(generated, skip_special_tokens=True)
+
+
+def bench_gloss(dict_path, model_id=None, text_path=None, repeat=5, target_lang="en"):
+    parsed_sentences = tokenize_sentences(load_sentences(text_path))
+    n_tokens = sum(len(p) for p in parsed_sentences) * repeat
+    report = {"tokens": n_tokens}
+
+    # --- Dictionary path ---
+    dictionary = gloss_dictionary.GlossDictionary(dict_path, target_lang)
+    t0 = time.perf_counter()
+    dictionary.load()
+    report["dictionary_load_seconds"] = round(time.perf_counter() - t0, 3)
+
+    glosser = NeuralGlosser(model_id) if model_id else None
+
+    hits = 0
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        for parsed in parsed_sentences:
+            misses = []
+            for item in parsed:
+                if dictionary.lookup(item['orig'], item['hira']) is None:
+                    misses.append(item['orig'])
+                else:
+                    hits += 1
+            # Misses go to the neural fallback, same as AIEngine.gloss_words
+            if misses and glosser: glosser.gloss(misses)
+    elapsed = time.perf_counter() - t0
+    report["dictionary_glosses_per_sec"] = round(n_tokens / elapsed, 1)
+    report["dictionary_hit_rate"] = round(hits / n_tokens, 3) if n_tokens else 0.0
+    report["dictionary_includes_fallback"] = glosser is not None
+
+    # --- Neural path ---
+    if glosser:
+        t0 = time.perf_counter()
+        for _ in range(repeat):
+            for parsed in parsed_sentences:
+                glosser.gloss([item['orig'] for item in parsed])
+        elapsed = time.perf_counter() - t0
+        report["neural_glosses_per_sec"] = round(n_tokens / elapsed, 1)
+        report["speedup"] = round(report["dictionary_glosses_per_sec"] / report["neural_glosses_per_sec"], 1)
+
+    return report
+
+
+def bench_translate(model_id="Helsinki-NLP/opus-mt-ja-en", text_path=None, repeat=3, device="cpu", batch_size=32):
+    """Sentences and gloss words per second: PyTorch generate() vs CTranslate2, same call shapes as AIEngine"""
+    import translator_backends
+    from transcriber import load_translators, select_device
+
+    sentences = load_sentences(text_path)
+    parsed_sentences = tokenize_sentences(sentences)
+    t_type = "helsinki" if "opus-mt" in model_id else "nllb"
+    chain = [(model_id, None if t_type == "helsinki" else "jpn_Jpan")]
+    target_token = None if t_type == "helsinki" else "eng_Latn"
+    device, _, dtype = select_device(device)
+    report = {"model": model_id, "device": device, "sentences": len(sentences) * repeat,
+              "gloss_words": sum(len(p) for p in parsed_sentences) * repeat}
+
+    outputs = {}
+    for backend in translator_backends.BACKENDS:
+        hops = load_translators(chain, device, dtype, backend, target_token)
+
+        def run(texts, max_length):
+            for hop in hops: texts = hop.translate(texts, max_length)
+            return texts
+
+        run(sentences[:2], 50)  # warm-up (first call allocates)
+        # Sentence path: length-sorted batches like AIEngine.translate_batch
+        ordered = sorted(sentences, key=len)
+        t0 = time.perf_counter()
+        for _ in range(repeat):
+            sent_out = [out for b in range(0, len(ordered), batch_size) for out in run(ordered[b:b + batch_size], 200)]
+        sent_seconds = time.perf_counter() - t0
+
+        # Gloss path: one call per sentence with its pykakasi tokens
+        t0 = time.perf_counter()
+        for _ in range(repeat):
+            gloss_out = [run([item['orig'] for item in parsed], 50) for parsed in parsed_sentences]
+        gloss_seconds = time.perf_counter() - t0
+
+        label = backend if backend == "torch" else f"ct2_{translator_backends.ct2_compute_type(device)}"
+        report[label] = {
+            "sentences_per_sec": round(report["sentences"] / sent_seconds, 1),
+            "gloss_words_per_sec": round(report["gloss_words"] / gloss_seconds, 1),
+            "context": bench_context(hops[0], sentences),
+        }
+        outputs[backend] = (sent_out, [g for group in gloss_out for g in group])
+
+    (torch_sent, torch_gloss), (ct2_sent, ct2_gloss) = outputs["torch"], outputs["ct2"]
+    ct2 = report[f"ct2_{translator_backends.ct2_compute_type(device)}"]
+    ct2["sentence_speedup"] = round(ct2["sentences_per_sec"] / report["torch"]["sentences_per_sec"], 2)
+    ct2["gloss_speedup"] = round(ct2["gloss_words_per_sec"] / report["torch"]["gloss_words_per_sec"], 2)
+    report["identical_sentences"] = round(sum(a == b for a, b in zip(torch_sent, ct2_sent)) / len(torch_sent), 3)
+    report["identical_glosses"] = round(sum(a == b for a, b in zip(torch_gloss, ct2_gloss)) / max(1, len(torch_gloss)), 3)
+    report["mismatches"] = [{"torch": a, "ct2": b} for a, b in zip(torch_sent, ct2_sent) if a != b][:5]
+    return report
+
+
+def bench_context(hop, sentences, max_length=200):
+    """
+    One sentence after the other with the previous one as context: re-translating "previous + current"
+    (the old approach) vs forcing the previous translation as decoder prefix (AIEngine.translate_in_context)
+    """
+    pairs = list(zip(sentences, sentences[1:]))
+    if not pairs: return {}
+    report = {}
+
+    t0 = time.perf_counter()
+    tokens = 0
+    for prev, cur in pairs:
+        hop.translate([f"{prev} {cur}"], max_length)
+        tokens += hop.last_token_counts[0][0]
+    report["rejoin"] = {"ms_per_sentence": round((time.perf_counter() - t0) * 1000 / len(pairs), 1),
+                        "generated_tokens_per_sentence": round(tokens / len(pairs), 1)}
+
+    prev_out = hop.translate([sentences[0]], max_length)[0]
+    t0 = time.perf_counter()
+    tokens = forced = 0
+    for prev, cur in pairs:
+        prev_out = hop.translate([f"{prev} {cur}"], max_length, prefixes=[prev_out])[0].strip()
+        tokens += hop.last_token_counts[0][0]
+        forced += hop.last_token_counts[0][1]
+    report["prefix"] = {"ms_per_sentence": round((time.perf_counter() - t0) * 1000 / len(pairs), 1),
+                        "generated_tokens_per_sentence": round(tokens / len(pairs), 1),
+                        "context_tokens_per_sentence": round(forced / len(pairs), 1)}
+    report["speedup"] = round(report["rejoin"]["ms_per_sentence"] / max(report["prefix"]["ms_per_sentence"], 1e-6), 2)
+    return report
+
+
+def bench_offline(path, model_size="medium", device="cpu", batch_size=16, language=None, limit_seconds=None):
+    """Whisper only: today's 8 s chunk loop vs the offline batched path, in audio-hours per wall-clock hour"""
+    import offline
+    from model_registry import get_registry
+
+    pcm = offline.decode_audio(path)
+    if limit_seconds: pcm = pcm[:int(limit_seconds * 16000)]
+    audio_seconds = len(pcm) / 16000.0
+    whisper = get_registry().get_whisper(model_size, device, "int8" if device == "cpu" else "float16")
+    report = {"audio_seconds": round(audio_seconds, 1), "model": model_size, "device": device}
+
+    # --- Live-style path: one transcribe(beam_size=5) per 8 s chunk ---
+    chunk = 8 * 16000
+    t0 = time.perf_counter()
+    n_chunked = 0
+    for i in range(0, len(pcm), chunk):
+        segments, _ = whisper.transcribe(pcm[i:i + chunk].astype("float32") / 32768.0, language=language, beam_size=5, vad_filter=True)
+        n_chunked += sum(1 for _ in segments)
+    elapsed = time.perf_counter() - t0
+    report["chunked_seconds"] = round(elapsed, 1)
+    report["chunked_audio_hours_per_hour"] = round(audio_seconds / elapsed, 2)
+    report["chunked_segments"] = n_chunked
+
+    # --- Offline path: pause-cut windows, batched decoding of speech regions ---
+    batched = offline.load_batched_pipeline(whisper)
+    t0 = time.perf_counter()
+    n_batched = 0
+    for window in offline.iter_windows(pcm):
+        _, found = offline.transcribe_window(whisper, batched, window.audio, language, batch_size)
+        n_batched += len(found)
+    elapsed = time.perf_counter() - t0
+    report["batched_seconds"] = round(elapsed, 1)
+    report["batched_audio_hours_per_hour"] = round(audio_seconds / elapsed, 2)
+    report["batched_segments"] = n_batched
+    report["speedup"] = round(report["batched_audio_hours_per_hour"] / report["chunked_audio_hours_per_hour"], 2)
+    return report
+
+
+# --- STAGE SUITE ---
+def synth_audio(seconds, sample_rate=16000, seed=0):
+    """Speech-like test signal: 0.5-3 s voiced bursts (harmonics + noise) separated by 0.2-0.8 s pauses"""
+    rng = np.random.default_rng(seed)
+    out = (rng.standard_normal(int(seconds * sample_rate)) * 0.002).astype(np.float32)
+    pos = int(rng.uniform(0.2, 0.8) * sample_rate)
+    while pos < len(out):
+        n = min(int(rng.uniform(0.5, 3.0) * sample_rate), len(out) - pos)
+        t = np.arange(n) / sample_rate
+        f0 = rng.uniform(100, 250)
+        voiced = sum(np.sin(2 * np.pi * f0 * k * t) / k for k in range(1, 6))
+        envelope = np.sin(np.pi * np.arange(n) / n)
+        out[pos:pos + n] += (0.1 * voiced * envelope + 0.01 * rng.standard_normal(n)).astype(np.float32)
+        pos += n + int(rng.uniform(0.2, 0.8) * sample_rate)
+    return out
+
+
+def _timed(items, fn):
+    """Calls fn(item) for each item, returns (total_seconds, per-item latency summary in ms)"""
+    latencies = []
+    for item in items:
+        t0 = time.perf_counter()
+        fn(item)
+        latencies.append(time.perf_counter() - t0)
+    lat = np.array(latencies or [0.0]) * 1000
+    return float(lat.sum() / 1000), {
+        "mean": round(float(lat.mean()), 3), "p50": round(float(np.percentile(lat, 50)), 3),
+        "p95": round(float(np.percentile(lat, 95)), 3), "max": round(float(lat.max()), 3),
+    }
+
+
+def _stage(units, count, seconds, latency):
+    return {"items": count, "seconds": round(seconds, 4),
+            f"{units}_per_sec": round(count / seconds, 2) if seconds else None, "latency_ms": latency}
+
+
+def build_bench_engine(backend, whisper_size="tiny", model_id=None, device="cpu", stub_cost=0.0):
+    from transcriber import AIEngine
+
+    if backend == "stub":
+        from stub_models import StubTokenizer, StubTranslator, StubWhisperModel
+        return AIEngine("helsinki", "ja", "en", "jpn_Jpan", "eng_Latn", None, use_translation_memory=False, device=device,
+                        whisper=StubWhisperModel(seconds_per_audio_second=stub_cost),
+                        translator=StubTranslator(seconds_per_token=stub_cost / 100), tokenizer=StubTokenizer())
+
+    from model_registry import get_registry
+    whisper = get_registry().get_whisper(whisper_size, device, "int8" if device == "cpu" else "float16")
+    t_type = "helsinki" if model_id else "nllb"
+    return AIEngine(t_type, "ja", "en", "jpn_Jpan", "eng_Latn", model_id, use_translation_memory=False, device=device, whisper=whisper)
+
+
+def bench_stages(backend="stub", seconds=120.0, audio_path=None, whisper_size="tiny", model_id=None, device="cpu", stub_cost=0.0):
+    from segmenter import AudioChunk
+    from pipeline import ProcessingPipeline
+
+    sr = 16000
+    report = {"meta": {
+        "backend": backend, "whisper_size": whisper_size if backend == "real" else "stub",
+        "translator": model_id if backend == "real" else "stub", "device": device,
+        "audio": audio_path or f"synthetic:{seconds}s", "platform": platform.platform(),
+        "python": platform.python_version(), "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }, "stages": {}}
+    stages = report["stages"]
+
+    # --- PCM decode / convert ---
+    if audio_path:
+        import offline
+        t0 = time.perf_counter()
+        pcm = offline.decode_audio(audio_path)
+        decode_seconds = time.perf_counter() - t0
+        stages["ffmpeg_decode"] = _stage("audio_seconds", round(len(pcm) / sr, 1), decode_seconds, None)
+    else:
+        pcm = (np.clip(synth_audio(seconds), -1, 1) * 32767).astype(np.int16)
+    audio_seconds = len(pcm) / sr
+    report["meta"]["audio_seconds"] = round(audio_seconds, 1)
+
+    chunk_samples = 8 * sr
+    raw_chunks = [pcm[i:i + chunk_samples].tobytes() for i in range(0, len(pcm), chunk_samples)]
+    chunks = []
+    total, lat = _timed(raw_chunks, lambda raw: chunks.append(np.frombuffer(raw, dtype=np.int16).astype(np.float32) / 32768.0))
+    stages["pcm_convert"] = _stage("chunks", len(raw_chunks), total, lat)
+    audio_chunks = [AudioChunk(c, i * 8.0, 0.0) for i, c in enumerate(chunks)]
+
+    engine = build_bench_engine(backend, whisper_size, model_id, device, stub_cost)
+
+    # --- Whisper ---
+    segments_per_chunk = []
+    total, lat = _timed(audio_chunks, lambda c: segments_per_chunk.append(engine.transcribe_chunk(c)))
+    stages["whisper"] = _stage("chunks", len(audio_chunks), total, lat)
+    stages["whisper"]["audio_seconds_per_sec"] = round(audio_seconds / total, 2) if total else None
+    segments = [seg for segs in segments_per_chunk for seg in segs]
+
+    # --- Sentence translation (one batch per chunk, like the pipeline) ---
+    total, lat = _timed(segments_per_chunk, engine.translate_segments)
+    stages["translation"] = _stage("sentences", len(segments), total, lat)
+
+    # --- pykakasi ---
+    parsed = []
+    total, lat = _timed(segments, lambda seg: parsed.append(engine.kks.convert(seg['text'])))
+    stages["pykakasi"] = _stage("sentences", len(segments), total, lat)
+
+    # --- Gloss ---
+    total, lat = _timed(parsed, engine.gloss_words)
+    stages["gloss"] = _stage("tokens", sum(len(p) for p in parsed), total, lat)
+
+    # --- Formatting only (records built beforehand) ---
+    records = engine.build_records(segments)
+    total, lat = _timed(records, engine.format_record)
+    stages["formatting"] = _stage("records", len(records), total, lat)
+
+    # --- End to end ---
+    engine.reset_memory()
+    t0 = time.perf_counter()
+    for c in audio_chunks: engine.process_audio(c)
+    serial = time.perf_counter() - t0
+
+    engine.reset_memory()
+    outputs = []
+    pipeline = ProcessingPipeline(engine, outputs.append)
+    t0 = time.perf_counter()
+    for c in audio_chunks: pipeline.submit(c)
+    while not pipeline.is_idle(): time.sleep(0.005)
+    pipelined = time.perf_counter() - t0
+    pipeline.stop()
+
+    report["end_to_end"] = {
+        "serial_seconds": round(serial, 3), "serial_rtf": round(serial / audio_seconds, 4),
+        "pipelined_seconds": round(pipelined, 3), "pipelined_rtf": round(pipelined / audio_seconds, 4),
+        "segments": len(outputs),
+    }
+    return report
+
+
+# --- CAPTURE PATH ---
+def _rss_mb(reset_peak=False):
+    if reset_peak:
+        # Linux: restart the VmHWM (peak RSS) counter so the setup doesn't count
+        try:
+            with open("/proc/self/clear_refs", "w") as f: f.write("5")
+        except OSError: pass
+    with open("/proc/self/status") as f:
+        fields = dict(line.split(":", 1) for line in f)
+    return int(fields["VmRSS"].split()[0]) / 1024, int(fields["VmHWM"].split()[0]) / 1024
+
+
+def _capture_run(mode, seconds, lag, segment_mode):
+    """
+    One capture session over `seconds` of synthetic s16le. The consumer takes one chunk for every
+    `lag` reads (inference slower than real time), then drains the rest at the end.
+    """
+    import gc
+    import io
+    import queue
+    import tracemalloc
+    from audio_capture import AudioCapture
+
+    sr = 16000
+    stream = io.BytesIO((np.clip(synth_audio(seconds), -1, 1) * 32767).astype(np.int16).tobytes())
+    cap = AudioCapture(sr, segment_mode=segment_mode)
+    n = cap.read_samples
+    gc.collect()
+    rss_start, _ = _rss_mb(reset_peak=True)
+
+    tracemalloc.start()
+    allocated, reads, t0 = 0, 0, time.perf_counter()
+
+    def step(fn):
+        # Bytes allocated by one call = its traced peak above what was alive before
+        nonlocal allocated
+        before = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        result = fn()
+        allocated += tracemalloc.get_traced_memory()[1] - before
+        return result
+
+    def consume():
+        return len(cap.audio_queue.get_nowait().audio)
+
+    def read_legacy():
+        raw = stream.read(n * 2)
+        if not raw: return False
+        cap._emit_audio(np.frombuffer(raw, dtype=np.int16).astype(np.float32) / 32768.0)
+        return True
+
+    def read_ring():
+        slot = cap.ring.reserve(n, timeout=0)
+        while slot is None:
+            # Ring full: the real capture thread waits here for the consumer
+            consume()
+            slot = cap.ring.reserve(n, timeout=0)
+        audio_np = cap.ring.read_block(stream, n, slot)
+        if audio_np is None: return False
+        cap._emit_audio(audio_np)
+        return True
+
+    read = read_legacy if mode == "legacy" else read_ring
+    while step(read):
+        reads += 1
+        if reads % lag == 0:
+            try: step(consume)
+            except queue.Empty: pass
+    while True:
+        try: step(consume)
+        except queue.Empty: break
+
+    elapsed = time.perf_counter() - t0
+    tracemalloc.stop()
+    _, rss_peak = _rss_mb()
+    return {
+        "reads": reads, "seconds": round(elapsed, 3),
+        "allocated_mb_per_audio_hour": round(allocated / 2**20 / (seconds / 3600), 1),
+        "rss_start_mb": round(rss_start, 1), "rss_peak_mb": round(rss_peak, 1),
+        "rss_growth_mb": round(rss_peak - rss_start, 1),
+    }
+
+
+def bench_capture(seconds=3600.0, lag=4, segment_mode="fixed"):
+    import multiprocessing as mp
+    ctx = mp.get_context("spawn")
+    report = {"meta": {"audio_seconds": seconds, "consumer_lag": lag, "segment_mode": segment_mode,
+                       "platform": platform.platform(), "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S")}}
+    with ctx.Pool(1, maxtasksperchild=1) as pool:
+        for mode in ("legacy", "ring"):
+            report[mode] = pool.apply(_capture_run, (mode, seconds, lag, segment_mode))
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Transcriber benchmarks")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_gloss = sub.add_parser("gloss", help="Glosses/second: dictionary backend vs neural model")
+    p_gloss.add_argument("--dict", default=gloss_dictionary.DEFAULT_DICT_PATH, help="JMdict XML(.gz) or TSV file")
+    p_gloss.add_argument("--model", default=None, help="Marian model id for the neural path, e.g. Helsinki-NLP/opus-mt-ja-en")
+    p_gloss.add_argument("--text", default=None, help="UTF-8 file with one Japanese sentence per line")
+    p_gloss.add_argument("--repeat", type=int, default=5)
+    p_gloss.add_argument("--lang", default="en", help="Gloss target language")
+
+    p_off = sub.add_parser("offline", help="Whisper throughput: 8 s chunk loop vs offline batched decoding")
+    p_off.add_argument("file", help="Audio/video file")
+    p_off.add_argument("--model-size", default="medium")
+    p_off.add_argument("--device", default="cpu")
+    p_off.add_argument("--batch-size", type=int, default=16)
+    p_off.add_argument("--language", default=None, help="Source language code (default: auto-detect)")
+    p_off.add_argument("--limit", type=float, default=None, help="Only use the first N seconds")
+
+    p_st = sub.add_parser("stages", help="Per-stage throughput/latency and end-to-end real-time factor")
+    p_st.add_argument("--backend", choices=["stub", "real"], default="stub")
+    p_st.add_argument("--seconds", type=float, default=120.0, help="Length of the synthetic audio")
+    p_st.add_argument("--audio", default=None, help="Fixture audio/video file instead of synthetic audio")
+    p_st.add_argument("--whisper-size", default="tiny", help="Whisper size for --backend real")
+    p_st.add_argument("--model", default=None, help="Helsinki model id for --backend real (default: NLLB)")
+    p_st.add_argument("--device", default="cpu")
+    p_st.add_argument("--stub-cost", type=float, default=0.0, help="Simulated stub Whisper seconds per audio second")
+    p_st.add_argument("--output", default=None, help="Also write the JSON report to this file")
+
+    p_cap = sub.add_parser("capture", help="Capture path allocations and peak RSS: per-read arrays vs ring buffer")
+    p_cap.add_argument("--seconds", type=float, default=3600.0, help="Length of the replayed stream")
+    p_cap.add_argument("--lag", type=int, default=4, help="Reads per consumed chunk (consumer slower than capture)")
+    p_cap.add_argument("--segment-mode", choices=["fixed", "vad"], default="fixed")
+    p_cap.add_argument("--output", default=None, help="Also write the JSON report to this file")
+
+    p_tr = sub.add_parser("translate", help="Translation throughput: PyTorch generate() vs CTranslate2 int8")
+    p_tr.add_argument("--model", default="Helsinki-NLP/opus-mt-ja-en", help="Helsinki or NLLB model id")
+    p_tr.add_argument("--text", default=None, help="UTF-8 file with one Japanese sentence per line")
+    p_tr.add_argument("--repeat", type=int, default=3)
+    p_tr.add_argument("--device", default="cpu")
+    p_tr.add_argument("--batch-size", type=int, default=32)
+    p_tr.add_argument("--output", default=None, help="Also write the JSON report to this file")
+
+    args = parser.parse_args()
+    if args.command == "gloss":
+        report = bench_gloss(args.dict, args.model, args.text, args.repeat, args.lang)
+    elif args.command == "offline":
+        report = bench_offline(args.file, args.model_size, args.device, args.batch_size, args.language, args.limit)
+    elif args.command == "stages":
+        report = bench_stages(args.backend, args.seconds, args.audio, args.whisper_size, args.model, args.device, args.stub_cost)
+    elif args.command == "capture":
+        report = bench_capture(args.seconds, args.lag, args.segment_mode)
+    elif args.command == "translate":
+        report = bench_translate(args.model, args.text, args.repeat, args.device, args.batch_size)
+
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+    if getattr(args, "output", None):
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
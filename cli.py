@@ -0,0 +1,240 @@
+"""
+Headless batch mode: transcribe + translate files or URLs without the GUI, as fast as the hardware allows.
+
+    python cli.py stream1.mp4 stream2.mkv --src ja --tgt en --out-dir subs
+    python cli.py "https://www.youtube.com/watch?v=..." --src ja --tgt en --formats srt,jsonl
+    python cli.py archive/*.mp4 --offline --whisper-batch 16
+
+--offline decodes each (non-live) input completely first and runs Whisper in batches over its
+speech regions, which is considerably faster than the live-style 8 s chunk loop.
+
+Writes <out-dir>/<input name>.{srt,vtt,jsonl} and prints progress + real-time factor on stdout.
+"""
+import argparse
+import os
+import queue
+import sys
+import tempfile
+import time
+
+from dotenv import load_dotenv
+
+from audio_capture import AudioCapture, download_vod
+from exporters import TranscriptWriter
+from languages import find_language
+from offline import OfflineTranscriber, decode_audio, iter_windows
+from pcm_cache import get_pcm_cache, source_key
+from pipeline import ProcessingPipeline
+from transcript_store import get_transcript_store
+import model_manager
+
+load_dotenv()
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Headless transcription / translation to SRT, WebVTT and JSONL")
+    parser.add_argument("inputs", nargs="+", help="Local files or URLs")
+    parser.add_argument("--src", default="ja", help="Source language (code or name, default: ja)")
+    parser.add_argument("--tgt", default="en", help="Target language (code or name, default: en)")
+    parser.add_argument("--engine", choices=["helsinki", "nllb"], default="helsinki",
+                        help="Translation model family (helsinki falls back to nllb when no pair exists)")
+    parser.add_argument("--formats", default="srt,vtt,jsonl", help="Comma separated: srt, vtt, jsonl")
+    parser.add_argument("--out-dir", default="transcripts")
+    parser.add_argument("--live", action="store_true", help="Treat URLs as livestreams")
+    parser.add_argument("--no-gloss", action="store_true", help="Skip the per-word gloss layer (Japanese)")
+    parser.add_argument("--gloss-backend", choices=["neural", "dictionary"], default="neural")
+    parser.add_argument("--segment-mode", choices=["fixed", "vad"], default="fixed")
+    parser.add_argument("--batch-size", type=int, default=int(os.getenv("TRANSLATION_BATCH_SIZE", "32")))
+    parser.add_argument("--vod-download", action="store_true",
+                        help="Download URLs to a WAV before transcribing instead of streaming them through ffmpeg")
+    parser.add_argument("--offline", action="store_true", help="Decode whole files first and batch Whisper over speech regions")
+    parser.add_argument("--whisper-batch", type=int, default=16, help="Speech regions per Whisper batch in --offline mode")
+    parser.add_argument("--device", choices=["cpu", "cuda"], default=None, help="Force a device (default: auto)")
+    parser.add_argument("--cpu-threads", type=int, default=0, help="Whisper/torch CPU threads (default: library default)")
+    parser.add_argument("--quality", choices=["adaptive", "fixed"], default=os.getenv("QUALITY_MODE", "adaptive"),
+                        help="Live sources: adapt beam size / gloss / Whisper size to keep up, or keep full quality (archival)")
+    parser.add_argument("--translator-backend", choices=["torch", "ct2"], default=os.getenv("TRANSLATOR_BACKEND", "torch"),
+                        help="Translation runtime: transformers generate() or CTranslate2 int8 (converted once, cached)")
+    parser.add_argument("--context-segments", type=int, default=int(os.getenv("TRANSLATION_CONTEXT_SEGMENTS", "1")),
+                        help="Japanese: earlier sentences each translation is conditioned on (0 = translate each on its own)")
+    parser.add_argument("--no-store", action="store_true", help="Don't add the segments to the searchable transcript store")
+    return parser
+
+
+def output_base(source, out_dir):
+    name = os.path.splitext(os.path.basename(source.rstrip("/")))[0] or "output"
+    name = "".join(c if c.isalnum() or c in "-_." else "_" for c in name)
+    return os.path.join(out_dir, name)
+
+
+def open_store(args):
+    """The transcript store, or None with --no-store or when this SQLite can't provide it (no FTS5 / trigram)"""
+    if getattr(args, 'no_store', False): return None
+    try:
+        return get_transcript_store()
+    except Exception as e:
+        print(f"[STORE] Transcript store unavailable ({e}); writing the subtitle files only.")
+        return None
+
+
+def probe_duration(source):
+    """Length of a local file in seconds (None if unknown), only used for the % in the progress line"""
+    if not os.path.exists(source): return None
+    import subprocess
+    try:
+        res = subprocess.run(
+            ['ffprobe', '-v', 'error', '-show_entries', 'format=duration', '-of', 'default=nw=1:nk=1', source],
+            capture_output=True, text=True, timeout=15
+        )
+        return float(res.stdout.strip())
+    except Exception:
+        return None
+
+
+def print_status(text):
+    if text.strip(): print(text.strip(), flush=True)
+
+
+def format_clock(seconds):
+    seconds = int(seconds)
+    return f"{seconds // 3600:d}:{(seconds % 3600) // 60:02d}:{seconds % 60:02d}"
+
+
+class ProgressReporter:
+    def __init__(self, engine, writer, duration, t0, interval=2.0, label=""):
+        self.label = label
+        self.engine = engine
+        self.writer = writer
+        self.duration = duration
+        self.t0 = t0
+        self.interval = interval
+        self.last_report = 0.0
+
+    def maybe_report(self):
+        now = time.perf_counter()
+        if now - self.last_report < self.interval: return
+        self.last_report = now
+
+        done = self.engine.total_processed_seconds
+        line = f"[PROGRESS] {self.label + ' ' if self.label else ''}{format_clock(done)}"
+        if self.duration: line += f" / {format_clock(self.duration)} ({done / self.duration * 100:5.1f}%)"
+        if done > 0: line += f" | RTF {(now - self.t0) / done:.3f} | {done / (now - self.t0):.1f}x realtime"
+        line += f" | {self.writer.count} segments"
+        print(line, flush=True)
+
+
+def run_input(source, engine_args, args):
+    from transcriber import AIEngine
+
+    # A fresh engine per input (context + clock reset); the models themselves stay in the registry
+    engine = AIEngine(*engine_args, translation_batch_size=args.batch_size,
+                      device=getattr(args, 'device', None), cpu_threads=getattr(args, 'cpu_threads', 0),
+                      translator_backend=getattr(args, 'translator_backend', None), quality_mode=getattr(args, 'quality', None),
+                      context_segments=getattr(args, 'context_segments', None))
+    engine.update_display_options({"gloss": not args.no_gloss, "gloss_backend": args.gloss_backend})
+
+    writer = TranscriptWriter(output_base(source, args.out_dir), args.formats.split(","))
+    store = open_store(args)
+    if store:
+        route = [engine_args[5]] if isinstance(engine_args[5], str) else (engine_args[5] or [])
+        session_id = store.start_session(source, engine_args[1], engine_args[2], " > ".join(route) or "NLLB-200")
+
+    def on_record(record):
+        writer.write(record)
+        if store: store.add(session_id, record)
+
+    if args.offline and not args.live:
+        pipeline = ProcessingPipeline(engine, None, record_callback=on_record, asr=OfflineTranscriber(engine, args.whisper_batch).transcribe_chunk)
+        audio_cap = None
+    else:
+        pipeline = ProcessingPipeline(engine, None, record_callback=on_record)
+        audio_cap = AudioCapture(segment_mode=args.segment_mode)
+        audio_cap.downstream_seconds = pipeline.queued_seconds
+        if args.vod_download: audio_cap.vod_mode = "download"
+
+    duration = probe_duration(source)
+    t0 = time.perf_counter()
+    progress = ProgressReporter(engine, writer, duration, t0, label=os.path.basename(source))
+
+    if audio_cap is None:
+        cache = get_pcm_cache()
+        key = source_key(source)
+        pcm = cache.load(key, source)
+        if pcm is None:
+            # Each job downloads into its own directory (batch_runner workers run side by side)
+            with tempfile.TemporaryDirectory(prefix="vod_") as tmp:
+                path = source
+                if not os.path.exists(source):
+                    path = download_vod(source, tmp, status_callback=print_status)
+                    if not path: sys.exit(f"[Critical Error] Download failed: {source}")
+                pcm = decode_audio(path)
+            cache.store(key, source, pcm)
+            print(f"[OFFLINE] Decoded {format_clock(len(pcm) / 16000.0)} of audio in {time.perf_counter() - t0:.1f}s")
+        else:
+            print(f"[OFFLINE] Using cached audio ({format_clock(len(pcm) / 16000.0)})")
+        progress.duration = len(pcm) / 16000.0
+
+        for chunk in iter_windows(pcm):
+            pipeline.submit(chunk)
+            progress.maybe_report()
+        while not pipeline.is_idle():
+            time.sleep(0.2)
+            progress.maybe_report()
+        del pcm
+    else:
+        if os.path.exists(source):
+            audio_cap.start_file(source)
+        else:
+            audio_cap.start_youtube(source, args.live, status_callback=print_status)
+
+        while True:
+            try:
+                audio_chunk = audio_cap.audio_queue.get(timeout=0.5)
+                engine.quality.observe_backlog(audio_cap.backlog_seconds(), audio_cap.is_live)
+                pipeline.submit(audio_chunk)
+            except queue.Empty:
+                if not audio_cap.is_capturing and pipeline.is_idle(): break
+            progress.maybe_report()
+        audio_cap.stop()
+
+    pipeline.stop()
+    writer.close()
+    if store: store.flush()
+
+    elapsed = time.perf_counter() - t0
+    audio_seconds = engine.total_processed_seconds
+    rtf = elapsed / audio_seconds if audio_seconds else 0.0
+    print(f"[DONE] {source}: {format_clock(audio_seconds)} of audio in {format_clock(elapsed)} "
+          f"(RTF {rtf:.3f}), {writer.count} segments -> {', '.join(writer.paths)}", flush=True)
+    return {"source": source, "audio_seconds": audio_seconds, "elapsed": elapsed, "segments": writer.count, "outputs": writer.paths}
+
+
+def resolve_engine_args(args):
+    src_lang, tgt_lang = find_language(args.src), find_language(args.tgt)
+    if not src_lang or not tgt_lang:
+        sys.exit(f"Unknown language: {args.src if not src_lang else args.tgt}")
+
+    t_type, h_id = model_manager.pick_translator(src_lang['name'], tgt_lang['name'], args.engine)
+    route = [h_id] if isinstance(h_id, str) else h_id
+    print(f"[SYSTEM] {src_lang['name']} -> {tgt_lang['name']} using {' > '.join(route) if route else 'NLLB-200'}")
+    return (t_type, src_lang['code'], tgt_lang['code'], src_lang['nllb'], tgt_lang['nllb'], h_id)
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.cpu_threads:
+        import torch
+        torch.set_num_threads(args.cpu_threads)
+    engine_args = resolve_engine_args(args)
+
+    summaries = [run_input(source, engine_args, args) for source in args.inputs]
+
+    total_audio = sum(s['audio_seconds'] for s in summaries)
+    total_elapsed = sum(s['elapsed'] for s in summaries)
+    if len(summaries) > 1 and total_audio:
+        print(f"[SUMMARY] {len(summaries)} inputs, {format_clock(total_audio)} of audio in {format_clock(total_elapsed)} "
+              f"(RTF {total_elapsed / total_audio:.3f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+import json
+import os
+
+
+def _timestamp(seconds, sep):
+    ms = int(round(seconds * 1000))
+    h, ms = divmod(ms, 3600000)
+    m, ms = divmod(ms, 60000)
+    s, ms = divmod(ms, 1000)
+    return f"{h:02d}:{m:02d}:{s:02d}{sep}{ms:03d}"
+
+
+def _cue_line(text, vtt):
+    """One line of cue text: a blank line would end the cue early, and WebVTT reads & and < as markup"""
+    text = " ".join(text.split())
+    if vtt: text = text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+    return text
+
+
+def _cue_text(record, vtt=False):
+    lines = [_cue_line(record['source'], vtt)]
+    if record['translation']: lines.append(_cue_line(record['translation'], vtt))
+    return "\n".join(lines)
+
+
+class TranscriptWriter:
+    """
+    Writes AIEngine records to subtitle/data files as they arrive.
+
+    Formats:
+      srt   : SubRip, source line + translation line per cue
+      vtt   : WebVTT, same cues
+      jsonl : one JSON object per segment (start, end, source, reading, gloss tokens, translation)
+    """
+
+    FORMATS = ("srt", "vtt", "jsonl")
+
+    def __init__(self, base_path, formats=FORMATS):
+        os.makedirs(os.path.dirname(base_path) or ".", exist_ok=True)
+        self.files = {}
+        self.count = 0
+        for fmt in formats:
+            if fmt not in self.FORMATS:
+                raise ValueError(f"Unknown output format '{fmt}' (expected one of {', '.join(self.FORMATS)})")
+            self.files[fmt] = open(f"{base_path}.{fmt}", "w", encoding="utf-8")
+        if "vtt" in self.files:
+            self.files["vtt"].write("WEBVTT\n\n")
+
+    @property
+    def paths(self):
+        return [f.name for f in self.files.values()]
+
+    def write(self, record):
+        self.count += 1
+        end = max(record['end'], record['start'] + 0.5)
+
+        if "srt" in self.files:
+            self.files["srt"].write(
+                f"{self.count}\n{_timestamp(record['start'], ',')} --> {_timestamp(end, ',')}\n{_cue_text(record)}\n\n"
+            )
+        if "vtt" in self.files:
+            self.files["vtt"].write(
+                f"{_timestamp(record['start'], '.')} --> {_timestamp(end, '.')}\n{_cue_text(record, vtt=True)}\n\n"
+            )
+        if "jsonl" in self.files:
+            self.files["jsonl"].write(json.dumps({
+                "start": round(record['start'], 3),
+                "end": round(record['end'], 3),
+                "lang": record['lang'],
+                "source": record['source'],
+                "reading": record['reading'],
+                "gloss": record['tokens'],
+                "translation": record['translation'],
+            }, ensure_ascii=False) + "\n")
+
+        for f in self.files.values(): f.flush()
+
+    def close(self):
+        for f in self.files.values(): f.close()
@@ -0,0 +1,124 @@
+import bisect
+import gzip
+import os
+import threading
+import xml.etree.ElementTree as ET
+
+# JMdict tags glosses with ISO 639-2/B codes (no attribute = English)
+JMDICT_LANG = {
+    "en": "eng", "de": "ger", "fr": "fre", "es": "spa",
+    "ru": "rus", "nl": "dut", "hu": "hun", "sv": "swe", "sl": "slv",
+}
+
+DEFAULT_DICT_PATH = os.getenv("GLOSS_DICT_PATH", "JMdict_e.gz")
+
+
+class GlossDictionary:
+    """
+    Word -> short gloss lookups from a local JMdict-style dictionary.
+
+    Supported files:
+      - JMdict XML (JMdict_e, JMdict_e.gz, or the multilingual JMdict)
+      - TSV, one entry per line: word<TAB>reading<TAB>gloss  (lines starting with # are skipped)
+
+    Nothing is read until the first lookup. Entries are kept as two parallel sorted lists
+    (keys / glosses) and searched with bisect, which is much smaller than a dict-of-dicts trie
+    and still gives cheap longest-prefix matching for conjugated words (行きましょう -> 行き).
+    """
+
+    def __init__(self, path=DEFAULT_DICT_PATH, target_lang="en"):
+        self.path = path
+        self.target_lang = target_lang
+        self.keys = []
+        self.glosses = []
+        self.is_loaded = False
+        self._lock = threading.Lock()
+
+    def load(self):
+        with self._lock:
+            if self.is_loaded: return
+            entries = {}
+            if not os.path.exists(self.path):
+                print(f"[GLOSS] Dictionary not found at '{self.path}'. Falling back to the neural model.")
+            else:
+                print(f"[GLOSS] Loading dictionary '{self.path}'...")
+                if self.path.endswith((".tsv", ".txt")):
+                    self._load_tsv(entries)
+                elif self.target_lang in JMDICT_LANG:
+                    self._load_jmdict(entries)
+                print(f"[GLOSS] {len(entries)} dictionary keys loaded.")
+
+            self.keys = sorted(entries)
+            self.glosses = [entries[k] for k in self.keys]
+            self.is_loaded = True
+
+    def _open(self):
+        if self.path.endswith(".gz"):
+            return gzip.open(self.path, "rb")
+        return open(self.path, "rb")
+
+    def _load_tsv(self, entries):
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                if not line.strip() or line.startswith("#"): continue
+                parts = line.rstrip("\n").split("\t")
+                if len(parts) < 3 or not parts[2]: continue
+                word, reading, gloss = parts[0], parts[1], parts[2]
+                # First entry wins, so the file order decides priority
+                if word: entries.setdefault(word, gloss)
+                if reading: entries.setdefault(reading, gloss)
+
+    def _load_jmdict(self, entries):
+        want_lang = JMDICT_LANG[self.target_lang]
+        with self._open() as f:
+            for _, elem in ET.iterparse(f, events=("end",)):
+                if elem.tag != "entry": continue
+
+                gloss = None
+                for g in elem.iter("gloss"):
+                    lang = g.get("{http://www.w3.org/XML/1998/namespace}lang", "eng")
+                    if lang == want_lang and g.text:
+                        gloss = g.text
+                        break
+
+                if gloss:
+                    for keb in elem.iter("keb"):
+                        entries.setdefault(keb.text, gloss)
+                    for reb in elem.iter("reb"):
+                        entries.setdefault(reb.text, gloss)
+                elem.clear()
+
+    def _get(self, key):
+        i = bisect.bisect_left(self.keys, key)
+        if i < len(self.keys) and self.keys[i] == key:
+            return self.glosses[i]
+        return None
+
+    def lookup(self, word, reading=None):
+        """Returns the gloss for a token, or None if the dictionary doesn't know it"""
+        if not self.is_loaded: self.load()
+        if not word or not self.keys: return None
+
+        gloss = self._get(word)
+        if gloss is None and reading:
+            gloss = self._get(reading)
+        if gloss is None and len(word) > 1:
+            # Longest known prefix: covers verb/adjective endings pykakasi keeps attached.
+            # A lone kana prefix is almost always a wrong particle match, a lone kanji is fine.
+            min_end = 1 if '\u4e00' <= word[0] <= '\u9fff' else 2
+            for end in range(len(word) - 1, min_end - 1, -1):
+                gloss = self._get(word[:end])
+                if gloss is not None: break
+        return gloss
+
+
+_dictionaries = {}
+_dictionaries_lock = threading.Lock()
+
+def get_dictionary(path=DEFAULT_DICT_PATH, target_lang="en"):
+    """Process-wide instance per (file, language) so a reload of AIEngine doesn't re-parse the file"""
+    with _dictionaries_lock:
+        key = (path, target_lang)
+        if key not in _dictionaries:
+            _dictionaries[key] = GlossDictionary(path, target_lang)
+        return _dictionaries[key]
@@ -0,0 +1,19 @@
+# Languages offered in the GUI and the CLI.
+# code = Whisper / Helsinki ISO code, nllb = NLLB-200 language code
+LANGUAGES = [
+    {"name": "English", "code": "en", "nllb": "eng_Latn"},
+    {"name": "Indonesian", "code": "id", "nllb": "ind_Latn"},
+    {"name": "Japanese", "code": "ja", "nllb": "jpn_Jpan"},
+    {"name": "Spanish", "code": "es", "nllb": "spa_Latn"},
+    {"name": "French", "code": "fr", "nllb": "fra_Latn"},
+    {"name": "German", "code": "de", "nllb": "deu_Latn"},
+    {"name": "Chinese", "code": "zh", "nllb": "zho_Hans"},
+    {"name": "Korean", "code": "ko", "nllb": "kor_Hang"},
+]
+
+def find_language(code_or_name):
+    key = code_or_name.lower()
+    for lang in LANGUAGES:
+        if key in (lang['code'], lang['name'].lower(), lang['nllb'].lower()):
+            return lang
+    return None
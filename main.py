@@ -1,3 +1,6 @@
+import time
+PROCESS_START = time.perf_counter()  # For the time-to-window report
+
 import threading
 import tkinter as tk
 from tkinter import scrolledtext, messagebox
@@ -6,27 +9,27 @@ import queue
 import json
 import os
 import gc
-import torch
 
+# torch / transformers / faster_whisper are imported on first use (transcriber), so the window shows up first
 from audio_capture import AudioCapture
-from transcriber import AIEngine
+from pipeline import ProcessingPipeline
+from languages import LANGUAGES
+from metrics import get_metrics
+from transcript_view import TranscriptView
+from transcript_store import get_transcript_store, format_hit
 import model_manager
 
 load_dotenv()
 
-LANGUAGES = [
-    {"name": "English", "code": "en", "nllb": "eng_Latn"},
-    {"name": "Indonesian", "code": "id", "nllb": "ind_Latn"},
-    {"name": "Japanese", "code": "ja", "nllb": "jpn_Jpan"},
-    {"name": "Spanish", "code": "es", "nllb": "spa_Latn"},
-    {"name": "French", "code": "fr", "nllb": "fra_Latn"},
-    {"name": "German", "code": "de", "nllb": "deu_Latn"},
-    {"name": "Chinese", "code": "zh", "nllb": "zho_Hans"},
-    {"name": "Korean", "code": "ko", "nllb": "kor_Hang"},
-]
 
 HISTORY_FILE = "history.json"
 
+# Translation batching (see ProcessingPipeline), overridable from .env
+TRANSLATION_BATCH_SIZE = int(os.getenv("TRANSLATION_BATCH_SIZE", "32"))
+TRANSLATION_MAX_WAIT = float(os.getenv("TRANSLATION_MAX_WAIT", "0.1"))
+# Load the most recent history profile in the background while the settings window is open
+PREWARM_LAST_PROFILE = os.getenv("PREWARM_LAST_PROFILE", "1") != "0"
+
 def load_history():
     if os.path.exists(HISTORY_FILE):
         try:
@@ -59,6 +62,14 @@ class NewInputWindow:
         self.show_hira_var = tk.BooleanVar(value=True)
         self.show_gloss_var = tk.BooleanVar(value=True)
         self.show_trans_var = tk.BooleanVar(value=True)
+        self.gloss_backend_var = tk.StringVar(value="neural")
+
+        # Segmentation (latency vs accuracy)
+        self.seg_mode_var = tk.StringVar(value="fixed")
+        self.seg_min_var = tk.DoubleVar(value=1.5)
+        self.seg_max_var = tk.DoubleVar(value=8.0)
+        self.seg_overlap_var = tk.DoubleVar(value=0.5)
+        self.interim_var = tk.BooleanVar(value=False)
 
         self.build_ui()
         self.update_ui()
@@ -66,6 +77,8 @@ class NewInputWindow:
         # Bind traces
         self.src_var.trace_add("write", lambda *args: self.update_ui())
         self.engine_var.trace_add("write", lambda *args: self.update_ui())
+        self.src_lang_var.trace_add("write", lambda *args: self.update_route())
+        self.tgt_lang_var.trace_add("write", lambda *args: self.update_route())
 
     def create_toggle_btn(self, parent, text, var, value, color, width=15):
         rb = tk.Radiobutton(
@@ -135,6 +148,7 @@ class NewInputWindow:
         for i, entry in enumerate(self.history):
             idx_str = str(i + 3)
             label = f"[HISTORY] {entry['type'].upper()} | {entry['src_name']} -> {entry['tgt_name']}"
+            if isinstance(entry.get('helsinki_id'), list): label += f" (pivot, {len(entry['helsinki_id'])} hops)"
             self.create_list_btn(self.frame_4_engine, idx_str, label, self.engine_var, idx_str, "#006064", font=("Consolas", 10)).pack(anchor='w', pady=1)
 
         # --- 3.1 LANG ---
@@ -151,6 +165,12 @@ class NewInputWindow:
         for i, lang in enumerate(LANGUAGES):
             self.create_list_btn(col2, str(i+1), lang['name'], self.tgt_lang_var, str(i+1), "#4a148c", font=("Arial", 10)).pack(anchor='w', pady=1)
 
+        # --- 3.2 ROUTE: what option [1] would run for this pair, and its cost next to NLLB ---
+        self.frame_5_route = tk.Frame(self.container, bg='#121212')
+        self.route_var = tk.StringVar(value="")
+        tk.Label(self.frame_5_route, textvariable=self.route_var, bg='#121212', fg='#81c784', font=("Arial", 10),
+                 wraplength=680, justify='left').pack(anchor='w')
+
         # --- 4. DISPLAY OPTIONS (For Japanese/Generic) ---
         self.frame_6_disp = tk.Frame(self.container, bg='#121212')
         self.frame_6_disp.pack(fill='x', pady=(20,0))
@@ -163,6 +183,29 @@ class NewInputWindow:
         self.create_check_btn(d_frame, "Literal Word Meaning", self.show_gloss_var, "#1e1e1e").pack(side='left', padx=(0,15))
         self.create_check_btn(d_frame, "Sentence Translation", self.show_trans_var, "#1e1e1e").pack(side='left', padx=(0,15))
 
+        g_frame = tk.Frame(self.frame_6_disp, bg='#121212')
+        g_frame.pack(anchor='w', pady=(5,0))
+        tk.Label(g_frame, text="Word Meaning from :", bg='#121212', fg='white', font=("Arial", 10)).pack(side='left', padx=(0,10))
+        self.create_toggle_btn(g_frame, "Neural Model", self.gloss_backend_var, "neural", "#0277bd").pack(side='left', padx=(0,10))
+        self.create_toggle_btn(g_frame, "Dictionary", self.gloss_backend_var, "dictionary", "#0277bd").pack(side='left', padx=(0,10))
+
+        # --- 5. SEGMENTATION ---
+        self.frame_7_seg = tk.Frame(self.container, bg='#121212')
+        self.frame_7_seg.pack(fill='x', pady=(20,0))
+        tk.Label(self.frame_7_seg, text="5. Audio Segmentation :", bg='#121212', fg='#aaaaaa', font=("Arial", 11, "bold")).pack(anchor='w', pady=(0,5))
+
+        s_frame = tk.Frame(self.frame_7_seg, bg='#121212')
+        s_frame.pack(anchor='w')
+        self.create_toggle_btn(s_frame, "Fixed 8s", self.seg_mode_var, "fixed", "#0277bd").pack(side='left', padx=(0,10))
+        self.create_toggle_btn(s_frame, "Cut on Pauses", self.seg_mode_var, "vad", "#0277bd").pack(side='left', padx=(0,10))
+
+        n_frame = tk.Frame(self.frame_7_seg, bg='#121212')
+        n_frame.pack(anchor='w', pady=(5,0))
+        for label, var, lo, hi in [("Min (s)", self.seg_min_var, 0.5, 10), ("Max (s)", self.seg_max_var, 2, 30), ("Overlap (s)", self.seg_overlap_var, 0, 2)]:
+            tk.Label(n_frame, text=label, bg='#121212', fg='white', font=("Arial", 10)).pack(side='left', padx=(0,5))
+            tk.Spinbox(n_frame, textvariable=var, from_=lo, to=hi, increment=0.5, width=5, bg='#1e1e1e', fg='white', buttonbackground='#1e1e1e').pack(side='left', padx=(0,15))
+        self.create_check_btn(self.frame_7_seg, "Show interim text while speaking (Livestream / Mic)", self.interim_var, "#1e1e1e").pack(anchor='w', pady=(5,0))
+
 
         # --- RUN BUTTON ---
         btn_frame = tk.Frame(self.top, bg='#121212')
@@ -173,6 +216,7 @@ class NewInputWindow:
         self.frame_2_url.pack_forget()
         self.frame_3_live.pack_forget()
         self.frame_5_lang.pack_forget()
+        self.frame_5_route.pack_forget()
 
         s = self.src_var.get()
         e = self.engine_var.get()
@@ -184,6 +228,14 @@ class NewInputWindow:
             
         if e in ["1", "2"]:
             self.frame_5_lang.pack(fill='x', pady=(20,0), after=self.frame_4_engine)
+            self.frame_5_route.pack(fill='x', pady=(10,0), after=self.frame_5_lang)
+            self.update_route()
+
+    def update_route(self):
+        src_lang = LANGUAGES[int(self.src_lang_var.get()) - 1]
+        tgt_lang = LANGUAGES[int(self.tgt_lang_var.get()) - 1]
+        route = model_manager.plan_route(src_lang['name'], tgt_lang['name'])
+        self.route_var.set(model_manager.describe_route(route, src_lang['name'], tgt_lang['name']))
 
     def run(self):
         s_choice = self.src_var.get()
@@ -211,13 +263,7 @@ class NewInputWindow:
             src_lang = LANGUAGES[s_idx]
             tgt_lang = LANGUAGES[t_idx]
 
-            t_type = "helsinki" if e_val == 1 else "nllb"
-            h_id = None
-
-            if t_type == "helsinki":
-                matches = model_manager.find_helsinki_models(src_lang['name'], tgt_lang['name'])
-                if matches: h_id = matches[0]['id'] 
-                else: t_type = "nllb"
+            t_type, h_id = model_manager.pick_translator(src_lang['name'], tgt_lang['name'], "helsinki" if e_val == 1 else "nllb")
             
             s_code = src_lang['code']
             t_code = tgt_lang['code']
@@ -238,13 +284,66 @@ class NewInputWindow:
             "kanji": self.show_kanji_var.get(),
             "hira": self.show_hira_var.get(),
             "gloss": self.show_gloss_var.get(),
-            "trans": self.show_trans_var.get()
+            "trans": self.show_trans_var.get(),
+            "gloss_backend": self.gloss_backend_var.get()
         }
 
-        self.main_gui.apply_new_settings(s_choice, s_data, is_live, t_type, s_code, t_code, nllb_src, nllb_tgt, h_id, disp_opts)
+        try:
+            seg_opts = {
+                "mode": self.seg_mode_var.get(),
+                "min_segment_seconds": self.seg_min_var.get(),
+                "max_segment_seconds": self.seg_max_var.get(),
+                "overlap_seconds": self.seg_overlap_var.get(),
+                "interim": self.interim_var.get()
+            }
+        except tk.TclError:
+            messagebox.showerror("Error", "Segmentation lengths must be numbers.")
+            return
+
+        self.main_gui.apply_new_settings(s_choice, s_data, is_live, t_type, s_code, t_code, nllb_src, nllb_tgt, h_id, disp_opts, seg_opts)
         self.top.destroy()
 
 
+class SearchWindow:
+    """Past transcripts (every session, see transcript_store) matching a phrase, newest first"""
+    def __init__(self, parent, store, text):
+        self.store = store
+        self.top = tk.Toplevel(parent)
+        self.top.title("Search Transcripts")
+        self.top.geometry("900x500")
+        self.top.configure(bg='#121212')
+
+        bar = tk.Frame(self.top, bg='#1e1e1e', pady=8)
+        bar.pack(fill='x')
+        self.query_var = tk.StringVar(value=text)
+        entry = tk.Entry(bar, textvariable=self.query_var, bg='#2d2d2d', fg='white', insertbackground='white', font=("Yu Gothic", 12))
+        entry.pack(side=tk.LEFT, fill='x', expand=True, padx=10)
+        entry.bind("<Return>", lambda e: self.search())
+        tk.Button(bar, text="Search", command=self.search).pack(side=tk.LEFT, padx=10)
+        self.info_var = tk.StringVar(value="")
+        tk.Label(self.top, textvariable=self.info_var, bg='#121212', fg='#888888', font=("Consolas", 9), anchor='w').pack(side=tk.BOTTOM, fill='x')
+
+        self.results = scrolledtext.ScrolledText(self.top, wrap=tk.WORD, bg='#1a1a1a', fg='#e0e0e0', font=("Yu Gothic", 12))
+        self.results.pack(expand=True, fill='both', padx=10, pady=10)
+        self.results.tag_configure("meta", foreground='#4fc3f7')
+        entry.focus_set()
+        self.search()
+
+    def search(self, limit=200):
+        text = self.query_var.get()
+        t0 = time.perf_counter()
+        hits = self.store.search(text, limit)
+        elapsed = time.perf_counter() - t0
+        self.results.delete("1.0", tk.END)
+        for hit in hits:
+            line = format_hit(hit)
+            meta, _, body = line.partition("]  ")
+            self.results.insert(tk.END, meta + "]  ", ("meta",))
+            self.results.insert(tk.END, body + "\n")
+        if text.strip():
+            self.info_var.set(f"{len(hits)}{'+' if len(hits) == limit else ''} matches in {elapsed * 1000:.1f} ms")
+
+
 class MainGUI:
     def __init__(self, root, audio_cap):
         self.root = root
@@ -253,27 +352,85 @@ class MainGUI:
         self.root.configure(bg='#121212')
         self.audio_cap = audio_cap
         self.ai_engine = None # Initialized after settings are chosen
+        self.pipeline = None
+        self.metrics = get_metrics()
+        self.warmup_thread = None
+        self.load_lock = threading.Lock()  # One engine (re)build at a time
+        self.run_clicked_at = None         # For the time-to-first-transcript report
+        self.session_id = None             # Current session in the transcript store
+        try:
+            self.store = get_transcript_store()
+        except Exception as e:
+            self.store = None
+            print(f"[STORE] Transcript store unavailable ({e}); results are only shown, not kept.")
         
         # UI Setup
         control_frame = tk.Frame(self.root, bg='#1e1e1e', pady=10)
         control_frame.pack(fill='x')
         
         tk.Button(control_frame, text="New Input / Change Settings", command=self.open_new_input_window, bg='#2e7d32', fg='white').pack(side=tk.LEFT, padx=15)
+
+        # Per-stage queue depths of the processing pipeline
+        self.status_var = tk.StringVar(value="")
+        tk.Label(control_frame, textvariable=self.status_var, bg='#1e1e1e', fg='#aaaaaa', font=("Consolas", 10)).pack(side=tk.LEFT, padx=5)
         
         tk.Button(control_frame, text="Clear Screen", command=self.clear_screen).pack(side=tk.RIGHT, padx=5)
+        # Search across all past sessions
+        self.search_var = tk.StringVar()
+        tk.Button(control_frame, text="Search", command=self.open_search).pack(side=tk.RIGHT, padx=5)
+        search_entry = tk.Entry(control_frame, textvariable=self.search_var, width=18, bg='#2d2d2d', fg='white', insertbackground='white')
+        search_entry.pack(side=tk.RIGHT, padx=5)
+        search_entry.bind("<Return>", lambda e: self.open_search())
         # STOP BUTTON replaces Reset Memory
         tk.Button(control_frame, text="STOP", command=self.stop_capture, bg='#c62828', fg='white', width=10).pack(side=tk.RIGHT, padx=15)
 
+        # Bottom status bar: last stage timings, audio backlog, lag behind real time, errors
+        self.metrics_var = tk.StringVar(value="")
+        tk.Label(self.root, textvariable=self.metrics_var, bg='#1e1e1e', fg='#888888', font=("Consolas", 9), anchor='w').pack(side=tk.BOTTOM, fill='x')
+
         self.text_area = scrolledtext.ScrolledText(self.root, wrap=tk.WORD, bg='#1a1a1a', fg='#e0e0e0', font=("Yu Gothic", 14))
         self.text_area.pack(expand=True, fill='both', padx=15, pady=15)
+        # Bounded, frame-batched display with a file-backed scroll-back (see transcript_view)
+        self.view = TranscriptView(self.root, self.text_area)
         self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
 
         self.is_running = True
         self.thread = threading.Thread(target=self.processing_loop, daemon=True)
         self.thread.start()
+        self.refresh_status()
+        self.root.after_idle(self.report_window_ready)
+
+    def report_window_ready(self):
+        elapsed = time.perf_counter() - PROCESS_START
+        self.metrics.set("startup_seconds", elapsed, phase="window")
+        print(f"[SYSTEM] Window ready in {elapsed:.2f}s")
 
     def open_new_input_window(self):
         NewInputWindow(self.root, self)
+        self.start_warmup()
+
+    def start_warmup(self):
+        """Loads the last used profile (history[0]) into the model registry while the user picks settings"""
+        if not PREWARM_LAST_PROFILE or self.ai_engine or (self.warmup_thread and self.warmup_thread.is_alive()): return
+        history = load_history()
+        if not history: return
+        self.warmup_thread = threading.Thread(target=self._warm_up, args=(history[0],), daemon=True)
+        self.warmup_thread.start()
+
+    def _warm_up(self, entry):
+        t0 = time.perf_counter()
+        label = f"{entry['type'].upper()} | {entry['src_name']} -> {entry['tgt_name']}"
+        print(f"[SYSTEM] Warming up last profile in the background ({label})...")
+        try:
+            import transcriber
+            transcriber.warm_up(entry['type'], entry.get('helsinki_id'), entry.get('nllb_src'))
+        except Exception as e:
+            # RUN loads whatever is missing the usual way
+            print(f"[SYSTEM] Warm-up failed ({e}).")
+            return
+        elapsed = time.perf_counter() - t0
+        self.metrics.set("startup_seconds", elapsed, phase="warmup")
+        print(f"[SYSTEM] Last profile warm in {elapsed:.1f}s ({label}).")
 
     def stop_capture(self):
         """Stops the audio capture but keeps AI loaded"""
@@ -281,43 +438,71 @@ class MainGUI:
             self.audio_cap.stop()
             self.update_gui("\n[SYSTEM] Capture Stopped by User.\n")
 
-    def apply_new_settings(self, s_choice, s_data, is_live, t_type, s_code, t_code, nllb_src, nllb_tgt, h_id, disp_opts):
+    def apply_new_settings(self, s_choice, s_data, is_live, t_type, s_code, t_code, nllb_src, nllb_tgt, h_id, disp_opts, seg_opts=None):
         # 1. Stop Audio
         self.audio_cap.stop()
         while not self.audio_cap.audio_queue.empty():
             try: self.audio_cap.audio_queue.get_nowait()
             except queue.Empty: break
         
-        # 2. Force Reload AI
-        self.update_gui(f"\n[SYSTEM] Reloading AI Models...\n{'='*50}\n")
-        
+        # 2. Rebuild the engine off the UI thread (models already in the registry, e.g. warmed up, are reused)
+        self.update_gui(f"\n[SYSTEM] Loading AI Models...\n{'='*50}\n")
+        self.run_clicked_at = time.perf_counter()
+        threading.Thread(target=self._load_and_start, daemon=True,
+                         args=(s_choice, s_data, is_live, t_type, s_code, t_code, nllb_src, nllb_tgt, h_id, disp_opts, seg_opts)).start()
+
+    def _load_and_start(self, s_choice, s_data, is_live, t_type, s_code, t_code, nllb_src, nllb_tgt, h_id, disp_opts, seg_opts):
+        with self.load_lock:
+            try:
+                self._build_engine(t_type, s_code, t_code, nllb_src, nllb_tgt, h_id, disp_opts)
+            except Exception as e:
+                self.metrics.inc("errors_total", where="model_load")
+                self.update_gui(f"[SYSTEM] Could not load the models: {e}\n")
+                return
+
+            if self.store:
+                route = [h_id] if isinstance(h_id, str) else (h_id or [])
+                source = s_data if s_choice in ("1", "2") else "microphone"
+                self.session_id = self.store.start_session(source, s_code, t_code, " > ".join(route) or "NLLB-200")
+
+            # 3. Start Audio
+            if seg_opts: self.audio_cap.configure_segmentation(**seg_opts)
+            self.src_choice = s_choice
+            self.src_data = s_data
+            self.is_live = is_live
+            self._finished_notified = False
+
+            self.start_audio()
+
+    def _build_engine(self, t_type, s_code, t_code, nllb_src, nllb_tgt, h_id, disp_opts):
+        from transcriber import AIEngine
+        t0 = time.perf_counter()
+
+        if self.pipeline:
+            self.pipeline.stop()
+            self.pipeline = None
+
         if self.ai_engine:
-            del self.ai_engine
+            self.ai_engine = None
             gc.collect()
+            import torch
             if torch.cuda.is_available(): torch.cuda.empty_cache()
 
-        self.ai_engine = AIEngine(t_type, s_code, t_code, nllb_src, nllb_tgt, h_id)
+        self.ai_engine = AIEngine(t_type, s_code, t_code, nllb_src, nllb_tgt, h_id, translation_batch_size=TRANSLATION_BATCH_SIZE)
         # Apply the selected display options
         self.ai_engine.update_display_options(disp_opts)
+        # Blocks arrive as partial (source + reading) first and are replaced in place by the final one
+        self.pipeline = ProcessingPipeline(self.ai_engine, None, translation_max_wait=TRANSLATION_MAX_WAIT,
+                                           record_callback=self.on_record, stream_callback=self.show_block)
+        self.audio_cap.interim_callback = self.pipeline.submit_interim
+        self.audio_cap.downstream_seconds = self.pipeline.queued_seconds
         
-        self.update_gui("[SYSTEM] AI Model Loaded. Starting Audio...\n")
-
-        # 3. Start Audio
-        self.src_choice = s_choice
-        self.src_data = s_data
-        self.is_live = is_live
-        self._finished_notified = False
-        
-        self.start_audio()
+        self.update_gui(f"[SYSTEM] AI Model Loaded in {time.perf_counter() - t0:.1f}s. Starting Audio...\n")
 
     def download_progress_callback(self, text):
         clean_text = text.strip()
         if clean_text:
-            self.root.after(0, lambda: self._update_download_status(clean_text))
-
-    def _update_download_status(self, text):
-        self.text_area.insert(tk.END, text + "\n")
-        self.text_area.see(tk.END)
+            self.view.post_text(clean_text + "\n")
 
     def start_audio(self):
         if self.src_choice == "1":
@@ -332,45 +517,98 @@ class MainGUI:
         # self.update_gui("Waiting for input configuration...\n")
         while self.is_running:
             try:
-                # If AI isn't loaded yet (start of app), just wait
-                if not self.ai_engine:
-                    # time.sleep(0.5) 
-                    # We can't import time here without adding import, 
-                    # but Queue get with timeout handles the wait naturally
-                    pass 
-                
                 audio_chunk = self.audio_cap.audio_queue.get(timeout=1.0)
-                
-                if self.ai_engine:
-                    results = self.ai_engine.process_audio(audio_chunk)
-                    for res in results:
-                        self.update_gui(res)
+
+                # Whisper, translation and formatting run on the pipeline's own threads,
+                # this loop only feeds it (and blocks while the ASR queue is full)
+                pipeline = self.pipeline
+                if pipeline:
+                    self.ai_engine.quality.observe_backlog(self.audio_cap.backlog_seconds(), self.audio_cap.is_live)
+                    pipeline.submit(audio_chunk)
             except queue.Empty: 
-                if getattr(self.audio_cap, 'is_capturing', False) is False and self.ai_engine:
+                pipeline = self.pipeline
+                if getattr(self.audio_cap, 'is_capturing', False) is False and self.ai_engine and pipeline and pipeline.is_idle():
                     if getattr(self, '_finished_notified', False) is False:
                         self.update_gui("\n[SYSTEM] Media playback finished or stopped. Cache freed.\n")
                         self.ai_engine.cleanup_cache()
                         self._finished_notified = True
                 continue
             except Exception as e:
-                pass # safely ignore setup timing errors
+                # Settings can change under us (pipeline swapped mid-submit); count it and keep going
+                self.metrics.inc("errors_total", where="processing_loop")
+                print(f"[SYSTEM] Processing loop error: {e}")
+
+    def on_record(self, record):
+        """Every final record (pipeline thread): kept in the transcript store, lag tracked"""
+        if self.store and self.session_id is not None: self.store.add(self.session_id, record)
+        self.track_lag(record)
+
+    def open_search(self):
+        if not self.store:
+            messagebox.showerror("Error", "The transcript store could not be opened.")
+            return
+        SearchWindow(self.root, self.store, self.search_var.get())
+
+    def track_lag(self, record):
+        """How far the newest transcript trails the live audio clock (and how long RUN took to the first line)"""
+        if self.run_clicked_at is not None:
+            elapsed, self.run_clicked_at = time.perf_counter() - self.run_clicked_at, None
+            self.metrics.set("startup_seconds", elapsed, phase="first_transcript")
+            print(f"[SYSTEM] First transcript {elapsed:.1f}s after RUN")
+        started = self.audio_cap.stream_started_at
+        if started is not None:
+            self.metrics.set("lag_seconds", max(0.0, time.monotonic() - started - record['end']))
+
+    def refresh_status(self):
+        if self.pipeline:
+            d = self.pipeline.queue_depths()
+            status = f"Queues  ASR: {d['asr']} | TRANS: {d['trans']} | FORMAT: {d['format']}"
+            tm = self.ai_engine.translation_memory if self.ai_engine else None
+            if tm:
+                st = tm.stats()
+                status += f"  ||  TM hits: {st['hit_rate']*100:.0f}% (~{st['saved_seconds']:.1f}s saved)"
+            self.status_var.set(status)
+        self.refresh_metrics()
+        if self.is_running:
+            self.root.after(500, self.refresh_status)
+
+    def refresh_metrics(self):
+        m = self.metrics
+        def ms(stage):
+            v = m.last("stage_seconds", stage=stage)
+            return f"{v*1000:.0f}ms" if v is not None else "-"
+
+        first = m.last("time_to_first_text_seconds")
+        parts = [f"First text {first*1000:.0f}ms" if first is not None else "First text -", f"Whisper {ms('whisper')}", f"Trans {ms('translation')}", f"Gloss {ms('gloss')}",
+                 f"Audio queue {self.audio_cap.audio_queue.qsize()} ({self.audio_cap.backlog_seconds():.0f}s)"]
+        lag = m.gauge("lag_seconds")
+        if lag is not None: parts.append(f"Lag {lag:.1f}s")
+        engine = self.ai_engine
+        if engine and engine.quality.level: parts.append(f"Quality: {engine.quality.describe()}")
+        parts.append(f"Errors {m.counter_total('errors_total')}")
+        self.metrics_var.set("  |  ".join(parts))
 
     def update_gui(self, text):
-        self.root.after(0, lambda: self._insert_text(text))
+        self.view.post_text(text)
 
-    def _insert_text(self, text):
-        self.text_area.insert(tk.END, text)
-        self.text_area.see(tk.END)
+    def show_block(self, kind, record, text):
+        """Pipeline stream callback (any thread): 'interim', 'partial' or 'final' block of a segment"""
+        self.view.post(kind, record.get('id'), text)
 
-    def clear_screen(self): self.text_area.delete(1.0, tk.END)
+    def clear_screen(self): self.view.clear()
     def on_closing(self):
         self.is_running = False
+        if self.pipeline: self.pipeline.stop()
         self.audio_cap.stop()
+        self.view.close()
+        if self.store: self.store.close()
         self.root.destroy()
 
 if __name__ == "__main__":
     # No more CLI prompts here
     audio_module = AudioCapture()
+    get_metrics().start_server()
+    model_manager.get_catalog().refresh_async()
     
     root = tk.Tk()
     app = MainGUI(root, audio_module)
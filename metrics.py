@@ -0,0 +1,184 @@
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+PREFIX = "transcriber_"
+DEFAULT_PORT = int(os.getenv("METRICS_PORT", "9464"))  # 0 disables the HTTP endpoint
+
+# HELP text of the Prometheus families (metrics not listed here get a TYPE line only)
+DESCRIPTIONS = {
+    "stage_seconds": "Seconds spent per pipeline stage and call",
+    "time_to_first_text_seconds": "Seconds from a chunk being queued to its first segment",
+    "translation_tokens": "Tokens per translated sentence, generated vs forced context",
+    "whisper_batch_chunks": "Chunks per cross-stream Whisper batch",
+    "queue_depth": "Items waiting in a queue",
+    "buffered_seconds": "Seconds of captured audio waiting for transcription",
+    "ring_used_seconds": "Seconds of the capture ring in use",
+    "lag_seconds": "Seconds a live source's output trails real time",
+    "rtf": "Real-time factor of the last chunk (processing / audio seconds)",
+    "quality_level": "Current adaptive quality level (0 = full quality)",
+    "startup_seconds": "Seconds until a startup step finished",
+    "transcript_blocks": "Finished transcript blocks in the GUI window / scroll-back file",
+    "transcript_scrollback_bytes": "Size of the GUI scroll-back file",
+    "aggregate_realtime_factor": "Audio seconds processed per wall-clock second, all streams together",
+    "catchup_seconds_total": "Seconds of live audio skipped or dropped to catch up",
+    "deadline_misses_total": "Chunks finished after their stream's latency target",
+    "errors_total": "Errors per pipeline stage",
+    "quality_switches_total": "Adaptive quality level changes",
+}
+
+
+def escape_label(value):
+    """Label value as the Prometheus text format wants it: backslash, double quote and newline escaped"""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Metrics:
+    """
+    Process-wide counters, gauges and timings.
+
+        metrics.observe("stage_seconds", 0.42, stage="whisper")   # timing (count/sum/max/last)
+        metrics.set("queue_depth", 3, queue="audio")               # gauge
+        metrics.inc("errors_total", where="asr")                   # counter
+
+    Exposed over HTTP on 127.0.0.1 as Prometheus text (/metrics) and JSON (/metrics.json).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.timings = {}
+        self.gauges = {}
+        self.counters = {}
+
+    @staticmethod
+    def _key(name, labels):
+        return (name, tuple(sorted(labels.items())))
+
+    def observe(self, name, seconds, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            t = self.timings.setdefault(key, {"count": 0, "sum": 0.0, "max": 0.0, "last": 0.0})
+            t["count"] += 1
+            t["sum"] += seconds
+            t["max"] = max(t["max"], seconds)
+            t["last"] = seconds
+
+    def set(self, name, value, **labels):
+        with self._lock:
+            self.gauges[self._key(name, labels)] = value
+
+    def inc(self, name, amount=1, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def timer(self, name, **labels):
+        """with metrics.timer("stage_seconds", stage="gloss"): ..."""
+        return _Timer(self, name, labels)
+
+    # --- READERS ---
+    def last(self, name, **labels):
+        t = self.timings.get(self._key(name, labels))
+        return t["last"] if t else None
+
+    def gauge(self, name, default=None, **labels):
+        return self.gauges.get(self._key(name, labels), default)
+
+    def counter_total(self, name):
+        with self._lock:
+            return sum(v for (n, _), v in self.counters.items() if n == name)
+
+    def snapshot(self):
+        def fmt(key):
+            name, labels = key
+            return name + ("{" + ",".join(f"{k}={v}" for k, v in labels) + "}" if labels else "")
+
+        with self._lock:
+            return {
+                "time": time.time(),
+                "timings": {fmt(k): {**v, "mean": v["sum"] / v["count"] if v["count"] else 0.0} for k, v in self.timings.items()},
+                "gauges": {fmt(k): v for k, v in self.gauges.items()},
+                "counters": {fmt(k): v for k, v in self.counters.items()},
+            }
+
+    def prometheus_text(self):
+        """Text exposition format 0.0.4: one # HELP / # TYPE header per family, then its samples"""
+        def labels_str(labels):
+            return "{" + ",".join(f'{k}="{escape_label(v)}"' for k, v in labels) + "}" if labels else ""
+
+        families = {}  # family -> (type, help, [sample lines]), in output order
+        def add(family, kind, line, help_text=None):
+            families.setdefault(family, (kind, help_text or DESCRIPTIONS.get(family), []))[2].append(line)
+
+        with self._lock:
+            # Timings are summaries without quantiles (count + sum); their max is a gauge of its own
+            for (name, labels), t in sorted(self.timings.items()):
+                add(name, "summary", f"{PREFIX}{name}_count{labels_str(labels)} {t['count']}")
+                add(name, "summary", f"{PREFIX}{name}_sum{labels_str(labels)} {t['sum']:.6f}")
+            for (name, labels), t in sorted(self.timings.items()):
+                add(f"{name}_max", "gauge", f"{PREFIX}{name}_max{labels_str(labels)} {t['max']:.6f}",
+                    DESCRIPTIONS.get(name) and f"Largest value of {name}")
+            for (name, labels), v in sorted(self.gauges.items()):
+                add(name, "gauge", f"{PREFIX}{name}{labels_str(labels)} {v}")
+            for (name, labels), v in sorted(self.counters.items()):
+                add(name, "counter", f"{PREFIX}{name}{labels_str(labels)} {v}")
+
+        lines = []
+        for family, (kind, help_text, samples) in families.items():
+            if help_text: lines.append(f"# HELP {PREFIX}{family} " + help_text.replace("\\", "\\\\").replace("\n", "\\n"))
+            lines.append(f"# TYPE {PREFIX}{family} {kind}")
+            lines += samples
+        return "\n".join(lines) + "\n"
+
+    # --- HTTP ---
+    def start_server(self, port=DEFAULT_PORT, host="127.0.0.1"):
+        if not port: return None
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.startswith("/metrics.json"):
+                    body, ctype = json.dumps(metrics.snapshot()).encode(), "application/json"
+                elif self.path.startswith("/metrics"):
+                    body, ctype = metrics.prometheus_text().encode(), "text/plain; version=0.0.4"
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", ctype)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        try:
+            server = ThreadingHTTPServer((host, port), Handler)
+        except OSError as e:
+            print(f"[METRICS] Could not listen on {host}:{port} ({e}). Metrics endpoint disabled.")
+            return None
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        print(f"[METRICS] Serving http://{host}:{port}/metrics (Prometheus) and /metrics.json")
+        return server
+
+
+class _Timer:
+    def __init__(self, metrics, name, labels):
+        self.metrics, self.name, self.labels = metrics, name, labels
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.observe(self.name, time.perf_counter() - self.t0, **self.labels)
+        return False
+
+
+_metrics = Metrics()
+
+def get_metrics():
+    return _metrics
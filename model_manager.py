@@ -1,73 +1,304 @@
 import json
 import os
-from huggingface_hub import list_models
+import threading
+import time
 
+# Bundled snapshot of the Helsinki-NLP model list (works offline), and the refreshed copy next to it
 MODEL_DB_FILE = "helsinki_models.json"
+CATALOG_CACHE_FILE = os.getenv("HELSINKI_CATALOG_PATH", "helsinki_models.cache.json")
+CATALOG_MAX_AGE_DAYS = float(os.getenv("HELSINKI_CATALOG_MAX_AGE_DAYS", "7"))
+# Local stand-in for the hub (JSON list of ids / entries, or one id per line), e.g. for tests
+HUB_STANDIN_FILE = os.getenv("HELSINKI_HUB_STANDIN")
 
 # Map common names to ISO codes used by Helsinki
 ISO_MAP = {
-    "english": "en", "indonesian": "id", "japanese": "ja", 
-    "spanish": "es", "french": "fr", "german": "de", 
+    "english": "en", "indonesian": "id", "japanese": "ja",
+    "spanish": "es", "french": "fr", "german": "de",
     "chinese": "zh", "korean": "ko", "russian": "ru",
     "arabic": "ar", "hindi": "hi", "thai": "th",
     "vietnamese": "vi", "italian": "it", "dutch": "nl"
 }
 
-def update_model_db():
-    print("\n[SYSTEM] Fetching model list from Hugging Face (One-time process)...")
-    print("This might take 10-20 seconds...")
-    
-    # Fetch all models from author Helsinki-NLP that contain 'opus-mt-'
-    models = list_models(author="Helsinki-NLP", search="opus-mt-")
-    
-    db = []
-    for m in models:
-        # Format is usually: Helsinki-NLP/opus-mt-{src}-{tgt}
-        # Example: Helsinki-NLP/opus-mt-en-id
+# tc-* models use ISO 639-3 codes
+ISO3_TO_ISO = {
+    "eng": "en", "ind": "id", "jpn": "ja", "spa": "es", "fra": "fr", "deu": "de", "zho": "zh",
+    "kor": "ko", "rus": "ru", "ara": "ar", "hin": "hi", "tha": "th", "vie": "vi", "ita": "it", "nld": "nl",
+}
+
+# Language groups used in model ids -> the ISO_MAP languages they cover
+FAMILIES = {
+    "mul": set(ISO_MAP.values()),
+    "ine": {"en", "es", "fr", "de", "ru", "hi", "it", "nl"},
+    "roa": {"es", "fr", "it"}, "itc": {"es", "fr", "it"}, "ROMANCE": {"es", "fr", "it"},
+    "gem": {"en", "de", "nl"}, "gmw": {"en", "de", "nl"},
+    "sla": {"ru"}, "zle": {"ru"},
+    "sem": {"ar"}, "afa": {"ar"},
+    "inc": {"hi"}, "iir": {"hi"},
+    "map": {"id"}, "poz": {"id"}, "pqe": {"id"}, "zlm": {"id"},
+    "zhx": {"zh"}, "ZH": {"zh"}, "sit": {"zh"},
+    "jpx": {"ja"},
+    "mkh": {"vi"}, "aav": {"vi"},
+    "tai": {"th"},
+}
+
+# Model id prefixes after "opus-mt-": rough size and preference (earlier = preferred at equal hops)
+VARIANTS = {"": 77, "tc-base": 77, "tc-big": 230, "tc-bible-big": 230, "synthetic": 77, "tiny": 20}
+VARIANT_ORDER = ["", "tc-base", "tc-big", "tc-bible-big", "synthetic", "tiny"]
+
+
+def parse_model_id(model_id):
+    """
+    'Helsinki-NLP/opus-mt-tc-big-cat_oci_spa-en' -> variant 'tc-big', src {'es'}, tgt {'en'}, ...
+    Language sides can be a code (2 or 3 letters), an underscore list, or a family ('mul', 'roa', 'ROMANCE').
+    Multi-target models need a '>>xxx<<' token in front of the input, so they are flagged.
+    """
+    name = model_id.split("/")[-1]
+    if not name.startswith("opus-mt-"): return None
+    parts = name[len("opus-mt-"):].split("-")
+    if len(parts) < 2: return None
+    variant = "-".join(parts[:-2])
+
+    def expand(side):
+        langs, codes = set(), side.split("_")
+        for code in codes:
+            if code in FAMILIES: langs |= FAMILIES[code]
+            else: langs.add(ISO3_TO_ISO.get(code, code))
+        return langs, len(codes) > 1 or side in FAMILIES
+
+    src, src_multi = expand(parts[-2])
+    tgt, tgt_multi = expand(parts[-1])
+    return {
+        "id": model_id, "variant": variant, "src_raw": parts[-2], "tgt_raw": parts[-1],
+        "src": src, "tgt": tgt, "multi_source": src_multi, "needs_target_token": tgt_multi,
+        "params_m": VARIANTS.get(variant, 77),
+    }
+
+
+def _rank(model):
+    variant = VARIANT_ORDER.index(model["variant"]) if model["variant"] in VARIANT_ORDER else len(VARIANT_ORDER)
+    return (model["multi_source"], variant, model["params_m"])
+
+
+# --- CATALOG ---
+def hub_fetcher():
+    """All Helsinki-NLP opus-mt model ids from the Hugging Face hub"""
+    from huggingface_hub import list_models  # imported here: only needed for a refresh
+    return [m.id for m in list_models(author="Helsinki-NLP", search="opus-mt-")]
+
+def file_fetcher(path):
+    """Stand-in for the hub: a JSON list of ids / {'id': ...} entries, or a text file with one id per line"""
+    def fetch():
+        with open(path, "r", encoding="utf-8") as f:
+            text = f.read()
+        try:
+            items = json.loads(text)
+        except ValueError:
+            items = text.split()
+        return [item["id"] if isinstance(item, dict) else item for item in items]
+    return fetch
+
+
+class ModelCatalog:
+    """
+    Process-wide index of the Helsinki-NLP models, loaded once on first use:
+
+        pairs[(src, tgt)]  -> usable models for that direction, best first
+        families[code]     -> models whose source or target is that language group
+
+    Loads the refreshed cache if there is one, else the bundled snapshot, so it works offline.
+    refresh_async() fetches a new list on a background thread and swaps the index in when done.
+    """
+
+    def __init__(self, snapshot_path=MODEL_DB_FILE, cache_path=CATALOG_CACHE_FILE, fetcher=None):
+        self.snapshot_path = snapshot_path
+        self.cache_path = cache_path
+        self.fetcher = fetcher or (file_fetcher(HUB_STANDIN_FILE) if HUB_STANDIN_FILE else hub_fetcher)
+        self._lock = threading.Lock()
+        self._refreshing = None
+        self.models = None
+        self.loaded_from = None
+
+    # --- LOADING ---
+    def _ensure_loaded(self):
+        with self._lock:
+            if self.models is not None: return
+            for path in (self.cache_path, self.snapshot_path):
+                ids = self._read(path)
+                if ids:
+                    self._build(ids)
+                    self.loaded_from = path
+                    return
+            print("[SYSTEM] No Helsinki model list on disk yet, NLLB-200 will be used until a refresh finishes.")
+            self._build([])
+
+    @staticmethod
+    def _read(path):
+        if not path or not os.path.exists(path): return None
         try:
-            parts = m.modelId.split("-")
-            # Usually the last two parts are src and tgt
-            # But sometimes it's complex like 'es-en'
-            if len(parts) >= 4:
-                src = parts[-2]
-                tgt = parts[-1]
-                db.append({
-                    "id": m.modelId,
-                    "src": src,
-                    "tgt": tgt
-                })
-        except:
-            continue
-            
-    with open(MODEL_DB_FILE, "w") as f:
-        json.dump(db, f)
-    
-    print(f"[SYSTEM] Database updated! Found {len(db)} Helsinki models.")
-    return db
+            with open(path, "r") as f: data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return [item["id"] if isinstance(item, dict) else item for item in data]
+
+    def _build(self, ids):
+        models, pairs, families = [], {}, {}
+        for model_id in ids:
+            model = parse_model_id(model_id)
+            if not model: continue
+            models.append(model)
+            for code in {model["src_raw"], model["tgt_raw"]} & FAMILIES.keys():
+                families.setdefault(code, []).append(model)
+            if model["needs_target_token"]: continue
+            for src in model["src"]:
+                for tgt in model["tgt"]:
+                    if src != tgt: pairs.setdefault((src, tgt), []).append(model)
+        for found in pairs.values(): found.sort(key=_rank)
+        # Built completely before being published, so readers never see half an index
+        self.pairs, self.families, self.models = pairs, families, models
+
+    # --- LOOKUP ---
+    def find(self, src_iso, tgt_iso):
+        self._ensure_loaded()
+        return self.pairs.get((src_iso, tgt_iso), [])
+
+    def best(self, src_iso, tgt_iso):
+        found = self.find(src_iso, tgt_iso)
+        return found[0] if found else None
+
+    def targets_from(self, src_iso):
+        self._ensure_loaded()
+        return {tgt for src, tgt in self.pairs if src == src_iso}
+
+    def family(self, code):
+        self._ensure_loaded()
+        return self.families.get(code, [])
+
+    # --- REFRESH ---
+    def is_stale(self):
+        if not os.path.exists(self.cache_path): return True
+        return time.time() - os.path.getmtime(self.cache_path) > CATALOG_MAX_AGE_DAYS * 86400
+
+    def refresh(self):
+        """Fetches the model list (blocking), writes the cache and swaps the index in"""
+        ids = sorted(set(self.fetcher()))
+        if not ids: raise RuntimeError("the model list came back empty")
+        db = [{"id": m["id"], "src": m["src_raw"], "tgt": m["tgt_raw"]} for m in map(parse_model_id, ids) if m]
+        tmp = self.cache_path + ".tmp"
+        with open(tmp, "w") as f: json.dump(db, f)
+        os.replace(tmp, self.cache_path)
+        with self._lock:
+            self._build(ids)
+            self.loaded_from = self.cache_path
+        print(f"[SYSTEM] Helsinki model list refreshed: {len(db)} models.")
+        return db
+
+    def refresh_async(self, force=False):
+        """Refreshes on a daemon thread if the cache is missing or old. Never blocks the caller."""
+        if os.getenv("HF_HUB_OFFLINE") == "1" and self.fetcher is hub_fetcher: return None
+        if not force and not self.is_stale(): return None
+        if self._refreshing and self._refreshing.is_alive(): return self._refreshing
+
+        def run():
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"[SYSTEM] Helsinki model list refresh failed ({e}), keeping {self.loaded_from or 'the bundled list'}.")
+
+        self._refreshing = threading.Thread(target=run, daemon=True)
+        self._refreshing.start()
+        return self._refreshing
+
+
+_catalog = None
+_catalog_lock = threading.Lock()
+
+def get_catalog():
+    global _catalog
+    with _catalog_lock:
+        if _catalog is None:
+            _catalog = ModelCatalog()
+        return _catalog
+
+
+def update_model_db():
+    """Blocking refresh of the model list (see ModelCatalog.refresh_async for the background one)"""
+    return get_catalog().refresh()
 
 def load_model_db():
-    if not os.path.exists(MODEL_DB_FILE):
-        return update_model_db()
-    
-    with open(MODEL_DB_FILE, "r") as f:
-        return json.load(f)
+    catalog = get_catalog()
+    catalog._ensure_loaded()
+    return [{"id": m["id"], "src": m["src_raw"], "tgt": m["tgt_raw"]} for m in catalog.models]
 
 def find_helsinki_models(source_lang_name, target_lang_name):
     """
-    Returns a list of valid models matching the language pair.
+    Returns a list of valid models matching the language pair, best first.
     """
-    db = load_model_db()
-    
     src_iso = ISO_MAP.get(source_lang_name.lower())
     tgt_iso = ISO_MAP.get(target_lang_name.lower())
 
     if not src_iso or not tgt_iso:
         return []
 
-    matches = []
-    for model in db:
-        # Direct match (e.g. en -> id)
-        if model['src'] == src_iso and model['tgt'] == tgt_iso:
-            matches.append(model)
-    
-    return matches
\ No newline at end of file
+    return [{"id": m["id"], "src": src_iso, "tgt": tgt_iso} for m in get_catalog().find(src_iso, tgt_iso)]
+
+# --- ROUTE PLANNING ---
+# Rough decoder cost of NLLB-200 in millions of parameters (opus-mt sizes are in VARIANTS)
+NLLB_PARAMS_M = 600
+PIVOT_LANGS = ["en"]  # Tried first; any other language with both hops also works
+
+def model_params_m(model_id):
+    model = parse_model_id(model_id)
+    return model["params_m"] if model else VARIANTS[""]
+
+def plan_route(source_lang_name, target_lang_name):
+    """
+    Cheapest chain of Helsinki models for the pair: [direct_id], or [src->pivot, pivot->tgt]
+    when no direct pair exists. None if neither is available.
+    """
+    src_iso = ISO_MAP.get(source_lang_name.lower())
+    tgt_iso = ISO_MAP.get(target_lang_name.lower())
+    if not src_iso or not tgt_iso or src_iso == tgt_iso:
+        return None
+
+    catalog = get_catalog()
+    direct = catalog.best(src_iso, tgt_iso)
+    if direct:
+        return [direct["id"]]
+
+    pivots = PIVOT_LANGS + sorted(catalog.targets_from(src_iso) - set(PIVOT_LANGS))
+    routes = []
+    for p in pivots:
+        if p in (src_iso, tgt_iso): continue
+        first, second = catalog.best(src_iso, p), catalog.best(p, tgt_iso)
+        if first and second: routes.append([first["id"], second["id"]])
+    # min() keeps the first of equal-cost routes, so English wins ties
+    return min(routes, key=route_params_m) if routes else None
+
+def route_params_m(route):
+    return sum(model_params_m(m) for m in route)
+
+def describe_route(route, source_lang_name, target_lang_name):
+    """One line for the settings window: the hops and their cost next to NLLB-200"""
+    if not route:
+        return f"No Helsinki route for {source_lang_name} -> {target_lang_name}: NLLB-200 ({NLLB_PARAMS_M}M) will be used."
+    params = route_params_m(route)
+    if len(route) == 1:
+        path = f"{source_lang_name} -> {target_lang_name} (direct)"
+    else:
+        shared = parse_model_id(route[0])["tgt"] & parse_model_id(route[1])["src"]
+        pivot = min(shared, key=lambda c: (c not in PIVOT_LANGS, c)) if shared else "?"
+        pivot = next((name.title() for name, iso in ISO_MAP.items() if iso == pivot), pivot)
+        path = f"{source_lang_name} -> {pivot} -> {target_lang_name} ({len(route)} hops)"
+    return (f"Helsinki route: {path}, ~{params}M params per sentence "
+            f"vs {NLLB_PARAMS_M}M for NLLB-200 (~{NLLB_PARAMS_M / params:.1f}x less compute)")
+
+def pick_translator(source_lang_name, target_lang_name, prefer="helsinki"):
+    """
+    Returns (translator_type, helsinki_id) for a language pair.
+    helsinki_id is one model id for a direct pair, or a list of ids for a pivot route.
+    Falls back to NLLB when no Helsinki route exists.
+    """
+    if prefer == "helsinki":
+        route = plan_route(source_lang_name, target_lang_name)
+        if route: return "helsinki", route[0] if len(route) == 1 else route
+    return "nllb", None
@@ -0,0 +1,180 @@
+import gc
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import torch
+
+# Rough resident size of faster-whisper models, in GB (int8 on CPU / float16 on GPU)
+WHISPER_SIZE_GB = {
+    "tiny": 0.1, "base": 0.2, "small": 0.5, "medium": 1.5,
+    "large-v1": 3.0, "large-v2": 3.0, "large-v3": 3.0,
+}
+
+DEFAULT_BUDGET_GB = float(os.getenv("MODEL_MEMORY_BUDGET_GB", "8"))
+# Cache hits happen per chunk: only logged when debugging (loads and evictions always are)
+REGISTRY_DEBUG = os.getenv("REGISTRY_DEBUG", "0") == "1"
+# float32 checkpoint size when the weights aren't in the local Hugging Face cache yet
+FALLBACK_WEIGHTS_GB = {"opus-mt": 0.3, "default": 2.5}
+
+
+def checkpoint_bytes(model_id):
+    """Size of the float32 weights of a Hugging Face model: the cached checkpoint file, else a rough guess"""
+    try:
+        from huggingface_hub import try_to_load_from_cache
+        for name in ("model.safetensors", "pytorch_model.bin"):
+            path = try_to_load_from_cache(model_id, name)
+            if isinstance(path, str) and os.path.exists(path): return os.path.getsize(path)
+    except ImportError:
+        pass
+    return int(FALLBACK_WEIGHTS_GB["opus-mt" if "opus-mt" in model_id else "default"] * 1024**3)
+
+
+class ModelRegistry:
+    """
+    Process-wide cache of loaded models, so changing settings only loads what's missing.
+
+    Whisper and translators are cached separately, keyed by (kind, model id, device, dtype).
+    Each device has its own memory budget; when a new model doesn't fit, the least recently
+    used ones on that device are dropped (an AIEngine still holding one keeps it alive until it goes).
+    That happens *before* loading, from an estimate of the model's size, so the budget is never
+    exceeded by the load itself. Loads run outside the registry lock: other gets (and reuse hits)
+    go on meanwhile, and a second get of a model being loaded waits for that load.
+    """
+
+    def __init__(self, budget_gb=DEFAULT_BUDGET_GB):
+        self.budget_bytes = int(budget_gb * 1024**3)
+        self.models = OrderedDict()   # key -> (model, size_bytes)
+        self.tokenizers = {}
+        self._loading = {}            # key -> Event set when its load finished (or failed)
+        self._reserved = {}           # device -> estimated bytes of the loads in progress
+        self._lock = threading.RLock()
+
+    # --- PUBLIC API ---
+    def get_whisper(self, size, device, compute_type, **kwargs):
+        from faster_whisper import WhisperModel
+        key = ("whisper", size, device, compute_type) + tuple(sorted(kwargs.items()))
+        size_bytes = int(WHISPER_SIZE_GB.get(size, 1.5) * 1024**3)
+        return self._get(key, device, lambda: WhisperModel(size, device=device, compute_type=compute_type, **kwargs),
+                         lambda m: size_bytes, lambda: size_bytes)
+
+    def get_translator(self, model_id, device, dtype):
+        from transformers import AutoModelForSeq2SeqLM, MarianMTModel
+        model_cls = MarianMTModel if "opus-mt" in model_id else AutoModelForSeq2SeqLM
+        key = ("translator", model_id, device, str(dtype))
+        element_size = torch.tensor([], dtype=dtype).element_size()
+        return self._get(key, device, lambda: model_cls.from_pretrained(model_id, torch_dtype=dtype).to(device),
+                         self._torch_size, lambda: checkpoint_bytes(model_id) * element_size // 4)
+
+    def get_ct2_translator(self, model_id, device, compute_type, cpu_threads=0):
+        """CTranslate2 copy of a translation model (converted and cached on disk the first time)"""
+        import ctranslate2
+        import translator_backends
+        key = ("translator", model_id, device, f"ct2-{compute_type}")
+        quantization = translator_backends.ct2_quantization(compute_type)
+
+        def load():
+            path = translator_backends.convert(model_id, quantization)
+            return ctranslate2.Translator(path, device=device, compute_type=compute_type, intra_threads=cpu_threads)
+
+        def estimate():
+            path = translator_backends.converted_path(model_id, quantization)
+            if os.path.isdir(path): return translator_backends.dir_size(path)
+            return checkpoint_bytes(model_id) // (4 if quantization == "int8" else 2 if "16" in quantization else 1)
+
+        return self._get(key, device, load,
+                         lambda m: translator_backends.dir_size(translator_backends.converted_path(model_id, quantization)),
+                         estimate)
+
+    def get_tokenizer(self, model_id, src_lang=None):
+        from transformers import AutoTokenizer, MarianTokenizer
+        key = (model_id, src_lang)
+        with self._lock:
+            if key in self.tokenizers: return self.tokenizers[key]
+        # Loaded outside the lock (may download); if two threads race, the first one stored wins
+        if "opus-mt" in model_id:
+            tokenizer = MarianTokenizer.from_pretrained(model_id)
+        else:
+            tokenizer = AutoTokenizer.from_pretrained(model_id, src_lang=src_lang)
+        with self._lock:
+            return self.tokenizers.setdefault(key, tokenizer)
+
+    def loaded(self):
+        with self._lock:
+            return [(key, size) for key, (_, size) in self.models.items()]
+
+    def clear(self):
+        with self._lock:
+            self.models.clear()
+            self.tokenizers.clear()
+        self._free_memory()
+
+    # --- INTERNALS ---
+    def _get(self, key, device, loader, sizer, estimator):
+        while True:
+            with self._lock:
+                if key in self.models:
+                    self.models.move_to_end(key)
+                    if REGISTRY_DEBUG: print(f"[REGISTRY] Reusing {key[0]} '{key[1]}' on {device.upper()}")
+                    return self.models[key][0]
+                loading = self._loading.get(key)
+                if loading is None:
+                    # This thread loads it: make room for it first
+                    estimate = estimator()
+                    loading = self._loading[key] = threading.Event()
+                    self._evict(device, estimate)
+                    self._reserved[device] = self._reserved.get(device, 0) + estimate
+                    break
+            # Someone else is loading it: wait, then take it from the cache (or load it, if that failed)
+            loading.wait()
+
+        try:
+            t0 = time.perf_counter()
+            model = loader()
+            size = sizer(model)
+            print(f"[REGISTRY] Loaded {key[0]} '{key[1]}' on {device.upper()} in {time.perf_counter() - t0:.1f}s")
+            with self._lock:
+                self._reserved[device] -= estimate
+                # The estimate was low: make up the difference now
+                if size > estimate: self._evict(device, size)
+                self.models[key] = (model, size)
+            return model
+        except BaseException:
+            with self._lock: self._reserved[device] -= estimate
+            raise
+        finally:
+            with self._lock: del self._loading[key]
+            loading.set()
+
+    def _evict(self, device, incoming):
+        used = self._reserved.get(device, 0) + sum(size for key, (_, size) in self.models.items() if key[2] == device)
+        evicted = False
+        for key in list(self.models):
+            if used + incoming <= self.budget_bytes: break
+            if key[2] != device: continue
+            _, size = self.models.pop(key)
+            used -= size
+            evicted = True
+            print(f"[REGISTRY] Evicted {key[0]} '{key[1]}' from {device.upper()} (memory budget)")
+        if evicted: self._free_memory()
+
+    @staticmethod
+    def _torch_size(model):
+        return sum(p.numel() * p.element_size() for p in model.parameters())
+
+    @staticmethod
+    def _free_memory():
+        gc.collect()
+        if torch.cuda.is_available(): torch.cuda.empty_cache()
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+def get_registry():
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = ModelRegistry()
+        return _registry
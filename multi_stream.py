@@ -0,0 +1,382 @@
+"""
+Several live sources at once on one set of loaded models.
+
+    python multi_stream.py "https://youtube.com/live/A" "https://youtube.com/live/B" --live --src ja --tgt en
+    python multi_stream.py a.mp4 b.mp4 c.mp4 --realtime --out-dir subs      # files played as stand-in livestreams
+    python multi_stream.py a.mp4 b.mp4 --realtime --stub-models              # same, no model downloads
+
+Each source has its own AudioCapture and its own AIEngine *state* (clock, segment ids, overlap dedup,
+translation context, quality level); the Whisper and translation models behind the engines come from
+the model registry, so they are loaded once. One StreamScheduler does the work for all of them:
+
+    captures -> [pending chunks per stream] -> Whisper (batched across streams) -> translation (batched across streams)
+             -> gloss/format -> per-stream SRT/VTT/JSONL + transcript store session
+
+Whisper picks chunks earliest-deadline-first (deadline = enqueued + the stream's latency target), with at
+most an equal share of each batch per stream, so one busy stream can't starve the others. Per-stream lag
+and deadline misses plus the aggregate throughput are printed every few seconds and at the end.
+All cli.py options (--formats, --gloss-backend, --quality, ...) are accepted; --offline is not used here.
+"""
+import bisect
+import math
+import os
+import queue
+import sys
+import threading
+import time
+import traceback
+from collections import deque, namedtuple
+
+import numpy as np
+
+import cli
+from audio_capture import AudioCapture
+from exporters import TranscriptWriter
+from metrics import get_metrics
+from offline import load_batched_pipeline
+from transcript_store import get_transcript_store
+
+# Whisper segment of one chunk decoded in a cross-stream batch (times relative to the chunk)
+Decoded = namedtuple("Decoded", ["start", "end", "text"])
+
+
+def speech_regions(audio):
+    """Speech regions of a chunk in samples (faster-whisper's Silero VAD); the whole chunk without it"""
+    try:
+        from faster_whisper.vad import VadOptions, get_speech_timestamps
+    except ImportError:
+        return [{"start": 0, "end": len(audio)}]
+    return get_speech_timestamps(audio, VadOptions())
+
+
+def transcribe_clips(batched, chunks, language, beam_size, batch_size, sample_rate=16000):
+    """
+    One batched Whisper call over the speech of several chunks (different streams):
+    the chunks are laid end to end and each speech region becomes one clip of the batch.
+    faster-whisper takes clip_timestamps in seconds and returns segment times in seconds of the joined audio.
+    Returns (language, [Decoded, ...]) per chunk.
+    """
+    offsets, clips, owners, pos = [], [], [], 0
+    for k, audio in enumerate(chunks):
+        offsets.append(pos / sample_rate)
+        for r in speech_regions(audio):
+            clips.append({"start": (pos + r["start"]) / sample_rate, "end": (pos + r["end"]) / sample_rate})
+            owners.append(k)
+        pos += len(audio)
+    results = [[] for _ in chunks]
+    if not clips: return [(language, found) for found in results]
+
+    segments, info = batched.transcribe(np.concatenate(chunks), language=language, beam_size=beam_size,
+                                        batch_size=batch_size, vad_filter=False, clip_timestamps=clips)
+    clip_starts = [clip["start"] for clip in clips]
+    for seg in segments:
+        text = seg.text.strip()
+        if not text: continue
+        # Segment times are rounded to the millisecond: match them to their clip with that much slack
+        k = owners[max(0, bisect.bisect_right(clip_starts, seg.start + 0.001) - 1)]
+        results[k].append(Decoded(max(0.0, seg.start - offsets[k]), seg.end - offsets[k], text))
+    return [(info.language, sorted(found, key=lambda s: s.start)) for found in results]
+
+
+class StreamSession:
+    """One source: its capture, its engine state and where its records go"""
+
+    def __init__(self, name, source, engine, capture, writer=None, store_session=None, latency_target=10.0):
+        self.name, self.source = name, source
+        self.engine, self.capture = engine, capture
+        self.writer = writer
+        self.store_session = store_session
+        self.latency_target = latency_target
+        self.pending = deque()   # Chunks taken from the capture queue, waiting for Whisper
+        self.in_flight = 0       # Chunks between Whisper and the last record
+        self._lock = threading.Lock()  # pending + in_flight: the three scheduler threads and finished() share them
+        self.segments = 0
+        self.deadline_misses = 0
+        self.lags = []
+        self.metrics = get_metrics()
+        # Chunks waiting here count toward the capture's live backlog bound
+        capture.downstream_seconds = self.pending_seconds
+
+    def pull(self):
+        while True:
+            with self._lock:
+                try: self.pending.append(self.capture.audio_queue.get_nowait())
+                except queue.Empty: return
+
+    def take(self):
+        """Next pending chunk, counted in flight in the same step"""
+        with self._lock:
+            self.in_flight += 1
+            return self.pending.popleft()
+
+    def release(self, count=1):
+        """`count` chunks are done (or failed)"""
+        with self._lock:
+            self.in_flight -= count
+
+    def deadline(self, chunk):
+        return (chunk.enqueued_at or time.monotonic()) + self.latency_target
+
+    def pending_seconds(self):
+        with self._lock:
+            return sum(len(c.audio) for c in self.pending) / 16000.0
+
+    def backlog_seconds(self):
+        return self.capture.audio_queue.seconds + self.pending_seconds()
+
+    def finished(self):
+        if self.capture.is_capturing: return False
+        with self._lock:
+            return not self.pending and self.in_flight == 0 and self.capture.audio_queue.empty()
+
+    def on_record(self, record):
+        self.segments += 1
+        if self.writer: self.writer.write(record)
+        if self.store_session is not None: get_transcript_store().add(self.store_session, record)
+        if self.capture.is_live:
+            lag = max(0.0, time.monotonic() - self.capture.stream_started_at - record['end'])
+            self.lags.append(lag)
+            self.metrics.set("lag_seconds", lag, stream=self.name)
+
+    def lag_summary(self):
+        if not self.lags: return "-"
+        return f"{self.lags[-1]:.1f}s (mean {sum(self.lags) / len(self.lags):.1f}, max {max(self.lags):.1f})"
+
+
+class StreamScheduler:
+    """
+    Whisper, translation and formatting on one thread each, shared by all sessions. Like ProcessingPipeline,
+    each stream's chunks leave in the order they came in, and the bounded queues push back on Whisper.
+    """
+
+    def __init__(self, sessions, whisper_batch=8, translation_max_wait=0.1, max_queue_size=4,
+                 batched_loader=load_batched_pipeline):
+        self.sessions = sessions
+        self.whisper_batch = max(1, whisper_batch)
+        self.translation_max_wait = translation_max_wait
+        self.batched_loader = batched_loader
+        self.batched = {}  # id(whisper model) -> batched pipeline (None: not available)
+        self.trans_q = queue.Queue(maxsize=max_queue_size)
+        self.format_q = queue.Queue(maxsize=max_queue_size)
+        self.metrics = get_metrics()
+        self.is_running = True
+        self.started_at = time.perf_counter()
+        self.audio_seconds = 0.0
+
+        self.threads = [threading.Thread(target=loop, daemon=True)
+                        for loop in (self._whisper_loop, self._translation_loop, self._format_loop)]
+        for t in self.threads: t.start()
+
+    def stop(self):
+        self.is_running = False
+
+    def finished(self):
+        return all(s.finished() for s in self.sessions)
+
+    # --- WHISPER ---
+    def _pick(self):
+        """Earliest deadlines first, each stream at most an equal share of the batch, each stream's chunks in order"""
+        for s in self.sessions:
+            s.pull()
+            s.engine.quality.observe_backlog(s.backlog_seconds(), s.capture.is_live)
+        active = [s for s in self.sessions if s.pending]
+        if not active: return []
+        share = max(1, math.ceil(self.whisper_batch / len(active)))
+        candidates = sorted(((s.deadline(chunk), n, i, s) for i, s in enumerate(active)
+                             for n, chunk in enumerate(list(s.pending)[:share])), key=lambda c: c[:3])
+        picked = []
+        for _, _, _, s in candidates[:self.whisper_batch]:
+            picked.append((s, s.take()))
+        return picked
+
+    def _whisper_loop(self):
+        while self.is_running:
+            picked = self._pick()
+            if not picked:
+                time.sleep(0.02)
+                continue
+            self.metrics.observe("whisper_batch_chunks", len(picked))
+
+            # Streams can only share a Whisper call with the same model, beam size and language
+            groups = {}
+            for s, chunk in picked:
+                e = s.engine
+                groups.setdefault((id(e.whisper), e.beam_size, e.source_lang), []).append((s, chunk))
+            for group in groups.values():
+                try:
+                    results = self._transcribe(group)
+                except Exception as e:
+                    self._report_error("whisper", e)
+                    for s, _ in group: s.release()
+                    continue
+                for s, chunk, segments in results:
+                    self.audio_seconds += len(chunk.audio) / 16000.0
+                    self._put(self.trans_q, (s, segments, s.deadline(chunk)))
+
+    def _transcribe(self, group):
+        engine = group[0][0].engine
+        key = id(engine.whisper)
+        if key not in self.batched:
+            self.batched[key] = self.batched_loader(engine.whisper) if self.batched_loader else None
+        batched = self.batched[key]
+        if batched is None or len(group) == 1:
+            return [(s, chunk, list(s.engine.iter_segments(chunk))) for s, chunk in group]
+
+        t0 = time.perf_counter()
+        decoded = transcribe_clips(batched, [chunk.audio for _, chunk in group], engine.source_lang, engine.beam_size,
+                                   self.whisper_batch)
+        elapsed = time.perf_counter() - t0
+        # Every chunk of the batch took the whole batch time to come out (that is what the quality controller sees)
+        return [(s, chunk, list(s.engine.iter_segments(chunk, decoded=(found, lang, elapsed))))
+                for (s, chunk), (lang, found) in zip(group, decoded)]
+
+    # --- TRANSLATION ---
+    def _translation_loop(self):
+        from transcriber import translate_streams
+        while self.is_running:
+            try:
+                batch = [self.trans_q.get(timeout=0.5)]
+            except queue.Empty:
+                continue
+            deadline = time.monotonic() + self.translation_max_wait
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0: break
+                try: batch.append(self.trans_q.get(timeout=remaining))
+                except queue.Empty: break
+
+            # Engines with the same route share the translation models: one batch per route
+            routes = {}
+            for s, segments, _ in batch:
+                e = s.engine
+                routes.setdefault((e.model_id, e.source_lang_code, e.target_lang, e.translator_backend), []).append((e, segments))
+            try:
+                for streams in routes.values(): translate_streams(streams)
+            except Exception as e:
+                self._report_error("trans", e)
+                for s, _, _ in batch: s.release()
+                continue
+            for item in batch: self._put(self.format_q, item)
+
+    # --- GLOSS / FORMAT ---
+    def _format_loop(self):
+        while self.is_running:
+            try:
+                s, segments, deadline = self.format_q.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            try:
+                for record in s.engine.build_records(segments): s.on_record(record)
+                if time.monotonic() > deadline:
+                    s.deadline_misses += 1
+                    self.metrics.inc("deadline_misses_total", stream=s.name)
+            except Exception as e:
+                self._report_error("format", e)
+            finally:
+                s.release()
+
+    def _put(self, q, item):
+        while self.is_running:
+            try:
+                q.put(item, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+
+    def _report_error(self, stage, error):
+        self.metrics.inc("errors_total", where=f"multi_{stage}")
+        print(f"[MULTI] {stage} stage error: {error}")
+        traceback.print_exc()
+
+    # --- REPORTING ---
+    def report(self):
+        elapsed = time.perf_counter() - self.started_at
+        speed = self.audio_seconds / elapsed if elapsed else 0.0
+        self.metrics.set("aggregate_realtime_factor", round(speed, 3))
+        lines = [f"[MULTI] {len(self.sessions)} streams | {cli.format_clock(self.audio_seconds)} of audio in "
+                 f"{cli.format_clock(elapsed)} | {speed:.2f}x realtime aggregate"]
+        for s in self.sessions:
+            lines.append(f"  {s.name:<10} lag {s.lag_summary():<28} backlog {s.backlog_seconds():5.1f}s  "
+                         f"{s.segments:5d} segments  {s.deadline_misses} late  quality: {s.engine.quality.describe()}")
+        return "\n".join(lines)
+
+
+def build_engines(engine_args, args, count):
+    """`count` AIEngines on one set of models (registry, or shared stub instances with --stub-models)"""
+    from transcriber import AIEngine
+    opts = dict(translation_batch_size=args.batch_size, device=args.device, cpu_threads=args.cpu_threads,
+                translator_backend=args.translator_backend, quality_mode=args.quality, context_segments=args.context_segments)
+    if args.stub_models:
+        from stub_models import StubTokenizer, StubTranslator, StubWhisperModel
+        models = dict(whisper=StubWhisperModel(seconds_per_audio_second=args.stub_cost),
+                      translator=StubTranslator(seconds_per_token=args.stub_cost / 100), tokenizer=StubTokenizer())
+        opts.update(models, use_translation_memory=False)
+    engines = [AIEngine(*engine_args, **opts) for _ in range(count)]
+    # Same models, so one lock: the translation and gloss threads never run them at the same time
+    for e in engines[1:]: e.translator_lock = engines[0].translator_lock
+    for e in engines: e.update_display_options({"gloss": not args.no_gloss, "gloss_backend": args.gloss_backend})
+    return engines
+
+
+def build_parser():
+    parser = cli.build_parser()
+    parser.description = "Several live sources at once, sharing one set of loaded models"
+    parser.add_argument("--realtime", action="store_true", help="Play local files at normal speed as stand-in livestreams")
+    parser.add_argument("--latency-target", type=float, default=10.0, help="Seconds from capture to output each stream aims for")
+    parser.add_argument("--report-interval", type=float, default=5.0)
+    parser.add_argument("--stub-models", action="store_true", help="Deterministic stand-in models (no downloads)")
+    parser.add_argument("--stub-cost", type=float, default=0.1, help="--stub-models: Whisper seconds per audio second")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.cpu_threads:
+        import torch
+        torch.set_num_threads(args.cpu_threads)
+    engine_args = cli.resolve_engine_args(args)
+    store = cli.open_store(args)
+    os.makedirs(args.out_dir, exist_ok=True)
+
+    sessions = []
+    for n, (source, engine) in enumerate(zip(args.inputs, build_engines(engine_args, args, len(args.inputs))), 1):
+        capture = AudioCapture(segment_mode=args.segment_mode)
+        writer = TranscriptWriter(cli.output_base(source, args.out_dir), args.formats.split(","))
+        route = [engine_args[5]] if isinstance(engine_args[5], str) else (engine_args[5] or [])
+        store_session = store.start_session(source, engine_args[1], engine_args[2], " > ".join(route) or "NLLB-200") if store else None
+        sessions.append(StreamSession(f"s{n}", source, engine, capture, writer, store_session, args.latency_target))
+        print(f"[MULTI] s{n}: {source}")
+
+    batched_loader = load_batched_pipeline
+    if args.stub_models:
+        from stub_models import StubBatchedPipeline
+        batched_loader = StubBatchedPipeline
+    scheduler = StreamScheduler(sessions, whisper_batch=args.whisper_batch, batched_loader=batched_loader)
+    for s in sessions:
+        if os.path.exists(s.source):
+            s.capture.start_file(s.source, realtime=args.realtime)
+        else:
+            s.capture.start_youtube(s.source, args.live, status_callback=cli.print_status)
+
+    last_report = time.perf_counter()
+    try:
+        while not scheduler.finished():
+            time.sleep(0.2)
+            if time.perf_counter() - last_report >= args.report_interval:
+                last_report = time.perf_counter()
+                print(scheduler.report(), flush=True)
+    except KeyboardInterrupt:
+        print("[MULTI] Stopping...")
+    for s in sessions: s.capture.stop()
+    scheduler.stop()
+    for s in sessions: s.writer.close()
+    if store: store.flush()
+
+    print(scheduler.report().replace("[MULTI]", "[DONE]", 1), flush=True)
+    for s in sessions:
+        print(f"  {s.name}: {s.segments} segments -> {', '.join(s.writer.paths)}")
+    if any(s.segments == 0 for s in sessions): sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
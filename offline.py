@@ -0,0 +1,103 @@
+"""
+Offline (non-live) transcription: decode the whole file once, cut it at pauses into long windows,
+and let faster-whisper's batched pipeline transcribe each window's speech regions in parallel batches.
+"""
+import subprocess
+
+import numpy as np
+
+from metrics import get_metrics
+from segmenter import AudioChunk
+
+
+def decode_audio(source, sample_rate=16000):
+    """Whole file -> int16 mono PCM (int16 keeps a 3h stream at ~350 MB instead of ~700 MB)"""
+    cmd = [
+        'ffmpeg', '-i', source,
+        '-f', 's16le', '-ac', '1',
+        '-ar', str(sample_rate), '-acodec', 'pcm_s16le', '-loglevel', 'quiet', '-'
+    ]
+    res = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    if res.returncode != 0 and not res.stdout:
+        raise RuntimeError(f"ffmpeg could not decode '{source}'")
+    return np.frombuffer(res.stdout, dtype=np.int16)
+
+
+def find_cuts(pcm, sample_rate=16000, window_seconds=240, search_seconds=20, frame_ms=30):
+    """
+    Sample positions to split `pcm` into windows of about `window_seconds`.
+    Each cut is placed on the quietest frame in the last `search_seconds` of the window,
+    so no word is split between two windows.
+    """
+    frame = int(sample_rate * frame_ms / 1000)
+    window = int(sample_rate * window_seconds)
+    search = int(sample_rate * search_seconds)
+    cuts = [0]
+
+    while len(pcm) - cuts[-1] > window:
+        target = cuts[-1] + window
+        region = pcm[target - search:target]
+        n = len(region) // frame
+        energy = np.square(region[:n * frame].astype(np.float32)).reshape(n, frame).mean(axis=1)
+        cuts.append(target - search + int(np.argmin(energy)) * frame + frame // 2)
+
+    cuts.append(len(pcm))
+    return cuts
+
+
+def iter_windows(pcm, sample_rate=16000, window_seconds=240):
+    """Yields AudioChunks (float32) cut at pauses, converting one window at a time"""
+    cuts = find_cuts(pcm, sample_rate, window_seconds)
+    for a, b in zip(cuts[:-1], cuts[1:]):
+        yield AudioChunk(pcm[a:b].astype(np.float32) / 32768.0, a / sample_rate, 0.0)
+
+
+def load_batched_pipeline(whisper):
+    """faster-whisper >= 1.0 ships BatchedInferencePipeline; older versions get None (sequential fallback)"""
+    try:
+        from faster_whisper import BatchedInferencePipeline
+    except ImportError:
+        print("[OFFLINE] faster-whisper has no BatchedInferencePipeline, falling back to sequential decoding.")
+        return None
+    return BatchedInferencePipeline(model=whisper)
+
+
+def transcribe_window(whisper, batched, audio, language, batch_size=16):
+    """
+    Returns (detected_lang, [(start, end, text), ...]) for one window, sorted by start time.
+    The batched pipeline runs VAD on the window and decodes `batch_size` speech regions per forward pass.
+    """
+    if batched is not None:
+        segments, info = batched.transcribe(audio, language=language, batch_size=batch_size)
+    else:
+        segments, info = whisper.transcribe(audio, language=language, beam_size=5, vad_filter=True)
+
+    found = [(seg.start, seg.end, seg.text.strip()) for seg in segments if seg.text.strip()]
+    found.sort(key=lambda s: s[0])
+    return info.language, found
+
+
+class OfflineTranscriber:
+    """
+    ASR stage for ProcessingPipeline when the whole file is available up front.
+
+        offline = OfflineTranscriber(engine)
+        pipeline = ProcessingPipeline(engine, None, record_callback=..., asr=offline.transcribe_chunk)
+        for chunk in iter_windows(decode_audio(path)): pipeline.submit(chunk)
+    """
+
+    def __init__(self, ai_engine, batch_size=16):
+        self.ai_engine = ai_engine
+        self.batch_size = batch_size
+        self.batched = load_batched_pipeline(ai_engine.whisper)
+
+    def transcribe_chunk(self, audio_chunk):
+        engine = self.ai_engine
+        with get_metrics().timer("stage_seconds", stage="whisper"):
+            lang, found = transcribe_window(engine.whisper, self.batched, audio_chunk.audio, engine.source_lang, self.batch_size)
+
+        # Stitch back onto the file's timeline, in order (make_segment keeps the overlap dedup state)
+        results = [engine.make_segment(text, audio_chunk.start + start, audio_chunk.start + end, lang)
+                   for start, end, text in found]
+        engine.total_processed_seconds = audio_chunk.start + len(audio_chunk.audio) / 16000.0
+        return results
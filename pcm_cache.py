@@ -0,0 +1,213 @@
+"""
+Cache of decoded audio: 16 kHz mono int16 PCM per source, so re-running a VOD or file with other
+settings skips yt-dlp and ffmpeg and reads a memory-mapped file instead.
+
+    python pcm_cache.py stats
+    python pcm_cache.py clear
+
+Entries are keyed by URL, or for local files by size, modification time, inode + a hash of their
+content (sampled, so multi-GB files hash in milliseconds). The file's stat signature is stored with
+the entry and checked again before it is replayed. Once the cache is bigger than its disk budget,
+the least recently used entries are deleted.
+"""
+import argparse
+import hashlib
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+DEFAULT_CACHE_DIR = os.getenv("PCM_CACHE_DIR", "pcm_cache")
+DEFAULT_CACHE_GB = float(os.getenv("PCM_CACHE_GB", "20"))  # 0 disables the cache
+
+
+def file_signature(source):
+    """Stat fields that change when a local file is rewritten or replaced; None for URLs"""
+    if not os.path.isfile(source): return None
+    st = os.stat(source)
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "ino": st.st_ino, "dev": st.st_dev}
+
+
+def source_key(source):
+    """sha1 of the URL, or of a local file's stat signature + sampled content"""
+    h = hashlib.sha1()
+    signature = file_signature(source)
+    if signature:
+        size = signature["size"]
+        h.update("file:{size}:{mtime_ns}:{ino}:{dev}:".format(**signature).encode())
+        sample = 1 << 20
+        with open(source, "rb") as f:
+            for pos in (0, size // 2, max(0, size - sample)):
+                f.seek(pos)
+                h.update(f.read(sample))
+    else:
+        h.update(f"url:{source.strip()}".encode())
+    return h.hexdigest()
+
+
+class PCMCache:
+    """
+    <key>.pcm  : raw s16le samples, read back with np.memmap (no copy until a chunk is used)
+    <key>.json : source, its file signature, sample rate, samples, size, hits, created / last used times
+    """
+
+    def __init__(self, root=DEFAULT_CACHE_DIR, max_disk_gb=DEFAULT_CACHE_GB, sample_rate=16000):
+        self.root = root
+        self.max_disk_bytes = int(max_disk_gb * 1024 ** 3)
+        self.sample_rate = sample_rate
+        self.enabled = max_disk_gb > 0
+        self._lock = threading.Lock()
+        if self.enabled: os.makedirs(root, exist_ok=True)
+
+    def _path(self, key, ext):
+        return os.path.join(self.root, f"{key}.{ext}")
+
+    def _read_meta(self, key):
+        try:
+            with open(self._path(key, "json"), "r") as f: return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_meta(self, key, meta):
+        tmp = self._path(key, "json.tmp")
+        with open(tmp, "w") as f: json.dump(meta, f, indent=4, ensure_ascii=False)
+        os.replace(tmp, self._path(key, "json"))
+
+    # --- LOOKUP ---
+    def load(self, key, source=None):
+        """Memory-mapped int16 PCM of a cached source, or None (also when `source` is a file that changed since)"""
+        if not self.enabled: return None
+        with self._lock:
+            meta = self._read_meta(key)
+            path = self._path(key, "pcm")
+            if not meta or not os.path.exists(path) or meta.get("sample_rate") != self.sample_rate:
+                return None
+            if source is not None and meta.get("file") != file_signature(source):
+                print(f"[CACHE] {source} changed since it was cached, decoding it again")
+                return None
+            meta["hits"] = meta.get("hits", 0) + 1
+            meta["last_used"] = time.time()
+            self._write_meta(key, meta)
+        if meta["samples"] == 0: return np.zeros(0, dtype=np.int16)
+        return np.memmap(path, dtype=np.int16, mode="r")
+
+    # --- STORE ---
+    def store(self, key, source, pcm):
+        """Caches a whole decoded int16 array"""
+        writer = self.writer(key, source)
+        if writer:
+            writer.write(np.ascontiguousarray(pcm, dtype=np.int16).data)
+            writer.commit()
+
+    def writer(self, key, source):
+        """Incremental writer for audio decoded as it streams in (None when the cache is off)"""
+        return CacheWriter(self, key, source) if self.enabled else None
+
+    def _commit(self, key, source, signature, part_path, size):
+        now = time.time()
+        with self._lock:
+            os.replace(part_path, self._path(key, "pcm"))
+            self._write_meta(key, {
+                "source": source, "file": signature, "sample_rate": self.sample_rate, "samples": size // 2,
+                "size": size, "hits": 0, "created": now, "last_used": now,
+            })
+        self.evict()
+
+    # --- EVICTION ---
+    def entries(self):
+        found = []
+        for name in os.listdir(self.root) if os.path.isdir(self.root) else []:
+            if not name.endswith(".json"): continue
+            key = name[:-5]
+            meta = self._read_meta(key)
+            if meta: found.append((key, meta))
+        return found
+
+    def evict(self):
+        """Deletes least recently used entries until the cache fits its disk budget"""
+        with self._lock:
+            entries = sorted(self.entries(), key=lambda e: e[1].get("last_used", 0))
+            total = sum(meta.get("size", 0) for _, meta in entries)
+            for key, meta in entries:
+                if total <= self.max_disk_bytes: break
+                self.remove(key)
+                total -= meta.get("size", 0)
+                print(f"[CACHE] Evicted {meta.get('source')} ({meta.get('size', 0) / 2**20:.0f} MB)")
+
+    def remove(self, key):
+        for ext in ("pcm", "json"):
+            try: os.remove(self._path(key, ext))
+            except OSError: pass
+
+    def stats(self):
+        entries = self.entries()
+        return {
+            "dir": os.path.abspath(self.root),
+            "entries": len(entries),
+            "disk_bytes": sum(meta.get("size", 0) for _, meta in entries),
+            "budget_bytes": self.max_disk_bytes,
+            "audio_seconds": sum(meta.get("samples", 0) for _, meta in entries) / self.sample_rate,
+            "hits": sum(meta.get("hits", 0) for _, meta in entries),
+            "items": sorted(({"key": key, **meta} for key, meta in entries), key=lambda m: -m.get("last_used", 0)),
+        }
+
+
+class CacheWriter:
+    """Appends s16le bytes to <key>.pcm.part; commit() publishes it, abort() throws it away"""
+
+    def __init__(self, cache, key, source):
+        self.cache, self.key, self.source = cache, key, source
+        self.signature = file_signature(source)  # Taken before decoding: a file changing meanwhile won't match it
+        self.part_path = cache._path(key, f"pcm.part{os.getpid()}")
+        self.file = open(self.part_path, "wb")
+        self.size = 0
+
+    def write(self, data):
+        self.size += self.file.write(data)
+
+    def commit(self):
+        self.file.close()
+        self.cache._commit(self.key, self.source, self.signature, self.part_path, self.size)
+
+    def abort(self):
+        self.file.close()
+        try: os.remove(self.part_path)
+        except OSError: pass
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_pcm_cache():
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = PCMCache()
+        return _cache
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Decoded audio cache")
+    parser.add_argument("command", choices=["stats", "clear"])
+    parser.add_argument("--dir", default=DEFAULT_CACHE_DIR)
+    args = parser.parse_args(argv)
+
+    cache = PCMCache(args.dir, max_disk_gb=max(DEFAULT_CACHE_GB, 1e-9))
+    if args.command == "clear":
+        for key, _ in cache.entries(): cache.remove(key)
+        print(f"[CACHE] Cleared {cache.root}")
+        return
+
+    st = cache.stats()
+    print(f"[CACHE] {st['dir']}: {st['entries']} entries, {st['disk_bytes'] / 2**30:.2f} / {st['budget_bytes'] / 2**30:.2f} GB, "
+          f"{st['audio_seconds'] / 3600:.1f} h of audio, {st['hits']} re-runs served from cache")
+    for item in st["items"]:
+        used = time.strftime("%Y-%m-%d %H:%M", time.localtime(item.get("last_used", 0)))
+        print(f"  {item['key'][:12]}  {item['size'] / 2**20:8.1f} MB  {item['samples'] / item['sample_rate'] / 60:7.1f} min  "
+              f"hits {item.get('hits', 0):3d}  last used {used}  {item['source']}")
+
+
+if __name__ == "__main__":
+    main()
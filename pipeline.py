@@ -0,0 +1,224 @@
+import queue
+import threading
+import time
+import traceback
+
+from metrics import get_metrics
+
+
+class ProcessingPipeline:
+    """
+    Runs the AIEngine stages on their own worker threads:
+
+        submit() -> [asr_queue] -> Whisper -> [trans_queue] -> Translation -> [format_queue] -> Gloss/Format -> output_callback
+
+    Each stage is a single thread, so chunks leave the pipeline in the same order they came in.
+    The queues are bounded: when a later stage falls behind, the earlier ones block instead of piling up.
+
+    The translation stage also batches across chunks: after taking one chunk it waits up to
+    `translation_max_wait` seconds for the next ones, until `ai_engine.translation_batch_size`
+    segments are collected, and translates them all in one go.
+
+    With a `stream_callback(kind, record, text)` results arrive in up to three steps:
+        "interim" : quick greedy guess at live audio that isn't a full chunk yet (submit_interim), replaced by the next
+        "partial" : each segment as soon as Whisper decodes it (source + reading)
+        "final"   : the same segment (same record id) with translation and gloss
+    """
+
+    STAGES = ("asr", "trans", "format")
+
+    def __init__(self, ai_engine, output_callback, max_queue_size=4, translation_max_wait=0.1, record_callback=None, asr=None,
+                 stream_callback=None):
+        self.ai_engine = ai_engine
+        self.asr = asr or ai_engine.transcribe_chunk  # Swappable Whisper stage (see offline.OfflineTranscriber)
+        self.output_callback = output_callback      # Gets the formatted text block of each segment
+        self.record_callback = record_callback      # Gets the structured record (see AIEngine.build_records)
+        self.stream_callback = stream_callback      # Gets partial / final / interim blocks (see above)
+        self.translation_max_wait = translation_max_wait
+        self.queues = {name: queue.Queue(maxsize=max_queue_size) for name in self.STAGES}
+
+        self.metrics = get_metrics()
+        self.is_running = True
+        self._in_flight = 0
+        self._submitted = 0
+        self._asr_seconds = 0.0  # Audio submitted but not transcribed yet (queued + being decoded)
+        self._lock = threading.Lock()
+        self._interim = None  # Latest interim audio only: older ones are outdated anyway
+        self._interim_cond = threading.Condition()
+
+        self.threads = [
+            threading.Thread(target=self._stage_loop, args=("asr", self._run_asr, "trans"), daemon=True),
+            threading.Thread(target=self._translation_loop, daemon=True),
+            threading.Thread(target=self._stage_loop, args=("format", self._run_format, None), daemon=True),
+        ]
+        if stream_callback: self.threads.append(threading.Thread(target=self._interim_loop, daemon=True))
+        for t in self.threads: t.start()
+
+    # --- PUBLIC API ---
+    def submit(self, audio_chunk, timeout=None):
+        """Queues a chunk for transcription. Blocks while the ASR queue is full."""
+        seconds = self._chunk_seconds(audio_chunk)
+        with self._lock:
+            self._in_flight += 1
+            self._submitted += 1
+            self._asr_seconds += seconds
+        try:
+            self.queues["asr"].put(audio_chunk, timeout=timeout)
+        except queue.Full:
+            with self._lock: self._asr_seconds -= seconds
+            self._finish_item()
+            raise
+
+    def submit_interim(self, audio_chunk):
+        """Live audio of the chunk still being captured; never blocks, replaces any pending one"""
+        if not self.stream_callback: return
+        with self._interim_cond:
+            self._interim = (audio_chunk, self._submitted)
+            self._interim_cond.notify()
+
+    def queued_seconds(self):
+        """Seconds of submitted audio Whisper hasn't finished yet: part of a live source's backlog (see AudioCapture)"""
+        with self._lock: return max(0.0, self._asr_seconds)
+
+    def queue_depths(self):
+        depths = {name: q.qsize() for name, q in self.queues.items()}
+        for name, depth in depths.items():
+            self.metrics.set("queue_depth", depth, queue=name)
+        return depths
+
+    def is_idle(self):
+        with self._lock: return self._in_flight == 0
+
+    def stop(self):
+        self.is_running = False
+        with self._interim_cond: self._interim_cond.notify_all()
+        for q in self.queues.values():
+            while True:
+                try: q.get_nowait()
+                except queue.Empty: break
+        with self._lock: self._asr_seconds = 0.0
+
+    # --- STAGES ---
+    def _run_asr(self, audio_chunk):
+        enqueued_at = getattr(audio_chunk, 'enqueued_at', None)
+        if enqueued_at is not None:
+            self.metrics.observe("stage_seconds", time.monotonic() - enqueued_at, stage="queue_wait")
+        try:
+            return self._transcribe(audio_chunk)
+        finally:
+            with self._lock: self._asr_seconds -= self._chunk_seconds(audio_chunk)
+
+    def _transcribe(self, audio_chunk):
+        if not self.stream_callback or self.asr != self.ai_engine.transcribe_chunk:
+            return self.asr(audio_chunk)
+
+        # Show each segment as soon as it is decoded, translation follows in the "final" block
+        segments = []
+        for seg in self.ai_engine.iter_segments(audio_chunk):
+            segments.append(seg)
+            record = self.ai_engine.partial_record(seg)
+            self.stream_callback("partial", record, self.ai_engine.format_record(record))
+        return segments
+
+    def _run_format(self, segments):
+        for record in self.ai_engine.build_records(segments):
+            if self.record_callback: self.record_callback(record)
+            text = self.ai_engine.format_record(record)
+            if self.output_callback: self.output_callback(text)
+            if self.stream_callback: self.stream_callback("final", record, text)
+        return None
+
+    def _interim_loop(self):
+        engine = self.ai_engine
+        while self.is_running:
+            with self._interim_cond:
+                self._interim_cond.wait_for(lambda: self._interim or not self.is_running, timeout=0.5)
+                item, self._interim = self._interim, None
+            if item is None: continue
+
+            audio_chunk, submitted = item
+            # Skip it while real chunks are waiting or the quality controller is shedding work
+            if not self.queues["asr"].empty() or engine.quality.level > 0: continue
+            try:
+                record = engine.transcribe_interim(audio_chunk)
+            except Exception as e:
+                self._report_error("interim", e)
+                continue
+            # A chunk submitted meanwhile covers this audio: its partial blocks are already on their way
+            if record and submitted == self._submitted:
+                self.stream_callback("interim", record, engine.format_record(record))
+
+    def _stage_loop(self, name, work, next_stage):
+        in_q = self.queues[name]
+        while self.is_running:
+            try:
+                item = in_q.get(timeout=0.5)
+            except queue.Empty:
+                continue
+
+            try:
+                result = work(item)
+            except Exception as e:
+                self._report_error(name, e)
+                self._finish_item()
+                continue
+
+            if next_stage is None:
+                self._finish_item()
+            elif not self._put(self.queues[next_stage], result):
+                self._finish_item()
+
+    def _translation_loop(self):
+        in_q = self.queues["trans"]
+        while self.is_running:
+            try:
+                batch = [in_q.get(timeout=0.5)]
+            except queue.Empty:
+                continue
+
+            # Collect more chunks until the batch is full or the deadline passes
+            count = len(batch[0])
+            deadline = time.monotonic() + self.translation_max_wait
+            while count < self.ai_engine.translation_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0: break
+                try:
+                    segments = in_q.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                batch.append(segments)
+                count += len(segments)
+
+            try:
+                self.ai_engine.translate_segments([seg for segments in batch for seg in segments])
+            except Exception as e:
+                self._report_error("trans", e)
+                for _ in batch: self._finish_item()
+                continue
+
+            # translate_segments fills the dicts in place, so each chunk goes on as its own list
+            for segments in batch:
+                if not self._put(self.queues["format"], segments):
+                    self._finish_item()
+
+    def _report_error(self, stage, error):
+        self.metrics.inc("errors_total", where=stage)
+        print(f"[PIPELINE] {stage} stage error: {error}")
+        traceback.print_exc()
+
+    def _put(self, q, item):
+        # Block on backpressure, but give up if the pipeline is being torn down
+        while self.is_running:
+            try:
+                q.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    @staticmethod
+    def _chunk_seconds(audio_chunk):
+        return len(getattr(audio_chunk, 'audio', audio_chunk)) / 16000.0
+
+    def _finish_item(self):
+        with self._lock: self._in_flight = max(0, self._in_flight - 1)
@@ -0,0 +1,135 @@
+"""
+Keeps live transcription at real time by trading quality for speed, one step at a time:
+
+    0 full            beam 5, gloss layer on
+    1 beam2           beam 2
+    2 greedy          beam 1
+    3 no gloss        beam 1, per-word gloss skipped
+    4 small whisper   beam 1, no gloss, QUALITY_FAST_WHISPER instead of the main model (loaded ahead, kept warm)
+
+After every chunk the controller looks at Whisper's real-time factor (processing time / audio time,
+smoothed) and the audio backlog. It steps down after `down_after` slow chunks in a row and back up only
+after `up_after` fast ones and `min_dwell` seconds at the current level, when the estimated RTF of the
+better level still leaves headroom. Files, VODs and QUALITY_MODE=fixed stay at full quality.
+"""
+import os
+import threading
+import time
+from collections import namedtuple
+
+from metrics import get_metrics
+
+QUALITY_MODE = os.getenv("QUALITY_MODE", "adaptive")  # "adaptive" or "fixed"
+QUALITY_FAST_WHISPER = os.getenv("QUALITY_FAST_WHISPER", "small")
+MODES = ["adaptive", "fixed"]
+
+# cost: rough processing time relative to level 0, used to predict the RTF of the next level
+QualityLevel = namedtuple("QualityLevel", ["name", "beam_size", "gloss", "fast_whisper", "cost"])
+LEVELS = [
+    QualityLevel("full", 5, True, False, 1.0),
+    QualityLevel("beam2", 2, True, False, 0.75),
+    QualityLevel("greedy", 1, True, False, 0.6),
+    QualityLevel("no gloss", 1, False, False, 0.5),
+    QualityLevel("small whisper", 1, False, True, 0.25),
+]
+
+
+class QualityController:
+    def __init__(self, engine, mode=QUALITY_MODE, fast_whisper_loader=None,
+                 rtf_high=0.9, rtf_target=0.7, lag_high=10.0, lag_low=3.0,
+                 down_after=2, up_after=6, min_dwell=20.0, smoothing=0.3):
+        self.engine = engine
+        self.mode = mode
+        self.fast_whisper_loader = fast_whisper_loader  # None: level 4 is not available (e.g. injected models)
+        self.rtf_high, self.rtf_target = rtf_high, rtf_target
+        self.lag_high, self.lag_low = lag_high, lag_low
+        self.down_after, self.up_after = down_after, up_after
+        self.min_dwell = min_dwell
+        self.smoothing = smoothing
+
+        self.metrics = get_metrics()
+        self.level = 0
+        self.rtf = None
+        self.backlog = 0.0
+        self.live = False
+        self._slow = self._fast = 0
+        self._switched_at = time.monotonic()
+        self.main_whisper = engine.whisper
+        self.fast_whisper = None
+        self._warming = None
+
+    @property
+    def max_level(self):
+        return len(LEVELS) - 1 if self.fast_whisper_loader else len(LEVELS) - 2
+
+    # --- INPUTS ---
+    def observe_backlog(self, seconds, live):
+        """Audio waiting to be transcribed; called by the consumer before each submit"""
+        self.backlog = seconds
+        self.live = live
+
+    def observe_chunk(self, audio_seconds, processing_seconds):
+        """Called by AIEngine.transcribe_chunk after each chunk"""
+        if audio_seconds <= 0: return
+        rtf = processing_seconds / audio_seconds
+        self.rtf = rtf if self.rtf is None else self.rtf + self.smoothing * (rtf - self.rtf)
+        self.metrics.set("rtf", round(self.rtf, 3), stage="whisper")
+        if self.mode == "adaptive" and self.live: self._decide()
+
+    # --- DECISION ---
+    def _decide(self):
+        level = LEVELS[self.level]
+        slow = self.rtf > self.rtf_high or self.backlog > self.lag_high
+        # Would the next better level still be comfortably faster than real time?
+        fast = (self.level > 0 and self.backlog < self.lag_low
+                and self.rtf * LEVELS[self.level - 1].cost / level.cost < self.rtf_target)
+        self._slow = self._slow + 1 if slow else 0
+        self._fast = self._fast + 1 if fast else 0
+
+        if self._slow >= self.down_after and self.level < self.max_level:
+            target = self.level + 1
+            if LEVELS[target].fast_whisper and self.fast_whisper is None:
+                self._warm_fast_whisper()   # switches once it is loaded
+                return
+            self._switch(target, "behind")
+        elif self._fast >= self.up_after and time.monotonic() - self._switched_at >= self.min_dwell:
+            self._switch(self.level - 1, "headroom")
+
+        # The step after this one needs the small model: load it now so that switch is instant
+        if self.level + 1 <= self.max_level and LEVELS[self.level + 1].fast_whisper: self._warm_fast_whisper()
+
+    def _switch(self, target, reason):
+        old, new = LEVELS[self.level], LEVELS[target]
+        print(f"[QUALITY] {'Down' if target > self.level else 'Up'} to level {target} ({new.name}), {reason}: "
+              f"RTF {self.rtf:.2f}, backlog {self.backlog:.1f}s")
+        self.metrics.inc("quality_switches_total", direction="down" if target > self.level else "up")
+        self.metrics.set("quality_level", target)
+        # Until new chunks come in, assume the RTF scales with the level's cost
+        self.rtf *= new.cost / old.cost
+        self.level = target
+        self._slow = self._fast = 0
+        self._switched_at = time.monotonic()
+        self.apply(new)
+
+    def apply(self, level):
+        engine = self.engine
+        engine.beam_size = level.beam_size
+        engine.gloss_allowed = level.gloss
+        engine.whisper = self.fast_whisper if level.fast_whisper and self.fast_whisper is not None else self.main_whisper
+
+    def _warm_fast_whisper(self):
+        if self.fast_whisper is not None or (self._warming and self._warming.is_alive()): return
+
+        def load():
+            try:
+                self.fast_whisper = self.fast_whisper_loader()
+                print(f"[QUALITY] Fallback Whisper ({QUALITY_FAST_WHISPER}) loaded and kept warm.")
+            except Exception as e:
+                print(f"[QUALITY] Could not load the fallback Whisper ({e}); staying on the main model.")
+                self.fast_whisper_loader = None
+
+        self._warming = threading.Thread(target=load, daemon=True)
+        self._warming.start()
+
+    def describe(self):
+        return LEVELS[self.level].name
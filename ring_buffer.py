@@ -0,0 +1,117 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+
+class PCMRing:
+    """
+    Preallocated float32 buffer that captured audio is written into, so a long session
+    doesn't allocate new arrays for every read.
+
+        slot = ring.reserve(n)                            # waits while the ring is full
+        audio = ring.read_block(process.stdout, n, slot)  # readinto + int16 -> float32 in place, a view
+        ...                                               # the view goes into an AudioChunk
+        ring.release(audio)                               # once the audio was copied out (see AudioQueue)
+
+    Each reservation is one contiguous slot (a block that doesn't fit at the end starts over at 0),
+    so every chunk is a plain numpy view. Slots can be released in any order; space is only
+    reused once everything older is released too. When the ring is full reserve() waits.
+    """
+
+    def __init__(self, capacity_samples, block_samples):
+        self.capacity = capacity_samples
+        self.data = np.zeros(capacity_samples, dtype=np.float32)
+        # Reusable staging buffer for readinto(), seen as int16 through `pcm16`
+        self.raw = bytearray(block_samples * 2)
+        self.pcm16 = np.frombuffer(self.raw, dtype=np.int16)
+
+        self._cond = threading.Condition()
+        self._slots = OrderedDict()   # start -> [end, released], oldest first
+        self._tail = 0                # next write position
+
+    # --- RESERVATION ---
+    def reserve(self, n, timeout=None):
+        """View of `n` free samples, or None if none became free within `timeout` seconds"""
+        with self._cond:
+            start = self._find_space(n)
+            if start is None and timeout != 0:
+                self._cond.wait_for(lambda: self._find_space(n) is not None, timeout)
+                start = self._find_space(n)
+            if start is None: return None
+            self._slots[start] = [start + n, False]
+            self._tail = start + n
+            return self.data[start:start + n]
+
+    def _find_space(self, n):
+        if n > self.capacity: raise ValueError(f"Block of {n} samples doesn't fit a ring of {self.capacity}")
+        if not self._slots: return 0
+        head = next(iter(self._slots))
+        if self._tail > head:
+            if self._tail + n <= self.capacity: return self._tail
+            return 0 if n <= head else None
+        # tail == head only when the ring is completely full
+        return self._tail if self._tail + n <= head else None
+
+    def shrink(self, view, n):
+        """Gives back the unused end of the newest slot (short read)"""
+        with self._cond:
+            start = self.offset(view)
+            if start is None or next(reversed(self._slots)) != start: return view
+            self._slots[start][0] = self._tail = start + n
+            self._cond.notify_all()
+            return self.data[start:start + n]
+
+    def release(self, view):
+        """Marks the slot behind `view` free. Arrays that don't live in the ring are ignored."""
+        with self._cond:
+            start = self.offset(view)
+            if start is None or start not in self._slots: return
+            self._slots[start][1] = True
+            while self._slots and next(iter(self._slots.values()))[1]:
+                self._slots.popitem(last=False)
+            self._cond.notify_all()
+
+    def offset(self, view):
+        """Start index of `view` inside the ring, None if it is not a ring slot"""
+        if not isinstance(view, np.ndarray) or view.dtype != np.float32 or view.base is not self.data: return None
+        return (view.ctypes.data - self.data.ctypes.data) // 4
+
+    def used_samples(self):
+        with self._cond:
+            return sum(end - start for start, (end, _) in self._slots.items())
+
+    # --- CAPTURE ---
+    def read_block(self, stream, n, slot):
+        """
+        Fills `slot` (from reserve(n)) with up to `n` samples of s16le read from `stream`.
+        Returns the filled view, or None at end of stream (the slot is then released).
+        """
+        view = memoryview(self.raw)[:n * 2]
+        got = 0
+        while got < n * 2:
+            k = stream.readinto(view[got:])
+            if not k: break
+            got += k
+        del view
+
+        samples = got // 2
+        if samples == 0:
+            self.release(slot)
+            return None
+        self.convert(self.pcm16[:samples], slot)
+        return slot if samples == n else self.shrink(slot, samples)
+
+    @staticmethod
+    def convert(pcm16, slot):
+        """int16 -> float32 straight into the ring, then scaled in place (a mixed-type ufunc would
+        allocate float64 cast buffers on every call). Returns the filled part of `slot`."""
+        out = slot[:len(pcm16)]
+        out[:] = pcm16
+        out *= np.float32(1.0 / 32768.0)
+        return out
+
+    def write(self, samples, slot):
+        """Copies float32 samples (e.g. a mic block) into a reserved slot"""
+        np.copyto(slot, samples.reshape(-1)[:len(slot)], casting='unsafe')
+        return slot
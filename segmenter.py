@@ -0,0 +1,132 @@
+import numpy as np
+from collections import deque, namedtuple
+
+# One unit of work for the AI engine.
+#   audio   : float32 mono PCM at the capture sample rate
+#   start   : position of audio[0] in the stream, in seconds (used for the timestamps)
+#   overlap : seconds at the start of `audio` that were already part of the previous chunk
+#   enqueued_at : time.monotonic() when AudioCapture queued it (for the queue-wait metric)
+#   skipped : seconds of live audio dropped right before this chunk to catch up (0 = none)
+AudioChunk = namedtuple("AudioChunk", ["audio", "start", "overlap", "enqueued_at", "skipped"], defaults=(None, 0.0))
+
+
+class PauseSegmenter:
+    """
+    Cuts a PCM stream into utterance-sized chunks at detected pauses (energy VAD).
+
+    - A cut is made in the middle of a pause once the segment is at least `min_segment_seconds` long.
+    - If nobody pauses, the segment is force-cut at `max_segment_seconds`, and the next one starts
+      `overlap_seconds` earlier so the word sitting on the cut is heard whole at least once.
+    - Segments that contain no speech at all are dropped (their time still counts for the timestamps).
+    """
+
+    def __init__(self, sample_rate=16000, min_segment_seconds=1.5, max_segment_seconds=8.0,
+                 overlap_seconds=0.5, silence_seconds=0.35, frame_ms=30, energy_ratio=2.5):
+        self.sample_rate = sample_rate
+        self.frame = int(sample_rate * frame_ms / 1000)
+        self.min_samples = int(sample_rate * min_segment_seconds)
+        self.max_samples = max(int(sample_rate * max_segment_seconds), self.min_samples + self.frame)
+        self.overlap_samples = min(int(sample_rate * overlap_seconds), self.max_samples // 2)
+        self.silence_frames = max(1, int(silence_seconds * 1000 / frame_ms))
+        self.energy_ratio = energy_ratio
+        # Noise floor = quietest frame seen over a window longer than any segment,
+        # kept as per-second minima so the lookup stays cheap
+        self.floor_block_frames = max(1, 1000 // frame_ms)
+        self.floor_window_blocks = int(max(10.0, 2 * max_segment_seconds))
+        self.min_threshold = 0.003  # ~ -50 dBFS, anything below is silence regardless of the noise floor
+        self.reset()
+
+    def reset(self):
+        # Preallocated: `buffer` is a view of the first `len(buffer)` samples of `_store`
+        self._store = np.empty(self.max_samples + self.sample_rate, dtype=np.float32)
+        self.buffer = self._store[:0]
+        self.buffer_offset = 0      # Stream position (samples) of buffer[0]
+        self.scanned = 0            # Samples of the buffer already run through the VAD
+        self.silence_run = 0
+        self.voiced = False
+        self.carried_overlap = 0    # Samples at the start of the buffer repeated from the last chunk
+        self.floor_blocks = deque(maxlen=self.floor_window_blocks)
+        self.block_min = None
+        self.block_frames = 0
+
+    def feed(self, samples):
+        """Adds PCM to the segmenter and returns the AudioChunks that are complete"""
+        length = len(self.buffer)
+        if length + len(samples) > len(self._store):
+            grown = np.empty(length + len(samples) + self.sample_rate, dtype=np.float32)
+            grown[:length] = self.buffer
+            self._store = grown
+        self._store[length:length + len(samples)] = samples.reshape(-1)
+        self.buffer = self._store[:length + len(samples)]
+        chunks = []
+
+        while self.scanned + self.frame <= len(self.buffer):
+            frame = self.buffer[self.scanned:self.scanned + self.frame]
+            self.scanned += self.frame
+
+            if self._is_silent(frame):
+                self.silence_run += 1
+            else:
+                self.silence_run = 0
+                self.voiced = True
+
+            pos = self.scanned
+            if self.voiced and self.silence_run >= self.silence_frames and pos >= self.min_samples:
+                # Cut in the middle of the pause, no overlap needed
+                cut = pos - (self.silence_run * self.frame) // 2
+                chunks.extend(self._cut(cut, 0))
+            elif pos >= self.max_samples:
+                chunks.extend(self._cut(pos, self.overlap_samples))
+
+        return chunks
+
+    def flush(self):
+        """Emits whatever is left at the end of the stream"""
+        chunks = []
+        # Only the overlap carried from the last cut left: already sent with that chunk
+        if len(self.buffer) > self.carried_overlap and self.voiced:
+            chunks.append(self._make_chunk(self.buffer))
+        self.buffer_offset += len(self.buffer)
+        self.buffer = self._store[:0]
+        self.scanned = 0
+        self.carried_overlap = 0
+        self.voiced = False
+        return chunks
+
+    def _cut(self, cut, overlap):
+        chunks = []
+        if self.voiced:
+            chunks.append(self._make_chunk(self.buffer[:cut]))
+
+        keep_from = cut - overlap if self.voiced else cut
+        rest = len(self.buffer) - keep_from
+        self._store[:rest] = self._store[keep_from:keep_from + rest]
+        self.buffer = self._store[:rest]
+        self.buffer_offset += keep_from
+        self.scanned = max(0, self.scanned - keep_from)
+        self.carried_overlap = cut - keep_from
+        # Whatever is carried over was speech (forced cut) or is still unscanned
+        self.voiced = self.carried_overlap > 0
+        self.silence_run = 0
+        return chunks
+
+    def _make_chunk(self, audio):
+        return AudioChunk(
+            audio=audio.copy(),
+            start=self.buffer_offset / self.sample_rate,
+            overlap=self.carried_overlap / self.sample_rate,
+        )
+
+    def _is_silent(self, frame):
+        rms = float(np.sqrt(np.dot(frame, frame) / len(frame)))
+
+        self.block_min = rms if self.block_min is None else min(self.block_min, rms)
+        self.block_frames += 1
+        noise_floor = min(self.floor_blocks) if self.floor_blocks else self.block_min
+        noise_floor = min(noise_floor, self.block_min)
+        if self.block_frames >= self.floor_block_frames:
+            self.floor_blocks.append(self.block_min)
+            self.block_min = None
+            self.block_frames = 0
+
+        return rms < max(noise_floor * self.energy_ratio, self.min_threshold)
@@ -0,0 +1,146 @@
+"""
+Deterministic stand-ins for WhisperModel / MarianMTModel / MarianTokenizer.
+
+They plug into AIEngine(whisper=..., translator=..., tokenizer=...) so the pipeline, benchmarks and
+the headless tools can run offline on CPU without downloading anything. Outputs depend only on the
+input, and an optional per-unit delay simulates model cost.
+"""
+import time
+from collections import namedtuple
+from types import SimpleNamespace
+
+import numpy as np
+import torch
+
+StubSegment = namedtuple("StubSegment", ["start", "end", "text"])
+StubInfo = namedtuple("StubInfo", ["language", "language_probability", "duration"])
+
+STUB_SENTENCES = [
+    "皆さんこんにちは",
+    "今日も配信に来てくれてありがとうございます",
+    "週間の次は一年行きましょう",
+    "今日はゲームをやっていきたいと思います",
+    "ちょっと待って",
+    "それではまた明日会いましょう",
+]
+
+
+class StubWhisperModel:
+    """One segment per ~2 s block of audio that isn't silent; text picked from the block's energy"""
+
+    def __init__(self, language="ja", seconds_per_audio_second=0.0, sample_rate=16000):
+        self.language = language
+        self.cost = seconds_per_audio_second
+        self.sample_rate = sample_rate
+
+    def transcribe(self, audio, language=None, beam_size=5, vad_filter=True, **kwargs):
+        duration = len(audio) / self.sample_rate
+        if self.cost: time.sleep(duration * self.cost)
+        return iter(self.decode(audio)), StubInfo(language or self.language, 1.0, duration)
+
+    def decode(self, audio):
+        block = 2 * self.sample_rate
+        segments = []
+        for i in range(0, len(audio), block):
+            part = audio[i:i + block]
+            rms = float(np.sqrt(np.mean(np.square(part)))) if len(part) else 0.0
+            if rms < 0.005: continue
+            text = STUB_SENTENCES[int(rms * 1000) % len(STUB_SENTENCES)]
+            segments.append(StubSegment(i / self.sample_rate, min(i + block, len(audio)) / self.sample_rate, text))
+        return segments
+
+
+class StubBatch(dict):
+    """What the tokenizer returns: unpacks into generate(**inputs) and supports .to(device)"""
+    def to(self, device):
+        return self
+
+
+class StubTokenizer:
+    """One token per character (id = code point + 3); 0 is padding and the decoder start, 1 </s>, 2 a target language token"""
+
+    pad_token_id = 0
+    eos_token_id = 1
+
+    def __call__(self, texts=None, return_tensors=None, padding=True, text_target=None, add_special_tokens=True, **kwargs):
+        if text_target is not None:
+            return {"input_ids": self.encode(text_target)}
+        if isinstance(texts, str): texts = [texts]
+        rows = [self.encode(t) or [self.pad_token_id] for t in texts]
+        width = max(len(r) for r in rows)
+        input_ids = torch.tensor([r + [self.pad_token_id] * (width - len(r)) for r in rows], dtype=torch.long)
+        return StubBatch(input_ids=input_ids, attention_mask=(input_ids != self.pad_token_id).long())
+
+    def encode(self, text):
+        return [ord(c) + 3 for c in text]
+
+    def convert_tokens_to_ids(self, token):
+        return 2
+
+    def batch_decode(self, generated, skip_special_tokens=True):
+        return [self.decode(row) for row in generated]
+
+    def decode(self, ids, skip_special_tokens=True):
+        return "".join(chr(int(i) - 3) for i in ids if int(i) >= 3)
+
+
+class StubTranslator:
+    """
+    'Translates' each space-separated part of the input by tagging it; costs `seconds_per_token` per
+    generated character, per batch. A forced decoder prefix that matches the start of the translation
+    is continued, like a real model handed the translation of the earlier context.
+    """
+
+    config = SimpleNamespace(decoder_start_token_id=0)
+
+    def __init__(self, seconds_per_call=0.0, seconds_per_token=0.0):
+        self.per_call = seconds_per_call
+        self.per_token = seconds_per_token
+        self.tokenizer = StubTokenizer()
+
+    def generate(self, input_ids, attention_mask=None, decoder_input_ids=None, forced_bos_token_id=None, max_length=200, **kwargs):
+        tok = self.tokenizer
+        if decoder_input_ids is None:
+            start = [self.config.decoder_start_token_id] + ([forced_bos_token_id] if forced_bos_token_id is not None else [])
+            decoder_input_ids = [start] * len(input_ids)
+        rows = []
+        for source, forced in zip(input_ids, decoder_input_ids):
+            forced = [int(i) for i in forced]
+            full = " ".join(f"<en:{part}>" for part in tok.decode(source).split(" "))
+            done = tok.decode(forced)
+            rest = full[len(done):] if full.startswith(done) else full
+            rows.append(forced + tok.encode(rest)[:max(0, max_length - len(forced))])
+
+        if self.per_call or self.per_token:
+            # A padded batch decodes as many steps as its longest item
+            longest = max((len(r) - len(f) for r, f in zip(rows, decoder_input_ids)), default=0)
+            time.sleep(self.per_call + self.per_token * longest)
+        width = max(len(r) for r in rows)
+        return torch.tensor([r + [tok.pad_token_id] * (width - len(r)) for r in rows], dtype=torch.long)
+
+
+class StubBatchedPipeline:
+    """
+    Stand-in for faster-whisper's BatchedInferencePipeline with clip_timestamps (in seconds, as faster-whisper
+    reads them): each clip is decoded on its own, and a batch costs as much as its longest clip (what batching
+    buys on a GPU). Segment times come back in seconds of the whole audio, rounded to the millisecond.
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self.calls = []  # Clips per transcribe() call
+
+    def transcribe(self, audio, language=None, batch_size=8, clip_timestamps=None, beam_size=5, **kwargs):
+        sr = self.model.sample_rate
+        clips = clip_timestamps or [{"start": 0.0, "end": len(audio) / sr}]
+        self.calls.append(len(clips))
+        segments = []
+        for b in range(0, len(clips), batch_size):
+            batch = clips[b:b + batch_size]
+            if self.model.cost: time.sleep(self.model.cost * max(c["end"] - c["start"] for c in batch))
+            for clip in batch:
+                start, end = int(clip["start"] * sr), int(clip["end"] * sr)
+                offset = start / sr
+                segments += [StubSegment(round(offset + s.start, 3), round(offset + s.end, 3), s.text)
+                             for s in self.model.decode(audio[start:end])]
+        return iter(segments), StubInfo(language or self.model.language, 1.0, len(audio) / sr)
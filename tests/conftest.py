@@ -0,0 +1,57 @@
+import os
+import stat
+import sys
+import textwrap
+
+import pytest
+
+# The modules live flat in the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Stand-ins for yt-dlp and ffmpeg that treat every "media file" as raw s16le PCM. They print in
+# small pieces with a short pause, like a remote source trickling in, so the code driving the real
+# tools can be checked without network access or the tools installed.
+FAKE_YTDLP = r'''
+import os, shutil, sys, time
+args = sys.argv[1:]
+url = args[-1]
+out = args[args.index("-o") + 1]
+if out == "-":
+    if os.getenv("FAKE_YTDLP_STREAM_FAIL"): sys.exit(1)
+    with open(url, "rb") as f:
+        while True:
+            piece = f.read(16000)
+            if not piece: break
+            sys.stdout.buffer.write(piece)
+            sys.stdout.buffer.flush()
+            time.sleep(float(os.getenv("FAKE_TOOL_DELAY", "0.05")))
+else:
+    print("[download] 100% of fake media")
+    shutil.copy(url, out.replace("%(ext)s", "wav"))
+'''
+
+FAKE_FFMPEG = r'''
+import os, sys, time
+args = sys.argv[1:]
+src = args[args.index("-i") + 1]
+f = sys.stdin.buffer if src == "pipe:0" else open(src, "rb")
+while True:
+    piece = f.read(16000)
+    if not piece: break
+    sys.stdout.buffer.write(piece)
+    sys.stdout.buffer.flush()
+    if src != "pipe:0": time.sleep(float(os.getenv("FAKE_TOOL_DELAY", "0.05")))
+'''
+
+
+@pytest.fixture
+def fake_tools(tmp_path, monkeypatch):
+    """Puts the fake yt-dlp / ffmpeg first on PATH; returns the directory they are in"""
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    for name, body in (("yt-dlp", FAKE_YTDLP), ("ffmpeg", FAKE_FFMPEG)):
+        path = bin_dir / name
+        path.write_text(f"#!{sys.executable}\n" + textwrap.dedent(body))
+        path.chmod(path.stat().st_mode | stat.S_IEXEC)
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+    return bin_dir
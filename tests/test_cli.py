@@ -0,0 +1,16 @@
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("pykakasi")
+import cli
+
+
+def test_missing_fts5_does_not_stop_a_run(monkeypatch, capsys):
+    def unavailable():
+        raise RuntimeError("no such module: fts5")
+
+    monkeypatch.setattr(cli, "get_transcript_store", unavailable)
+    assert cli.open_store(SimpleNamespace(no_store=False)) is None
+    assert "Transcript store unavailable (no such module: fts5)" in capsys.readouterr().out
+    assert cli.open_store(SimpleNamespace(no_store=True)) is None
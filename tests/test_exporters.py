@@ -0,0 +1,51 @@
+import json
+
+from exporters import TranscriptWriter, _timestamp
+
+
+def record(start, end, source, translation="", **extra):
+    return {"start": start, "end": end, "lang": "ja", "source": source, "reading": "", "tokens": [],
+            "translation": translation, **extra}
+
+
+def test_timestamps():
+    assert _timestamp(0, ",") == "00:00:00,000"
+    assert _timestamp(3725.5, ",") == "01:02:05,500"
+    assert _timestamp(3725.5, ".") == "01:02:05.500"
+    assert _timestamp(36000.0, ".") == "10:00:00.000"
+    # Milliseconds are rounded, carrying into the seconds
+    assert _timestamp(1.2344, ",") == "00:00:01,234"
+    assert _timestamp(1.2346, ",") == "00:00:01,235"
+    assert _timestamp(59.9996, ",") == "00:01:00,000"
+
+
+def written(tmp_path, *records):
+    writer = TranscriptWriter(str(tmp_path / "out" / "talk"))
+    for r in records: writer.write(r)
+    writer.close()
+    return {fmt: (tmp_path / "out" / f"talk.{fmt}").read_text(encoding="utf-8") for fmt in writer.FORMATS}
+
+
+def test_srt_and_vtt_cues(tmp_path):
+    out = written(tmp_path, record(3600.0, 3602.25, "今日は", "Today"), record(3602.5, 3602.6, "はい"))
+    assert out["srt"] == ("1\n01:00:00,000 --> 01:00:02,250\n今日は\nToday\n\n"
+                          # Too-short cues are stretched to 0.5 s
+                          "2\n01:00:02,500 --> 01:00:03,000\nはい\n\n")
+    assert out["vtt"] == ("WEBVTT\n\n01:00:00.000 --> 01:00:02.250\n今日は\nToday\n\n"
+                          "01:00:02.500 --> 01:00:03.000\nはい\n\n")
+
+
+def test_cue_text_is_escaped(tmp_path):
+    out = written(tmp_path, record(1.0, 2.0, "A <b> & C", "line one\n\nline two"))
+    # A blank line would end the cue: collapsed in both formats
+    assert "1\n00:00:01,000 --> 00:00:02,000\nA <b> & C\nline one line two\n\n" in out["srt"]
+    assert "00:00:01.000 --> 00:00:02.000\nA &lt;b&gt; &amp; C\nline one line two\n\n" in out["vtt"]
+
+
+def test_jsonl_keeps_the_raw_record(tmp_path):
+    tokens = [{"orig": "今日", "hira": "きょう", "gloss": "today"}]
+    out = written(tmp_path, record(1.23456, 2.0, 'say "<hi>"', "x\ny", tokens=tokens))
+    row = json.loads(out["jsonl"])
+    assert row == {"start": 1.235, "end": 2.0, "lang": "ja", "source": 'say "<hi>"', "reading": "",
+                   "gloss": tokens, "translation": "x\ny"}
+    assert "今日" in out["jsonl"]  # Not \\u-escaped
@@ -0,0 +1,61 @@
+import gzip
+
+import pytest
+
+from gloss_dictionary import GlossDictionary
+
+TSV = """# word\treading\tgloss
+行く\tいく\tto go
+行き\tいき\tgoing
+行きま\t\tnot a real word
+今日\tきょう\ttoday
+ちょっと\t\ta little
+は\t\ttopic marker
+"""
+
+JMDICT = """<?xml version="1.0" encoding="UTF-8"?>
+<JMdict>
+<entry><k_ele><keb>明日</keb></k_ele><r_ele><reb>あした</reb></r_ele>
+<sense><gloss>tomorrow</gloss><gloss xml:lang="ger">morgen</gloss></sense></entry>
+<entry><r_ele><reb>ゲーム</reb></r_ele><sense><gloss xml:lang="ger">Spiel</gloss></sense></entry>
+</JMdict>
+"""
+
+
+@pytest.fixture
+def tsv(tmp_path):
+    path = tmp_path / "dict.tsv"
+    path.write_text(TSV, encoding="utf-8")
+    return GlossDictionary(str(path))
+
+
+def test_exact_match_by_word_or_reading(tsv):
+    assert tsv.lookup("今日") == "today"
+    assert tsv.lookup("きょう") == "today"
+    assert tsv.lookup("京", reading="きょう") == "today"
+
+
+def test_longest_prefix_wins(tsv):
+    # 行きましょう: 行きま, 行き and 行 are all candidates, the longest known one is used
+    assert tsv.lookup("行きましょう") == "not a real word"
+    assert tsv.lookup("行きたい") == "going"
+
+
+def test_no_match(tsv):
+    assert tsv.lookup("配信") is None
+    assert tsv.lookup("") is None
+    # A lone kana prefix isn't used (は in はじめ would be a wrong particle match)
+    assert tsv.lookup("はじめ") is None
+
+
+def test_missing_file_knows_nothing(tmp_path):
+    assert GlossDictionary(str(tmp_path / "missing.gz")).lookup("今日") is None
+
+
+def test_jmdict_picks_the_target_language(tmp_path):
+    path = tmp_path / "JMdict.gz"
+    with gzip.open(path, "wt", encoding="utf-8") as f: f.write(JMDICT)
+    english, german = GlossDictionary(str(path), "en"), GlossDictionary(str(path), "de")
+    assert english.lookup("明日") == english.lookup("あした") == "tomorrow"
+    assert english.lookup("ゲーム") is None
+    assert (german.lookup("明日"), german.lookup("ゲーム")) == ("morgen", "Spiel")
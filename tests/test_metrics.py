@@ -0,0 +1,38 @@
+import re
+
+from metrics import PREFIX, Metrics
+
+# One sample line of the text format: name, optional {label="value",...} with escaped values, then the value
+SAMPLE = re.compile(r'^[a-zA-Z_:][a-zA-Z0-9_:]*(\{([a-zA-Z_][a-zA-Z0-9_]*="([^"\\\n]|\\[\\"n])*",?)*\})? \S+$')
+
+
+def test_every_family_has_a_type_line():
+    m = Metrics()
+    m.observe("stage_seconds", 0.5, stage="whisper")
+    m.observe("stage_seconds", 1.5, stage="whisper")
+    m.set("queue_depth", 3, queue="audio")
+    m.inc("errors_total", where="asr")
+    text = m.prometheus_text()
+
+    assert f"# TYPE {PREFIX}stage_seconds summary" in text
+    assert f"# TYPE {PREFIX}stage_seconds_max gauge" in text
+    assert f"# TYPE {PREFIX}queue_depth gauge" in text
+    assert f"# TYPE {PREFIX}errors_total counter" in text
+    assert f"# HELP {PREFIX}errors_total " in text
+    assert f'{PREFIX}stage_seconds_count{{stage="whisper"}} 2' in text
+    assert f'{PREFIX}stage_seconds_sum{{stage="whisper"}} 2.000000' in text
+
+    # Each family's header comes once, right before its samples
+    types = [line.split()[2] for line in text.splitlines() if line.startswith("# TYPE")]
+    assert len(types) == len(set(types))
+
+
+def test_label_values_are_escaped():
+    m = Metrics()
+    m.set("lag_seconds", 1.5, stream='C:\\streams\\"live"\nnext')
+    m.inc("errors_total", where="https://youtube.com/watch?v=a\"b")
+    lines = [line for line in m.prometheus_text().splitlines() if not line.startswith("#")]
+
+    assert f'{PREFIX}lag_seconds{{stream="C:\\\\streams\\\\\\"live\\"\\nnext"}} 1.5' in lines
+    for line in lines:
+        assert SAMPLE.match(line), line
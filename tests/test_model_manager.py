@@ -0,0 +1,123 @@
+import json
+
+import pytest
+
+import model_manager
+from model_manager import ModelCatalog, describe_route, parse_model_id, plan_route, pick_translator
+
+STANDIN_IDS = [
+    "Helsinki-NLP/opus-mt-ja-en",
+    "Helsinki-NLP/opus-mt-en-id",
+    "Helsinki-NLP/opus-mt-id-en",
+    "Helsinki-NLP/opus-mt-en-jap",          # Jaruára, not Japanese
+    "Helsinki-NLP/opus-mt-jap-en",
+    "Helsinki-NLP/opus-mt-tc-big-en-es",
+    "Helsinki-NLP/opus-mt-en-es",
+    "Helsinki-NLP/opus-mt-ROMANCE-en",
+    "Helsinki-NLP/opus-mt-en-ROMANCE",      # needs a >>xx<< target token: never picked
+    "Helsinki-NLP/opus-mt-tc-big-cat_oci_spa-en",
+    "Helsinki-NLP/opus-mt-ja-fr",
+    "Helsinki-NLP/opus-mt-fr-de",
+]
+
+
+@pytest.fixture
+def standin(tmp_path):
+    path = tmp_path / "hub.json"
+    path.write_text(json.dumps(STANDIN_IDS))
+    return path
+
+
+@pytest.fixture
+def catalog(tmp_path, standin, monkeypatch):
+    """A catalog that only knows the stand-in list, installed as the process-wide one"""
+    monkeypatch.setattr(model_manager, "HUB_STANDIN_FILE", str(standin))
+    catalog = ModelCatalog(snapshot_path=str(tmp_path / "missing.json"), cache_path=str(tmp_path / "cache.json"))
+    catalog.refresh()
+    monkeypatch.setattr(model_manager, "_catalog", catalog)
+    return catalog
+
+
+def test_parse_tc_big():
+    m = parse_model_id("Helsinki-NLP/opus-mt-tc-big-en-es")
+    assert (m["variant"], m["src"], m["tgt"], m["params_m"]) == ("tc-big", {"en"}, {"es"}, 230)
+    assert not m["multi_source"] and not m["needs_target_token"]
+
+
+def test_parse_multi_source():
+    m = parse_model_id("Helsinki-NLP/opus-mt-tc-big-cat_oci_spa-en")
+    assert m["variant"] == "tc-big" and m["src_raw"] == "cat_oci_spa"
+    assert {"es", "cat", "oci"} == m["src"] and m["multi_source"]
+    assert m["tgt"] == {"en"} and not m["needs_target_token"]
+
+    family = parse_model_id("Helsinki-NLP/opus-mt-en-ROMANCE")
+    assert family["tgt"] == {"es", "fr", "it"} and family["needs_target_token"]
+
+
+def test_parse_jap_is_not_japanese():
+    assert parse_model_id("Helsinki-NLP/opus-mt-ja-en")["src"] == {"ja"}
+    assert parse_model_id("Helsinki-NLP/opus-mt-jap-en")["src"] == {"jap"}
+    assert parse_model_id("Helsinki-NLP/opus-mt-en-jap")["tgt"] == {"jap"}
+    assert parse_model_id("Helsinki-NLP/opus-mt-tc-big-jpn-eng")["src"] == {"ja"}
+    assert parse_model_id("facebook/nllb-200-distilled-600M") is None
+
+
+def test_direct_pair_beats_pivot(catalog):
+    assert plan_route("Japanese", "English") == ["Helsinki-NLP/opus-mt-ja-en"]
+    # Base model preferred over tc-big for the same pair
+    assert plan_route("English", "Spanish") == ["Helsinki-NLP/opus-mt-en-es"]
+
+
+def test_pivot_through_english(catalog):
+    assert plan_route("Japanese", "Indonesian") == ["Helsinki-NLP/opus-mt-ja-en", "Helsinki-NLP/opus-mt-en-id"]
+
+
+def test_pivot_through_another_language_when_english_has_no_second_hop(catalog):
+    # ja -> en exists but en -> de doesn't: French is the only pivot with both hops
+    assert plan_route("Japanese", "German") == ["Helsinki-NLP/opus-mt-ja-fr", "Helsinki-NLP/opus-mt-fr-de"]
+
+
+def test_unknown_or_same_language_has_no_route(catalog):
+    assert plan_route("Klingon", "English") is None
+    assert plan_route("English", "english") is None
+
+
+def test_describe_route(catalog):
+    direct = describe_route(plan_route("Japanese", "English"), "Japanese", "English")
+    assert direct.startswith("Helsinki route: Japanese -> English (direct), ~77M params")
+    assert "vs 600M for NLLB-200 (~7.8x less compute)" in direct
+
+    pivot = describe_route(plan_route("Japanese", "Indonesian"), "Japanese", "Indonesian")
+    assert "Japanese -> English -> Indonesian (2 hops), ~154M params" in pivot
+
+    assert describe_route(None, "Indonesian", "Japanese") == \
+        "No Helsinki route for Indonesian -> Japanese: NLLB-200 (600M) will be used."
+
+
+def test_no_route_falls_back_to_nllb(catalog):
+    # id -> en exists, but en -> ja doesn't (en-jap is another language)
+    assert plan_route("Indonesian", "Japanese") is None
+    assert pick_translator("Indonesian", "Japanese") == ("nllb", None)
+    assert pick_translator("Japanese", "Indonesian")[0] == "helsinki"
+
+
+def test_refresh_async_writes_the_cache_from_the_standin(tmp_path, standin, monkeypatch):
+    monkeypatch.setattr(model_manager, "HUB_STANDIN_FILE", str(standin))
+    cache = tmp_path / "cache.json"
+    snapshot = tmp_path / "snapshot.json"
+    snapshot.write_text(json.dumps([{"id": "Helsinki-NLP/opus-mt-fr-en", "src": "fr", "tgt": "en"}]))
+    catalog = ModelCatalog(snapshot_path=str(snapshot), cache_path=str(cache))
+
+    # Served from the snapshot until the refresh lands
+    assert catalog.best("fr", "en")["id"] == "Helsinki-NLP/opus-mt-fr-en"
+    thread = catalog.refresh_async()
+    assert thread is not None
+    thread.join(10)
+
+    written = json.loads(cache.read_text())
+    assert {entry["id"] for entry in written} == set(STANDIN_IDS)
+    assert catalog.loaded_from == str(cache)
+    assert catalog.best("ja", "en")["id"] == "Helsinki-NLP/opus-mt-ja-en"
+    assert catalog.best("fr", "en")["id"] == "Helsinki-NLP/opus-mt-ROMANCE-en"
+    # Fresh cache: no second refresh
+    assert catalog.refresh_async() is None
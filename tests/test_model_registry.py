@@ -0,0 +1,89 @@
+import threading
+import time
+
+from model_registry import ModelRegistry
+
+GB = 1024**3
+
+
+def get(registry, name, size_gb, loader=None, estimate_gb=None):
+    key = ("translator", name, "cpu", "float32")
+    return registry._get(key, "cpu", loader or (lambda: name), lambda m: int(size_gb * GB),
+                         lambda: int((size_gb if estimate_gb is None else estimate_gb) * GB))
+
+
+def resident_gb(registry):
+    return sum(size for _, size in registry.loaded()) / GB
+
+
+def test_evicts_before_loading():
+    registry = ModelRegistry(budget_gb=4)
+    get(registry, "a", 2)
+    get(registry, "b", 1.5)
+
+    def load_c():
+        # Room was made before the load started: what stays resident plus the new model fits the budget
+        assert resident_gb(registry) + 2 <= 4
+        return "c"
+
+    assert get(registry, "c", 2, load_c) == "c"
+    assert [key[1] for key, _ in registry.loaded()] == ["b", "c"]
+
+
+def test_low_estimate_is_corrected_after_loading():
+    registry = ModelRegistry(budget_gb=4)
+    get(registry, "a", 1.5)
+    get(registry, "b", 1.5)
+    get(registry, "c", 2, estimate_gb=0.5)
+    assert resident_gb(registry) <= 4
+    assert [key[1] for key, _ in registry.loaded()] == ["b", "c"]
+
+
+def test_slow_load_does_not_block_other_gets():
+    registry = ModelRegistry(budget_gb=8)
+    get(registry, "cached", 1)
+    started, release = threading.Event(), threading.Event()
+    loads = []
+
+    def slow():
+        loads.append("slow")
+        started.set()
+        release.wait(5)
+        return "slow"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(get(registry, "slow", 1, slow))) for _ in range(3)]
+    for t in threads: t.start()
+    assert started.wait(5)
+
+    t0 = time.perf_counter()
+    assert get(registry, "cached", 1) == "cached"
+    assert get(registry, "other", 1) == "other"
+    assert time.perf_counter() - t0 < 1.0
+
+    release.set()
+    for t in threads: t.join(5)
+    # The callers that came while it was loading waited for that load instead of starting their own
+    assert results == ["slow"] * 3 and loads == ["slow"]
+
+
+def test_failed_load_lets_the_next_caller_retry():
+    registry = ModelRegistry(budget_gb=8)
+
+    def broken():
+        raise OSError("download failed")
+
+    try:
+        get(registry, "m", 1, broken)
+    except OSError:
+        pass
+    assert registry._reserved["cpu"] == 0 and not registry._loading
+    assert get(registry, "m", 1) == "m"
+
+
+def test_cache_hits_are_quiet(capsys):
+    registry = ModelRegistry(budget_gb=4)
+    get(registry, "a", 1)
+    assert "Loaded translator 'a'" in capsys.readouterr().out
+    for _ in range(3): assert get(registry, "a", 1) == "a"
+    assert capsys.readouterr().out == ""
@@ -0,0 +1,87 @@
+import time
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+pytest.importorskip("pykakasi")
+import multi_stream
+from audio_capture import AudioCapture
+from multi_stream import StreamScheduler, StreamSession, build_engines, build_parser, transcribe_clips
+from segmenter import AudioChunk
+from stub_models import StubBatchedPipeline, StubWhisperModel
+
+SR = 16000
+ENGINE_ARGS = ("helsinki", "ja", "en", "jpn_Jpan", "eng_Latn", "stub")
+
+
+def tone(seconds, amplitude):
+    # Odd lengths, so the chunk offsets in the joined audio don't fall on round numbers
+    n = int(seconds * SR) + 3
+    return (amplitude * np.sin(2 * np.pi * 220 * np.arange(n) / SR)).astype(np.float32)
+
+
+@pytest.fixture
+def whole_chunks(monkeypatch):
+    """Every chunk is one speech region (Silero would find no speech in a tone)"""
+    monkeypatch.setattr(multi_stream, "speech_regions", lambda audio: [{"start": 0, "end": len(audio)}])
+
+
+class RecordingPipeline:
+    def __init__(self):
+        self.clips = None
+
+    def transcribe(self, audio, clip_timestamps=None, **kwargs):
+        self.clips = clip_timestamps
+        return iter([]), SimpleNamespace(language="ja")
+
+
+def test_clips_are_passed_in_seconds(whole_chunks):
+    pipeline = RecordingPipeline()
+    chunks = [tone(3, 0.1), tone(5, 0.1)]
+    transcribe_clips(pipeline, chunks, "ja", 5, 8)
+    first = len(chunks[0]) / SR
+    assert pipeline.clips == [{"start": 0.0, "end": first}, {"start": first, "end": first + len(chunks[1]) / SR}]
+
+
+def test_batched_segments_map_back_to_their_chunk(whole_chunks):
+    model = StubWhisperModel()
+    chunks = [tone(5, 0.1), tone(3, 0.2), tone(5, 0.3)]
+    decoded = transcribe_clips(StubBatchedPipeline(model), chunks, "ja", 5, 8)
+    for audio, (language, found) in zip(chunks, decoded):
+        assert language == "ja"
+        expected = model.decode(audio)
+        assert [s.text for s in found] == [s.text for s in expected]
+        assert [s.start for s in found] == [pytest.approx(s.start, abs=1e-3) for s in expected]
+
+
+def test_streams_are_batched_and_keep_their_own_output(whole_chunks):
+    args = build_parser().parse_args(["a", "b", "--stub-models", "--stub-cost", "0", "--no-store", "--quality", "fixed"])
+    engines = build_engines(ENGINE_ARGS, args, 2)
+    sessions, records = [], {}
+    for n, (engine, amplitude) in enumerate(zip(engines, (0.1, 0.2))):
+        capture = AudioCapture()
+        for k in range(3):
+            capture.audio_queue.put(AudioChunk(tone(5, amplitude), k * 5.0, 0.0, time.monotonic()))
+        session = StreamSession(f"s{n}", f"input{n}", engine, capture)
+        records[session.name] = []
+        session.on_record = records[session.name].append
+        sessions.append(session)
+    assert sessions[0].capture.downstream_seconds == sessions[0].pending_seconds
+
+    scheduler = StreamScheduler(sessions, whisper_batch=8, batched_loader=StubBatchedPipeline)
+    deadline = time.monotonic() + 30
+    while not scheduler.finished() and time.monotonic() < deadline: time.sleep(0.02)
+    scheduler.stop()
+    assert scheduler.finished()
+
+    model = engines[0].whisper
+    for session, amplitude in zip(sessions, (0.1, 0.2)):
+        decoded = model.decode(tone(5, amplitude))
+        assert [r["source"] for r in records[session.name]] == [s.text for _ in range(3) for s in decoded]
+        assert [r["start"] for r in records[session.name]] == [pytest.approx(k * 5.0 + s.start, abs=1e-3)
+                                                               for k in range(3) for s in decoded]
+        assert session.in_flight == 0
+    # Both streams' chunks went through one Whisper call
+    batched, = scheduler.batched.values()
+    assert max(batched.calls) > 1
@@ -0,0 +1,45 @@
+import os
+
+import numpy as np
+
+from pcm_cache import PCMCache, source_key
+
+SIZE = 4 << 20  # Larger than the three 1 MB samples, so the middle of the file isn't hashed
+
+
+def recording(path, fill, mtime_ns=None):
+    data = bytearray(SIZE)
+    data[SIZE // 4] = fill  # Outside the sampled ranges
+    path.write_bytes(bytes(data))
+    if mtime_ns is not None: os.utime(path, ns=(mtime_ns, mtime_ns))
+    return str(path)
+
+
+def test_same_size_recordings_get_different_keys(tmp_path):
+    a = recording(tmp_path / "a.wav", 1, mtime_ns=10**18)
+    b = recording(tmp_path / "b.wav", 2, mtime_ns=10**18)
+    assert source_key(a) != source_key(b)
+    assert source_key(a) == source_key(a)
+
+
+def test_file_changed_in_place_is_decoded_again(tmp_path, capsys):
+    cache = PCMCache(str(tmp_path / "cache"))
+    source = recording(tmp_path / "talk.wav", 1, mtime_ns=10**18)
+    key = source_key(source)
+    pcm = np.arange(100, dtype=np.int16)
+    cache.store(key, source, pcm)
+    assert np.array_equal(cache.load(key, source), pcm)
+
+    recording(tmp_path / "talk.wav", 2, mtime_ns=10**18 + 1)
+    assert source_key(source) != key
+    # Even looked up with the old key, the entry no longer matches the file
+    assert cache.load(key, source) is None
+    assert "changed since it was cached" in capsys.readouterr().out
+
+
+def test_url_entries_round_trip(tmp_path):
+    cache = PCMCache(str(tmp_path / "cache"))
+    url = "https://example.com/watch?v=abc"
+    cache.store(source_key(url), url, np.ones(10, dtype=np.int16))
+    assert cache.load(source_key(url), url).sum() == 10
+    assert cache.stats()["hits"] == 1
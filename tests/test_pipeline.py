@@ -0,0 +1,86 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from audio_capture import AudioCapture
+from pipeline import ProcessingPipeline
+from segmenter import AudioChunk
+
+SR = 16000
+
+
+def fake_engine():
+    return SimpleNamespace(translation_batch_size=8, transcribe_chunk=None,
+                           translate_segments=lambda segments: None, build_records=lambda segments: [])
+
+
+def test_queued_seconds_covers_audio_waiting_for_and_in_whisper():
+    release = threading.Event()
+
+    def slow_asr(chunk):
+        release.wait(5)
+        return []
+
+    pipeline = ProcessingPipeline(fake_engine(), None, asr=slow_asr)
+    for n in range(3):
+        pipeline.submit(AudioChunk(np.zeros(8 * SR, np.float32), 8.0 * n, 0.0))
+    assert pipeline.queued_seconds() == 24.0
+
+    release.set()
+    deadline = time.monotonic() + 5
+    while not pipeline.is_idle() and time.monotonic() < deadline: time.sleep(0.01)
+    assert pipeline.queued_seconds() == 0.0
+    pipeline.stop()
+
+
+def test_live_drop_counts_audio_already_in_the_pipeline():
+    capture = AudioCapture(max_buffer_seconds=40, catchup_seconds=40)
+    capture.is_live = True
+    capture.downstream_seconds = lambda: 32.0  # four 8 s chunks waiting in the pipeline
+
+    tone = (0.3 * np.sin(2 * np.pi * 220 * np.arange(8 * SR) / SR)).astype(np.float32)
+    for n in range(6):
+        slot = capture.ring.reserve(len(tone), timeout=1)
+        capture._emit_audio(capture.ring.write(tone, slot))
+
+    # Queue + pipeline stay within the bound (the newest chunk is always kept)
+    assert capture.audio_queue.seconds == 8.0
+    assert capture.backlog_seconds() == 40.0
+
+
+def test_translation_batches_segments_of_several_chunks():
+    pytest.importorskip("pykakasi")
+    from stub_models import StubTokenizer, StubTranslator
+    from transcriber import AIEngine
+
+    calls = []
+
+    class CountingTranslator(StubTranslator):
+        def generate(self, input_ids, **kwargs):
+            calls.append(len(input_ids))
+            return super().generate(input_ids, **kwargs)
+
+    engine = AIEngine("helsinki", "en", "ja", "eng_Latn", "jpn_Jpan", "stub", translation_batch_size=32,
+                      use_translation_memory=False, whisper=object(), translator=CountingTranslator(),
+                      tokenizer=StubTokenizer(), quality_mode="fixed")
+
+    def asr(chunk):
+        n = int(chunk.start)
+        return [{"id": f"{n}.{k}", "start": chunk.start + k, "end": chunk.start + k + 1, "text": f"chunk{n} part{k}",
+                 "lang": "en", "trans": ""} for k in range(2)]
+
+    records = []
+    pipeline = ProcessingPipeline(engine, None, translation_max_wait=1.0, record_callback=records.append, asr=asr)
+    for n in range(3):
+        pipeline.submit(AudioChunk(np.zeros(SR, np.float32), float(n), 0.0))
+    deadline = time.monotonic() + 5
+    while len(records) < 6 and time.monotonic() < deadline: time.sleep(0.01)
+    pipeline.stop()
+
+    # All six segments of the three chunks went through one generate() call, and came out in order
+    assert calls == [6]
+    assert [r["source"] for r in records] == [f"chunk{n} part{k}" for n in range(3) for k in range(2)]
+    assert [r["translation"] for r in records] == [f"<en:chunk{n}> <en:part{k}>" for n in range(3) for k in range(2)]
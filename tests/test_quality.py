@@ -0,0 +1,76 @@
+from types import SimpleNamespace
+
+from quality import LEVELS, QualityController
+
+
+def controller(**kwargs):
+    engine = SimpleNamespace(whisper="main", beam_size=5, gloss_allowed=True)
+    options = dict(mode="adaptive", smoothing=1.0, min_dwell=0.0)  # smoothing 1: the RTF is the last chunk's
+    options.update(kwargs)
+    quality = QualityController(engine, **options)
+    quality.observe_backlog(0.0, live=True)
+    return quality, engine
+
+
+def feed(quality, rtfs, backlog=0.0):
+    levels = []
+    for rtf in rtfs:
+        quality.observe_backlog(backlog, live=True)
+        quality.observe_chunk(8.0, 8.0 * rtf)
+        levels.append(quality.level)
+    return levels
+
+
+def test_steps_down_after_consecutive_slow_chunks():
+    quality, engine = controller()
+    # One slow chunk alone isn't enough (down_after=2)
+    assert feed(quality, [1.5, 0.5, 1.5, 1.5]) == [0, 0, 0, 1]
+    assert (engine.beam_size, engine.gloss_allowed) == (LEVELS[1].beam_size, True)
+    assert feed(quality, [1.5, 1.5, 1.5, 1.5]) == [1, 2, 2, 3]
+    assert engine.gloss_allowed is False
+
+
+def test_backlog_alone_steps_down():
+    quality, _ = controller()
+    assert feed(quality, [0.3, 0.3], backlog=15.0) == [0, 1]
+
+
+def test_no_flapping_inside_the_band():
+    quality, _ = controller()
+    feed(quality, [1.5, 1.5])
+    assert quality.level == 1
+    # Not slow (< rtf_high) and not fast enough for level 0 (0.8 / 0.75 > rtf_target): stays put
+    assert set(feed(quality, [0.8, 0.85, 0.75, 0.88] * 10)) == {1}
+
+
+def test_steps_back_up_once_there_is_headroom():
+    quality, engine = controller()
+    feed(quality, [1.5, 1.5, 1.5, 1.5])
+    assert quality.level == 2
+    # up_after=6 fast chunks per step
+    levels = feed(quality, [0.2] * 12)
+    assert levels[:5] == [2] * 5 and levels[5] == 1 and levels[-1] == 0
+    assert engine.beam_size == LEVELS[0].beam_size
+
+
+def test_backlog_blocks_stepping_up():
+    quality, _ = controller()
+    feed(quality, [1.5, 1.5])
+    assert set(feed(quality, [0.2] * 12, backlog=5.0)) == {1}
+
+
+def test_dwell_time_blocks_stepping_up():
+    quality, _ = controller(min_dwell=3600.0)
+    feed(quality, [1.5, 1.5])
+    assert set(feed(quality, [0.2] * 12)) == {1}
+
+
+def test_files_and_fixed_mode_stay_at_full_quality():
+    quality, _ = controller(mode="fixed")
+    assert set(feed(quality, [2.0] * 6)) == {0}
+
+    quality, _ = controller()
+    for _ in range(6):
+        quality.observe_backlog(0.0, live=False)
+        quality.observe_chunk(8.0, 16.0)
+    assert quality.level == 0
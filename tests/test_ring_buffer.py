@@ -0,0 +1,99 @@
+import random
+
+import numpy as np
+import pytest
+
+from audio_capture import AudioCapture
+from ring_buffer import PCMRing
+
+SR = 16000
+
+
+def test_slots_in_use_never_overlap():
+    ring = PCMRing(10_000, 1_000)
+    rng = random.Random(0)
+    live = []  # (start, end, view, fill value)
+
+    for step in range(5_000):
+        if live and (rng.random() < 0.45 or len(live) > 12):
+            # Release in any order, but check nothing else wrote into the slot first
+            start, end, view, value = live.pop(rng.randrange(len(live)))
+            assert np.all(view == value), f"slot {start}-{end} was overwritten"
+            ring.release(view)
+            continue
+        n = rng.randint(1, 3_000)
+        view = ring.reserve(n, timeout=0)
+        if view is None: continue
+        start = ring.offset(view)
+        assert len(view) == n and start + n <= ring.capacity
+        for other_start, other_end, _, _ in live:
+            assert start >= other_end or start + n <= other_start
+        view[:] = step
+        live.append((start, start + n, view, step))
+
+    # Released slots behind an older one still in use are only reclaimed with it
+    assert ring.used_samples() >= sum(end - start for start, end, _, _ in live)
+    for _, _, view, _ in live: ring.release(view)
+    assert ring.used_samples() == 0
+
+
+def test_reserve_waits_until_space_is_released():
+    ring = PCMRing(4_000, 1_000)
+    first = ring.reserve(3_000)
+    assert ring.reserve(2_000, timeout=0) is None
+    ring.release(first)
+    assert ring.offset(ring.reserve(2_000, timeout=0)) == 0
+
+
+def test_short_read_gives_back_the_unused_end():
+    ring = PCMRing(4_000, 1_000)
+    slot = ring.reserve(1_000)
+    short = ring.shrink(slot, 400)
+    assert len(short) == 400 and ring.used_samples() == 400
+    assert ring.offset(ring.reserve(1_000)) == 400
+
+
+def source_audio(seconds):
+    """
+    Loud (never skipped as silence) and position-dependent, so every chunk can be traced back.
+    A 0.1 s dip every second keeps the VAD's noise floor down without being a pause.
+    """
+    i = np.arange(int(seconds * SR))
+    audio = 0.3 * np.sin(2 * np.pi * 220 * i / SR) + (i % 997) * 1e-5
+    audio[i % SR < SR // 10] = 1e-4
+    return audio.astype(np.float32)
+
+
+def capture_live(capture, audio):
+    """Feeds `audio` through the ring like _run_ffmpeg does, without anyone taking chunks off the queue"""
+    capture.is_live = True
+    capture._reset_stream_clock()
+    for pos in range(0, len(audio), capture.read_samples):
+        slot = capture.ring.reserve(min(capture.read_samples, len(audio) - pos), timeout=1)
+        capture._emit_audio(capture.ring.write(audio[pos:pos + len(slot)], slot))
+    capture._flush_segmenter()
+    chunks = []
+    while not capture.audio_queue.empty(): chunks.append(capture.audio_queue.get_nowait())
+    return chunks
+
+
+@pytest.mark.parametrize("mode", ["fixed", "vad"])
+def test_chunk_timestamps_match_source_across_drops(mode):
+    audio = source_audio(90)
+    capture = AudioCapture(segment_mode=mode, max_segment_seconds=4.0, overlap_seconds=0.5,
+                           max_buffer_seconds=20, catchup_seconds=10)
+    chunks = capture_live(capture, audio)
+
+    assert sum(len(c.audio) for c in chunks) / SR <= 20 + 8
+    for chunk in chunks:
+        a = int(round(chunk.start * SR))
+        np.testing.assert_array_equal(chunk.audio, audio[a:a + len(chunk.audio)])
+
+    # The oldest audio was dropped: the first chunk left says how much, and has nothing to dedup against
+    head = chunks[0]
+    assert head.skipped == pytest.approx(head.start) and head.start > 0
+    assert head.overlap == 0.0
+    for prev, chunk in zip(chunks, chunks[1:]):
+        assert chunk.skipped == 0.0
+        assert chunk.start == pytest.approx(prev.start + len(prev.audio) / SR - chunk.overlap)
+    assert capture.ring.used_samples() == 0
@@ -0,0 +1,111 @@
+import numpy as np
+import pytest
+
+from segmenter import PauseSegmenter
+from stub_models import StubInfo, StubSegment
+
+SR = 16000
+
+
+def speech(samples):
+    """
+    A tone with a slow ramp on top (no two windows look alike) and a 0.1 s dip every second:
+    too short to count as a pause, but it keeps the noise floor down like breaths do.
+    """
+    i = np.arange(samples)
+    audio = 0.3 * np.sin(2 * np.pi * 220 * i / SR) + (i % 997) * 1e-5
+    audio[i % SR < SR // 10] = 1e-4
+    return audio.astype(np.float32)
+
+
+def speech_and_pauses(pattern):
+    """[(seconds, voiced)] -> signal: loud tone for voiced parts, near-silence for pauses"""
+    parts = []
+    for seconds, voiced in pattern:
+        n = int(seconds * SR)
+        t = np.arange(n) / SR
+        parts.append((0.3 * np.sin(2 * np.pi * 220 * t) if voiced else np.full(n, 1e-4)).astype(np.float32))
+    return np.concatenate(parts)
+
+
+def feed_all(seg, audio, step=SR // 10):
+    chunks = []
+    for i in range(0, len(audio), step):
+        chunks += seg.feed(audio[i:i + step])
+    return chunks + seg.flush()
+
+
+def test_chunk_audio_matches_source_position_with_overlap():
+    audio = speech(30 * SR)
+    seg = PauseSegmenter(SR, max_segment_seconds=4.0, overlap_seconds=0.5)
+    chunks = feed_all(seg, audio)
+
+    assert len(chunks) > 5
+    for chunk in chunks:
+        a = int(round(chunk.start * SR))
+        np.testing.assert_array_equal(chunk.audio, audio[a:a + len(chunk.audio)])
+    for prev, chunk in zip(chunks, chunks[1:]):
+        # Forced cuts only: every chunk starts `overlap` before the end of the previous one
+        assert chunk.overlap == pytest.approx(0.5)
+        assert chunk.start == pytest.approx(prev.start + len(prev.audio) / SR - 0.5)
+    assert chunks[-1].start + len(chunks[-1].audio) / SR == pytest.approx(30.0)
+
+
+def test_cuts_at_pauses_without_overlap():
+    audio = speech_and_pauses([(0.5, False), (2, True), (1, False), (2.5, True), (1, False), (2, True)])
+    chunks = feed_all(PauseSegmenter(SR), audio)
+
+    assert len(chunks) == 3
+    assert all(c.overlap == 0.0 for c in chunks)
+    for chunk in chunks:
+        a = int(round(chunk.start * SR))
+        np.testing.assert_array_equal(chunk.audio, audio[a:a + len(chunk.audio)])
+
+
+def test_flush_skips_carried_overlap_only():
+    seg = PauseSegmenter(SR, max_segment_seconds=4.0, overlap_seconds=0.5)
+    # Exactly one forced cut: afterwards the buffer holds nothing but the carried overlap
+    frame = seg.frame
+    cut_at = -(-seg.max_samples // frame) * frame
+    chunks = seg.feed(speech(cut_at))
+    assert len(chunks) == 1
+    assert len(seg.buffer) == seg.carried_overlap > 0
+    assert seg.flush() == []
+
+
+class ScriptedWhisper:
+    """Returns the segments given for each call, in order"""
+
+    def __init__(self, *calls):
+        self.calls = list(calls)
+
+    def transcribe(self, audio, language=None, beam_size=5, vad_filter=True, **kwargs):
+        return iter(self.calls.pop(0)), StubInfo("en", 1.0, len(audio) / SR)
+
+
+@pytest.fixture
+def engine_for():
+    from stub_models import StubTokenizer, StubTranslator
+    from transcriber import AIEngine
+
+    def build(whisper):
+        return AIEngine("helsinki", "en", "ja", "eng_Latn", "jpn_Jpan", "stub", use_translation_memory=False,
+                        whisper=whisper, translator=StubTranslator(), tokenizer=StubTokenizer(), quality_mode="fixed")
+    return build
+
+
+def test_overlap_segment_is_not_emitted_twice(engine_for):
+    from segmenter import AudioChunk
+    whisper = ScriptedWhisper(
+        [StubSegment(0.0, 2.0, "good morning everyone"), StubSegment(2.0, 4.0, "welcome back to the stream")],
+        # Next chunk starts 0.5 s earlier: the first segment lies inside the overlap, the second straddles it
+        [StubSegment(0.0, 0.4, "stream"), StubSegment(0.3, 2.0, "the stream today we play"), StubSegment(2.0, 3.5, "a new game")],
+    )
+    engine = engine_for(whisper)
+    first = engine.transcribe_chunk(AudioChunk(np.zeros(4 * SR, np.float32), 0.0, 0.0))
+    second = engine.transcribe_chunk(AudioChunk(np.zeros(4 * SR, np.float32), 3.5, 0.5))
+
+    texts = [s["text"] for s in first + second]
+    assert texts == ["good morning everyone", "welcome back to the stream", "today we play", "a new game"]
+    assert [s["start"] for s in second] == [pytest.approx(3.8), pytest.approx(5.5)]
+    assert len({s["id"] for s in first + second}) == 4
@@ -0,0 +1,67 @@
+import threading
+from collections import deque
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("pykakasi")
+from metrics import Metrics
+from transcriber import AIEngine, translate_streams
+
+
+class EchoHop:
+    """Translator stand-in: the "translation" of a source is its upper-cased last sentence"""
+
+    def __init__(self):
+        self.calls = []
+        self.last_token_counts = []
+
+    def translate(self, texts, max_length, prefixes=None):
+        self.calls.append((list(texts), list(prefixes or [])))
+        self.last_token_counts = [(1, 0)] * len(texts)
+        return [text.split(" ")[-1].upper() for text in texts]
+
+
+def engine(hop, context_segments=1):
+    return SimpleNamespace(hops=[hop], translation_memory=None, model_id="echo", source_lang_code="ja", target_lang="en",
+                           translator_lock=threading.Lock(), metrics=Metrics(), translation_context=deque(maxlen=context_segments))
+
+
+def seg(text, lang="ja"):
+    return {"text": text, "lang": lang, "trans": ""}
+
+
+def streams_engine(engine):
+    """translate_streams needs display options and translate_batch on the lead engine"""
+    engine.display_ops = {"trans": True}
+    engine.translate_wave = lambda items, max_length=200: AIEngine.translate_wave(engine, items, max_length)
+    engine.translate_batch = lambda texts, **kwargs: [text.upper() for text in texts]
+    return engine
+
+
+def test_waves_batch_across_streams_on_the_previous_sentence():
+    hop = EchoHop()
+    a, b = streams_engine(engine(hop)), streams_engine(engine(hop, context_segments=2))
+    a.translation_context.append(["x", "X"])
+    stream_a, stream_b = [seg("a1"), seg("a2")], [seg("b1"), seg("b2"), seg("b3")]
+
+    translate_streams([(a, stream_a), (b, stream_b)])
+
+    # Wave k holds the k-th sentence of every stream, each conditioned on the sentence right before it
+    assert hop.calls == [(["x a1", "b1"], ["X", ""]), (["a1 a2", "b1 b2"], ["A1", "B1"]), (["b1 b2 b3"], ["B1 B2"])]
+    assert [s["trans"] for s in stream_a + stream_b] == ["A1", "A2", "B1", "B2", "B3"]
+    assert list(a.translation_context) == [["a2", "A2"]]
+    assert list(b.translation_context) == [["b2", "B2"], ["b3", "B3"]]
+
+
+def test_notice_clears_the_context():
+    hop = EchoHop()
+    a = streams_engine(engine(hop))
+    a.translation_context.append(["x", "X"])
+    segments = [seg("a1"), seg("[skipped]", lang="notice"), seg("a2"), seg("hello", lang="en")]
+
+    translate_streams([(a, segments)])
+
+    assert hop.calls == [(["x a1"], ["X"]), (["a2"], [""])]
+    assert list(a.translation_context) == [["a2", "A2"]]
+    assert segments[3]["trans"] == "HELLO"
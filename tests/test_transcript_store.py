@@ -0,0 +1,39 @@
+import time
+
+from transcript_store import TranscriptStore
+
+
+def record(text, start, lang="ja"):
+    return {"start": start, "end": start + 2.0, "lang": lang, "source": text, "reading": "", "tokens": [], "translation": ""}
+
+
+def test_segments_carry_their_stream_time_and_notices_are_skipped(tmp_path):
+    store = TranscriptStore(str(tmp_path / "t.db"), flush_interval=0.01)
+    session = store.start_session("stream", "ja", "en", "stub")
+    started_at = store.sessions()[0]["started_at"]
+
+    time.sleep(0.05)  # Processed later than spoken: `at` doesn't depend on that
+    store.add(session, record("今日はゲームをやっていきたい", 3600.0))
+    store.add(session, record("[skipped 12 s]", 3610.0, lang="notice"))
+    store.add(session, record("それではまた明日", 3620.0))
+    store.flush()
+
+    rows = store.session_segments(session)
+    assert [r["source"] for r in rows] == ["今日はゲームをやっていきたい", "それではまた明日"]
+    assert [r["at"] for r in rows] == [started_at + 3600.0, started_at + 3620.0]
+    assert store.search("skipped") == []
+    store.close()
+
+
+def test_session_opened_elsewhere_uses_its_stored_start(tmp_path):
+    path = str(tmp_path / "t.db")
+    first = TranscriptStore(path, flush_interval=0.01)
+    session = first.start_session("stream", "ja", "en", "stub")
+    started_at = first.sessions()[0]["started_at"]
+    first.close()
+
+    second = TranscriptStore(path, flush_interval=0.01)
+    second.add(session, record("ちょっと待って", 5.0))
+    second.flush()
+    assert second.session_segments(session)[0]["at"] == started_at + 5.0
+    second.close()
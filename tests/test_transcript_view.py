@@ -0,0 +1,121 @@
+from types import SimpleNamespace
+
+import pytest
+
+tk = pytest.importorskip("tkinter")
+from transcript_view import TranscriptView
+
+
+class FakeText:
+    """Enough of tk.Text for TranscriptView, without a display: indices are character offsets"""
+
+    def __init__(self):
+        self.chars = []  # [character, tags]
+        self.marks = {}
+        self.vbar = SimpleNamespace(set=lambda first, last: None)
+        self.view = (0.0, 1.0)
+
+    def _offset(self, index):
+        if isinstance(index, int): return index
+        if index == tk.END: return len(self.chars)
+        if index == "1.0" or index.startswith("@"): return 0
+        return self.marks[index]
+
+    def index(self, index):
+        return self._offset(index)
+
+    def insert(self, index, *chunks):
+        pos = self._offset(index)
+        new = [[c, set(tags)] for text, tags in zip(chunks[::2], chunks[1::2]) for c in text]
+        self.chars[pos:pos] = new
+
+    def delete(self, first, last):
+        del self.chars[self._offset(first):self._offset(last)]
+
+    def tag_ranges(self, tag):
+        ranges, inside = [], False
+        for i, (_, tags) in enumerate(self.chars):
+            if (tag in tags) != inside:
+                ranges.append(i)
+                inside = not inside
+        if inside: ranges.append(len(self.chars))
+        return tuple(ranges)
+
+    def tag_names(self):
+        return set().union(*(tags for _, tags in self.chars))
+
+    def tag_delete(self, tag):
+        for _, tags in self.chars: tags.discard(tag)
+
+    def tag_configure(self, *args, **kwargs): pass
+    def configure(self, **kwargs): pass
+    def see(self, index): pass
+    def mark_set(self, name, index): self.marks[name] = self._offset(index)
+    def mark_unset(self, name): self.marks.pop(name, None)
+
+    def yview(self, *args):
+        return self.view
+
+    def text(self):
+        return "".join(c for c, _ in self.chars)
+
+
+class FakeRoot:
+    def after(self, ms, callback): pass
+    def after_idle(self, callback): pass
+
+
+def view(window=300, page=100):
+    area = FakeText()
+    return TranscriptView(FakeRoot(), area, window=window, page=page, frame_ms=0), area
+
+
+def frame(v, *blocks):
+    for block in blocks: v.post(*block)
+    v._flush()
+
+
+def shown(v):
+    return "".join(v.store.read(v.lo, v.hi + 1))
+
+
+def test_system_line_between_partial_and_final_keeps_store_order():
+    v, area = view()
+    frame(v, ("final", 1, "one\n"), ("partial", 2, "two…\n"))
+    frame(v, ("text", None, "[system]\n"))
+    assert area.text() == "one\n[system]\ntwo…\n"  # The partial stays at the live end
+    frame(v, ("final", 2, "two\n"))
+    assert area.text() == "one\n[system]\ntwo\n" == shown(v)
+    assert not area.tag_ranges("partial")
+
+
+def test_window_is_bounded_and_trimmed_by_tag():
+    v, area = view(window=3)
+    frame(v, *[("final", n, f"block {n}\n") for n in range(5)], ("partial", 5, "five…\n"))
+    frame(v, ("text", None, "[system]\n"), ("final", 5, "block 5\n"), ("final", 6, "block 6\n"))
+
+    assert (v.lo, v.hi) == (5, 7)
+    assert area.text() == shown(v) == "[system]\nblock 5\nblock 6\n"
+    assert len(v.store) == 8
+
+
+def test_scrollback_pages_blocks_in_from_the_file():
+    v, area = view(window=4, page=3)
+    frame(v, *[("final", n, f"block {n}\n") for n in range(10)])
+    assert (v.lo, v.hi) == (6, 9)
+    assert v.store.read(0, 2) == ["block 0\n", "block 1\n"]
+
+    v._page_up()
+    assert not v.following
+    assert (v.lo, v.hi) == (3, 6)
+    assert area.text() == shown(v)
+
+    # New blocks only go to the file while scrolled up
+    area.view = (0.0, 0.5)
+    frame(v, ("final", 10, "block 10\n"))
+    assert area.text() == shown(v) and v.hi == 6
+
+    v._page_down()
+    v._page_down()
+    assert v.following and (v.lo, v.hi) == (7, 10)
+    assert area.text() == "block 7\nblock 8\nblock 9\nblock 10\n"
@@ -0,0 +1,58 @@
+import pytest
+
+from translation_memory import TranslationMemory
+
+
+@pytest.fixture
+def db(tmp_path):
+    return str(tmp_path / "tm.db")
+
+
+def test_max_length_keeps_entries_apart(db):
+    tm = TranslationMemory(db)
+    tm.put_many("m", "ja", "en", [("今日は", "today")], max_length=50)
+    assert tm.get_many("m", "ja", "en", ["今日は"], max_length=200) == [None]
+    assert tm.get_many("m", "ja", "en", ["今日は"], max_length=50) == ["today"]
+
+
+def test_memory_lru_drops_the_least_recently_used(db):
+    tm = TranslationMemory(db, memory_entries=2)
+    tm.put_many("m", "ja", "en", [("a", "A"), ("b", "B")])
+    tm.get_many("m", "ja", "en", ["a"])            # "b" is now the oldest
+    tm.put_many("m", "ja", "en", [("c", "C")])
+    assert [key[3] for key in tm.memory] == ["a", "c"]
+    # Dropped from memory, still on disk
+    assert tm.get_many("m", "ja", "en", ["b"]) == ["B"]
+    assert tm.disk_hits == 1
+
+
+def test_entries_survive_a_restart(db):
+    first = TranslationMemory(db)
+    first.put_many("m", "ja", "en", [("ちょっと　待って", "wait a moment")])
+    first.close()
+
+    second = TranslationMemory(db)
+    # NFKC + whitespace normalization: the full-width space matches a plain one
+    assert second.get_many("m", "ja", "en", ["ちょっと 待って"]) == ["wait a moment"]
+    assert second.disk_bytes > 0
+
+
+def test_stats_count_hits_and_misses(db):
+    tm = TranslationMemory(db)
+    assert tm.get_many("m", "ja", "en", ["a", "b"]) == [None, None]
+    tm.put_many("m", "ja", "en", [("a", "A"), ("b", "B")], elapsed=1.0)
+    tm.get_many("m", "ja", "en", ["a", "b", "c"])
+
+    stats = tm.stats()
+    assert (stats["memory_hits"], stats["disk_hits"], stats["misses"]) == (2, 0, 3)
+    assert stats["hit_rate"] == pytest.approx(2 / 5)
+    assert stats["saved_seconds"] == pytest.approx(2 * 1.0 / 3)
+
+
+def test_disk_budget_evicts_oldest_rows(db):
+    tm = TranslationMemory(db, max_disk_mb=200 / 2**20)  # 200 bytes
+    for n in range(20):
+        tm.put_many("m", "ja", "en", [(f"sentence {n:02d}", "x" * 10)])
+    assert tm.disk_bytes <= 200
+    rows = [r[0] for r in tm.conn.execute("SELECT source FROM tm ORDER BY last_used")]
+    assert rows[-1] == "sentence 19" and "sentence 00" not in rows
@@ -0,0 +1,86 @@
+import json
+import os
+import shutil
+
+import pytest
+
+ctranslate2 = pytest.importorskip("ctranslate2")
+spm = pytest.importorskip("sentencepiece")
+transformers = pytest.importorskip("transformers")
+torch = pytest.importorskip("torch")
+
+import translator_backends
+from translator_backends import CT2Translator, TorchTranslator
+
+SENTENCES = ["good morning everyone", "welcome back to the stream", "today we play a new game", "see you tomorrow",
+             "thank you for coming", "wait a moment please", "let us go next year", "this is a test sentence"]
+
+
+@pytest.fixture(scope="module")
+def marian(tmp_path_factory):
+    """Tiny randomly initialised Marian model with its own SentencePiece vocab (no download)"""
+    out = str(tmp_path_factory.mktemp("marian"))
+    corpus = os.path.join(out, "corpus.txt")
+    with open(corpus, "w") as f: f.write("\n".join(SENTENCES * 20))
+    spm.SentencePieceTrainer.train(input=corpus, model_prefix=os.path.join(out, "spm"), vocab_size=60, model_type="unigram",
+                                   character_coverage=1.0, bos_id=-1, eos_id=-1, unk_id=1, pad_id=-1, minloglevel=2)
+    sp = spm.SentencePieceProcessor(model_file=os.path.join(out, "spm.model"))
+    vocab = {"</s>": 0, "<unk>": 1}
+    for i in range(sp.get_piece_size()):
+        vocab.setdefault(sp.id_to_piece(i), len(vocab))
+    vocab["<pad>"] = len(vocab)  # Last, as in opus-mt (CT2 drops it from the target vocab)
+    os.replace(os.path.join(out, "spm.model"), os.path.join(out, "source.spm"))
+    shutil.copy(os.path.join(out, "source.spm"), os.path.join(out, "target.spm"))
+    with open(os.path.join(out, "vocab.json"), "w") as f: json.dump(vocab, f)
+
+    tokenizer = transformers.MarianTokenizer(os.path.join(out, "source.spm"), os.path.join(out, "target.spm"),
+                                             os.path.join(out, "vocab.json"))
+    torch.manual_seed(0)
+    config = transformers.MarianConfig(
+        vocab_size=len(tokenizer), d_model=32, encoder_layers=2, decoder_layers=2, encoder_attention_heads=2,
+        decoder_attention_heads=2, encoder_ffn_dim=64, decoder_ffn_dim=64, max_position_embeddings=128,
+        pad_token_id=vocab["<pad>"], eos_token_id=0, decoder_start_token_id=vocab["<pad>"], forced_eos_token_id=0)
+    model = transformers.MarianMTModel(config).eval()
+    model.save_pretrained(out)
+    tokenizer.save_pretrained(out)
+    return out, tokenizer, model
+
+
+@pytest.fixture(scope="module")
+def backends(marian, tmp_path_factory):
+    path, tokenizer, model = marian
+    converted = translator_backends.convert(path, "float32", cache_dir=str(tmp_path_factory.mktemp("ct2")))
+    ct2 = CT2Translator(tokenizer, ctranslate2.Translator(converted, device="cpu"), translator_backends.load_options(converted))
+    return TorchTranslator(tokenizer, model, "cpu"), ct2
+
+
+@pytest.mark.parametrize("max_length", [5, 20])
+def test_ct2_matches_torch(backends, max_length):
+    torch_backend, ct2_backend = backends
+    texts = SENTENCES[:3]
+    assert ct2_backend.translate(texts, max_length) == torch_backend.translate(texts, max_length)
+    assert ct2_backend.last_token_counts == torch_backend.last_token_counts
+
+
+@pytest.mark.parametrize("max_length", [5, 20])
+def test_ct2_matches_torch_with_context(backends, max_length):
+    torch_backend, ct2_backend = backends
+    texts, prefixes = SENTENCES[3:6], ["", "see you", "good morning everyone"]
+    assert ct2_backend.translate(texts, max_length, prefixes) == torch_backend.translate(texts, max_length, prefixes)
+    assert ct2_backend.last_token_counts == torch_backend.last_token_counts
+
+
+def test_empty_batch(backends):
+    for backend in backends:
+        assert backend.translate([], 20) == []
+        assert backend.last_token_counts == []
+
+
+def test_generation_options_follow_the_model(marian, backends):
+    assert translator_backends.generation_options(marian[0])["forced_eos"] is True
+    assert backends[1].forced_eos and "forced_eos" not in backends[1].options
+
+
+def test_missing_generation_settings_are_reported(tmp_path, capsys):
+    assert translator_backends.load_options(str(tmp_path)) == {"beam_size": 1}
+    assert "beam 1" in capsys.readouterr().out
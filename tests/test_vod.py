@@ -0,0 +1,103 @@
+import os
+import threading
+
+import numpy as np
+
+from audio_capture import AudioCapture, download_vod
+
+SR = 16000
+
+
+def media_file(path, seconds):
+    """A "media file" for the fake tools: raw s16le PCM, loud enough not to count as silence"""
+    i = np.arange(int(seconds * SR))
+    pcm = (8000 * np.sin(2 * np.pi * 220 * i / SR)).astype(np.int16)
+    path.write_bytes(pcm.tobytes())
+    return str(path)
+
+
+def test_parallel_downloads_use_their_own_files(fake_tools, tmp_path):
+    sources = [media_file(tmp_path / f"vod{n}.raw", 1 + n) for n in range(4)]
+    dirs = [tmp_path / f"job{n}" for n in range(4)]
+    for d in dirs: d.mkdir()
+    results = [None] * 4
+
+    def job(n):
+        results[n] = download_vod(sources[n], str(dirs[n]))
+
+    threads = [threading.Thread(target=job, args=(n,)) for n in range(4)]
+    for t in threads: t.start()
+    for t in threads: t.join(30)
+
+    assert len(set(results)) == 4
+    for n, path in enumerate(results):
+        assert os.path.dirname(path) == str(dirs[n])
+        assert os.path.getsize(path) == (1 + n) * SR * 2
+
+
+def test_stop_only_removes_what_the_capture_created(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    other_job = tmp_path / "temp_vod.wav"
+    other_job.write_bytes(b"another worker's audio")
+
+    capture = AudioCapture()
+    capture.stop()
+    assert other_job.exists()
+
+    capture.temp_dir = str(tmp_path / "vod_mine")
+    os.mkdir(capture.temp_dir)
+    capture.stop()
+    assert not os.path.exists(tmp_path / "vod_mine") and other_job.exists()
+
+
+def collect(capture, timeout=30):
+    """Chunks as they come off the queue, with the time each arrived"""
+    import queue
+    import time
+    got, deadline = [], time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            got.append((time.monotonic(), capture.audio_queue.get(timeout=0.1)))
+        except queue.Empty:
+            if not capture.is_capturing and capture.audio_queue.empty(): break
+    return got
+
+
+def vod_capture(tmp_path):
+    from pcm_cache import PCMCache
+    capture = AudioCapture(chunk_seconds=1)
+    capture.cache = PCMCache(str(tmp_path / "cache"))
+    return capture
+
+
+def test_vod_stream_delivers_chunks_progressively(fake_tools, tmp_path, monkeypatch):
+    # 6 s of audio that the fake yt-dlp trickles out in 0.5 s pieces, 0.1 s apart
+    monkeypatch.setenv("FAKE_TOOL_DELAY", "0.1")
+    source = media_file(tmp_path / "vod.raw", 6)
+    capture = vod_capture(tmp_path)
+    statuses = []
+    capture.start_youtube(source, is_live=False, status_callback=statuses.append)
+    got = collect(capture)
+
+    assert [chunk.start for _, chunk in got] == [float(n) for n in range(6)]
+    # The first chunk was there long before the last one: transcription can start while the rest streams in
+    assert got[-1][0] - got[0][0] > 0.5
+    assert not any("falling back" in s for s in statuses)
+    assert capture.temp_dir is None
+
+
+def test_vod_stream_falls_back_to_download_without_audio(fake_tools, tmp_path, monkeypatch):
+    monkeypatch.setenv("FAKE_YTDLP_STREAM_FAIL", "1")
+    source = media_file(tmp_path / "vod.raw", 3)
+    capture = vod_capture(tmp_path)
+    statuses = []
+    capture.start_youtube(source, is_live=False, status_callback=statuses.append)
+    got = collect(capture)
+
+    assert any("falling back to download" in s for s in statuses)
+    assert [chunk.start for _, chunk in got] == [0.0, 1.0, 2.0]
+    audio = np.concatenate([chunk.audio for _, chunk in got])
+    expected = np.frombuffer(open(source, "rb").read(), dtype=np.int16).astype(np.float32) / 32768.0
+    np.testing.assert_array_equal(audio, expected)
+    # The download went to the capture's own directory, which is gone again
+    assert capture.temp_dir is None
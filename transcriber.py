@@ -1,43 +1,143 @@
 import torch
-from faster_whisper import WhisperModel
-from transformers import AutoModelForSeq2SeqLM, AutoTokenizer, MarianMTModel, MarianTokenizer
 import pykakasi
+import gloss_dictionary
+import translation_memory
+import translator_backends
+from model_registry import get_registry
+from metrics import get_metrics
+from quality import QUALITY_FAST_WHISPER, QUALITY_MODE, QualityController
+from collections import deque
 import gc
+import os
+import threading
+import time
 import unicodedata
 
+WHISPER_MODEL_SIZE = "medium"
+NLLB_MODEL = "facebook/nllb-200-distilled-600M"
+# Japanese sentences are translated knowing this many previous ones (0 = each on its own), see translate_in_context
+TRANSLATION_CONTEXT_SEGMENTS = int(os.getenv("TRANSLATION_CONTEXT_SEGMENTS", "1"))
+
+
+def select_device(device=None):
+    """(device, whisper compute type, translator dtype): the GPU when it has enough VRAM, else the CPU"""
+    device = device or ("cuda" if torch.cuda.is_available() else "cpu")
+    if device != "cuda":
+        print("⚠️ [SYSTEM] No GPU detected. Running on CPU.")
+        return device, "int8", torch.float32
+
+    vram_gb = torch.cuda.get_device_properties(0).total_memory / (1024**3)
+    print(f"[SYSTEM] Detected GPU VRAM: {vram_gb:.2f} GB")
+    if vram_gb < 3.5:
+        print("⚠️ [WARNING] Low VRAM detected. Falling back to CPU.")
+        return "cpu", "int8", torch.float32
+    print("✅ [SYSTEM] Sufficient VRAM. Using GPU Acceleration.")
+    return device, "float16", torch.float16
+
+def translation_models(translator_type, helsinki_id, nllb_source_code=None):
+    """[(model id, tokenizer src_lang)] the translation runs through: a Helsinki model or pivot chain, else NLLB"""
+    if translator_type == "helsinki" and helsinki_id:
+        chain = [helsinki_id] if isinstance(helsinki_id, str) else list(helsinki_id)
+        return [(m, None) for m in chain]
+    return [(NLLB_MODEL, nllb_source_code)]
+
+def load_translators(chain, device, dtype, backend, target_token=None, cpu_threads=0):
+    """One TorchTranslator / CT2Translator per model of the chain, from the model registry"""
+    registry = get_registry()
+    hops = []
+    for model_id, src_lang in chain:
+        tokenizer = registry.get_tokenizer(model_id, src_lang=src_lang)
+        if backend == "ct2":
+            compute_type = translator_backends.ct2_compute_type(device)
+            translator = registry.get_ct2_translator(model_id, device, compute_type, cpu_threads)
+            options = translator_backends.load_options(
+                translator_backends.converted_path(model_id, translator_backends.ct2_quantization(compute_type)))
+            hops.append(translator_backends.CT2Translator(tokenizer, translator, options, target_token))
+        else:
+            hops.append(translator_backends.TorchTranslator(tokenizer, registry.get_translator(model_id, device, dtype), device, target_token))
+    return hops
+
+def warm_up(translator_type, helsinki_id=None, nllb_source_code=None, device=None, translator_backend=None):
+    """
+    Loads the models an AIEngine with these settings would use into the model registry, so building
+    that engine later only picks them up. Meant for a background thread (see main.py).
+    """
+    device, compute_type, dtype = select_device(device)
+    get_registry().get_whisper(WHISPER_MODEL_SIZE, device, compute_type)
+    load_translators(translation_models(translator_type, helsinki_id, nllb_source_code), device, dtype,
+                     translator_backend or translator_backends.TRANSLATOR_BACKEND)
+
+def translate_streams(streams):
+    """
+    translate_segments for several streams whose engines share one translation route (see multi_stream):
+    [(engine, segments)], each stream's segments in order. The sentences translated on their own go in one
+    batch for all streams, the in-context ones (translate_wave) in waves by position: wave k holds the k-th such
+    sentence of every stream, so each is translated knowing the one right before it.
+    """
+    merged = {}
+    for engine, segments in streams:
+        if engine.display_ops['trans']: merged.setdefault(id(engine), (engine, []))[1].extend(segments)
+    if not merged: return
+    streams = list(merged.values())
+    lead = streams[0][0]
+
+    batch = [seg for engine, segments in streams for seg in segments
+             if seg['lang'] != "notice" and not (engine.translation_context.maxlen and seg['lang'] == "ja")]
+    with lead.metrics.timer("stage_seconds", stage="translation"):
+        translations = lead.translate_batch([seg['text'] for seg in batch], max_length=200, count_tokens=True)
+        for seg, translation in zip(batch, translations):
+            seg['trans'] = translation.strip()
+
+        pending = [(engine, iter(segments)) for engine, segments in streams if engine.translation_context.maxlen]
+        while pending:
+            wave, still = [], []
+            for engine, it in pending:
+                for seg in it:
+                    # A notice marks a gap (skipped audio): don't carry context over it
+                    if seg['lang'] == "notice": engine.translation_context.clear()
+                    elif seg['lang'] == "ja":
+                        wave.append((engine, seg))
+                        still.append((engine, it))
+                        break
+            if wave: lead.translate_wave(wave)
+            pending = still
+
+
 class AIEngine:
-    def __init__(self, translator_type, source_lang_code, target_lang_code, nllb_source_code, nllb_target_code, helsinki_id=None):
+    def __init__(self, translator_type, source_lang_code, target_lang_code, nllb_source_code, nllb_target_code, helsinki_id=None,
+                 translation_batch_size=32, use_translation_memory=True, device=None, cpu_threads=0,
+                 whisper=None, translator=None, tokenizer=None, translator_backend=None, quality_mode=None,
+                 context_segments=None):
+        """
+        whisper / translator / tokenizer: pre-built models (e.g. stub_models for benchmarks).
+        When given they are used as-is instead of being loaded through the model registry.
+        translator_backend: "torch" (transformers generate) or "ct2" (CTranslate2 int8), see translator_backends.
+        quality_mode: "adaptive" (live sources trade beam size / gloss / Whisper size for speed) or "fixed", see quality.
+        context_segments: earlier Japanese sentences each translation is conditioned on (default TRANSLATION_CONTEXT_SEGMENTS).
+        """
         
         # VRAM Cleanup
         torch.cuda.empty_cache()
         gc.collect()
 
         # --- DEVICE & VRAM CHECKING ---
-        self.device = "cuda" if torch.cuda.is_available() else "cpu"
-        self.whisper_compute_type = "float16" if self.device == "cuda" else "int8"
-        self.translator_dtype = torch.float16 if self.device == "cuda" else torch.float32
-
-        if self.device == "cuda":
-            vram_bytes = torch.cuda.get_device_properties(0).total_memory
-            vram_gb = vram_bytes / (1024**3)
-            print(f"[SYSTEM] Detected GPU VRAM: {vram_gb:.2f} GB")
-            
-            if vram_gb < 3.5:
-                print("⚠️ [WARNING] Low VRAM detected. Falling back to CPU.")
-                self.device = "cpu"
-                self.whisper_compute_type = "int8"
-                self.translator_dtype = torch.float32
-            else:
-                print("✅ [SYSTEM] Sufficient VRAM. Using GPU Acceleration.")
-        else:
-            print("⚠️ [SYSTEM] No GPU detected. Running on CPU.")
+        self.device, self.whisper_compute_type, self.translator_dtype = select_device(device)
 
         # Whisper Init (Medium)
-        self.whisper_model_size = "medium" 
+        self.whisper_model_size = WHISPER_MODEL_SIZE
+        self.beam_size = 5        # The quality controller lowers these two while a live stream falls behind
+        self.gloss_allowed = True
         self.source_lang = source_lang_code if source_lang_code != "auto" else None
         
-        print(f"[AI] Loading Whisper ({self.whisper_model_size}) into {self.device.upper()}...")
-        self.whisper = WhisperModel(self.whisper_model_size, device=self.device, compute_type=self.whisper_compute_type)
+        # Models come from the process-wide registry: a settings change only loads what isn't cached yet
+        registry = get_registry()
+        if whisper is not None:
+            self.whisper = whisper
+        else:
+            print(f"[AI] Loading Whisper ({self.whisper_model_size}) into {self.device.upper()}...")
+            # cpu_threads > 0 pins Whisper's CTranslate2 thread pool (batch_runner splits the cores between processes)
+            whisper_opts = {"cpu_threads": cpu_threads} if cpu_threads else {}
+            self.whisper = registry.get_whisper(self.whisper_model_size, self.device, self.whisper_compute_type, **whisper_opts)
 
         # Translator Init
         self.translator_type = translator_type
@@ -45,86 +145,330 @@ class AIEngine:
         self.nllb_source_code = nllb_source_code
         
         self.kks = pykakasi.kakasi()
-        self.context_memory = []
+        # Per entry, the texts of one earlier sentence along the route: [source, hop 1 output, ..., translation]
+        self.translation_context = deque(maxlen=max(0, TRANSLATION_CONTEXT_SEGMENTS if context_segments is None else context_segments))
+        self.last_text = ""
         self.total_processed_seconds = 0.0
+        self.next_segment_id = 0  # Lets a display replace a segment's partial block with the final one
+        # Sentence translation and the gloss batch run on different pipeline stages
+        self.translator_lock = threading.Lock()
+        self.metrics = get_metrics()
+        # Max sentences/words per generate() call
+        self.translation_batch_size = max(1, translation_batch_size)
         
         # Default Display Options
-        self.display_ops = {"kanji": True, "hira": True, "gloss": True, "trans": True}
-
-        if self.translator_type == "helsinki" and helsinki_id:
-            print(f"[AI] Loading Helsinki-NLP ({helsinki_id}) into {self.device.upper()} (FP16)...")
-            self.tokenizer = MarianTokenizer.from_pretrained(helsinki_id)
-            self.translator = MarianMTModel.from_pretrained(
-                helsinki_id, 
-                torch_dtype=self.translator_dtype
-            ).to(self.device)
+        self.display_ops = {"kanji": True, "hira": True, "gloss": True, "trans": True, "gloss_backend": "neural"}
+        self.target_lang = target_lang_code
+        self.source_lang_code = source_lang_code
+        self.translation_memory = translation_memory.get_translation_memory() if use_translation_memory else None
+
+        # Translation runs through `hops`: one translator, or a chain for a pivot route
+        # (helsinki_id as a list, e.g. id->en then en->ja, see model_manager.plan_route)
+        self.translator_backend = translator_backend or translator_backends.TRANSLATOR_BACKEND
+        target_token = None if self.translator_type == "helsinki" else nllb_target_code
+        if translator is not None:
+            self.model_id = helsinki_id or f"injected:{type(translator).__name__}"
+            self.translator_backend = "injected"
+            self.hops = [translator_backends.TorchTranslator(tokenizer, translator, self.device, target_token)]
         else:
-            print(f"[AI] Loading Universal NLLB-200 (600M) into {self.device.upper()} (FP16)...")
-            model_name = "facebook/nllb-200-distilled-600M"
-            self.tokenizer = AutoTokenizer.from_pretrained(model_name, src_lang=nllb_source_code)
-            self.translator = AutoModelForSeq2SeqLM.from_pretrained(
-                model_name, 
-                torch_dtype=self.translator_dtype
-            ).to(self.device)
+            chain = translation_models(self.translator_type, helsinki_id, nllb_source_code)
+            self.model_id = " > ".join(m for m, _ in chain)
+            precision = translator_backends.ct2_compute_type(self.device).upper() if self.translator_backend == "ct2" \
+                else ("FP16" if self.device == "cuda" else "FP32")
+            if self.translator_type == "helsinki" and helsinki_id:
+                print(f"[AI] Loading Helsinki-NLP ({self.model_id}) into {self.device.upper()} ({self.translator_backend}, {precision})...")
+            else:
+                print(f"[AI] Loading Universal NLLB-200 (600M) into {self.device.upper()} ({self.translator_backend}, {precision})...")
+            self.hops = load_translators(chain, self.device, self.translator_dtype, self.translator_backend, target_token, cpu_threads)
+
+        # A smaller Whisper is only offered when the main one came from the registry
+        fast_loader = None
+        if whisper is None and QUALITY_FAST_WHISPER != self.whisper_model_size:
+            fast_loader = lambda: registry.get_whisper(QUALITY_FAST_WHISPER, self.device, self.whisper_compute_type, **whisper_opts)
+        self.quality = QualityController(self, quality_mode or QUALITY_MODE, fast_loader)
 
     def update_display_options(self, opts):
-        """Updates what layers should be shown (Kanji, Hira, Gloss, Sentence)"""
-        self.display_ops = opts
+        """Updates what layers should be shown (Kanji, Hira, Gloss, Sentence) and the gloss backend"""
+        self.display_ops = {**self.display_ops, **opts}
 
     def process_audio(self, audio_chunk):
-        chunk_duration = len(audio_chunk) / 16000.0
+        """Runs every stage (ASR -> translation -> formatting) for one chunk serially"""
+        segments = self.transcribe_chunk(audio_chunk)
+        self.translate_segments(segments)
+        return self.format_segments(segments)
+
+    def stream_audio(self, audio_chunk):
+        """
+        Streaming version of process_audio. Yields each segment's record as soon as Whisper decodes it
+        (source + reading, 'partial': True), then the same records again (same 'id') with the
+        translation and gloss filled in.
+        """
+        segments = []
+        for seg in self.iter_segments(audio_chunk):
+            segments.append(seg)
+            yield self.partial_record(seg)
+        self.translate_segments(segments)
+        yield from self.build_records(segments)
 
-        segments, info = self.whisper.transcribe(
-            audio_chunk, language=self.source_lang, beam_size=5, vad_filter=True
-        )
+    # --- STAGE 1: WHISPER ---
+    def transcribe_chunk(self, audio_chunk):
+        """Decodes one chunk and returns a list of segment dicts for the later stages"""
+        return list(self.iter_segments(audio_chunk))
 
-        detected_lang = info.language
-        results = []
+    def iter_segments(self, audio_chunk, decoded=None):
+        """
+        Decodes one chunk, yielding each segment dict as soon as Whisper has it.
+        decoded: (segments, language, seconds) when the chunk was already decoded elsewhere
+        (e.g. batched with other streams, see multi_stream); only the bookkeeping runs here.
+        """
+        t0 = time.perf_counter() - (decoded[2] if decoded else 0.0)
+        # Time to first text counts from when the chunk was queued, if known (includes the queue wait)
+        first_text_from = getattr(audio_chunk, 'enqueued_at', None)
+        first_text_from, clock = (first_text_from, time.monotonic) if first_text_from is not None else (t0, time.perf_counter)
+        # AudioChunk carries its own stream position; a bare array just continues the running clock
+        audio = getattr(audio_chunk, 'audio', audio_chunk)
+        chunk_start = getattr(audio_chunk, 'start', self.total_processed_seconds)
+        overlap = getattr(audio_chunk, 'overlap', 0.0)
+        skipped = getattr(audio_chunk, 'skipped', 0.0)
+        chunk_duration = len(audio) / 16000.0
+
+        if decoded is None:
+            segments, info = self.whisper.transcribe(
+                audio, language=self.source_lang, beam_size=self.beam_size, vad_filter=True
+            )
+            detected_lang = info.language
+        else:
+            segments, detected_lang, _ = decoded
 
+        # Live catch-up dropped the audio before this chunk: say so, and don't carry context over the gap
+        # (the translation stage clears its context when the notice gets there)
+        if skipped:
+            self.last_text = ""
+            yield self.make_notice(f"[skipped {skipped:.0f} s]", chunk_start - skipped, chunk_start)
+
+        # The generator is lazy: decoding actually happens while iterating here
         for segment in segments:
             text = segment.text.strip()
             if not text: continue
 
-            # --- DOUBLING FIX ---
-            input_text = text
-            if detected_lang == "ja":
-                self.context_memory.append(text)
-                if len(self.context_memory) > 2:
-                    self.context_memory.pop(0)
-                input_text = " ".join(self.context_memory)
-            
-            # --- FULL SENTENCE TRANSLATION (Only if enabled) ---
-            final_trans = ""
-            if self.display_ops['trans']:
-                inputs = self.tokenizer(input_text, return_tensors="pt", padding=True).to(self.device)
-                
-                if self.translator_type == "helsinki":
-                    translated_tokens = self.translator.generate(**inputs, max_length=200)
-                else:
-                    target_id = self.tokenizer.convert_tokens_to_ids(self.nllb_target_code)
-                    translated_tokens = self.translator.generate(
-                        **inputs, forced_bos_token_id=target_id, max_length=200
-                    )
-                
-                translation_result = self.tokenizer.decode(translated_tokens[0], skip_special_tokens=True)
-                
-                final_trans = translation_result
-                if detected_lang == "ja":
-                    en_sentences = translation_result.split('. ')
-                    final_trans = en_sentences[-1] if en_sentences else translation_result
+            # --- OVERLAP DEDUP ---
+            # Segments fully inside the overlap were already shown with the previous chunk,
+            # ones straddling it lose the words repeated from the previous segment.
+            if overlap > 0 and segment.start < overlap:
+                if segment.end <= overlap: continue
+                text = self._strip_overlap(text)
+                if not text: continue
 
             # Calculate absolute timestamp
-            absolute_start_time = self.total_processed_seconds + segment.start
-            
-            formatted = self._format_text(absolute_start_time, text, final_trans.strip(), detected_lang)
-            results.append(formatted)
+            if first_text_from is not None:
+                self.metrics.observe("time_to_first_text_seconds", clock() - first_text_from)
+                first_text_from = None
+            yield self.make_segment(text, chunk_start + segment.start, chunk_start + segment.end, detected_lang)
 
-        self.total_processed_seconds += chunk_duration
+        self.total_processed_seconds = chunk_start + chunk_duration
 
         if self.device == "cuda":
             torch.cuda.empty_cache()
 
-        return results
+        elapsed = time.perf_counter() - t0
+        self.metrics.observe("stage_seconds", elapsed, stage="whisper")
+        self.quality.observe_chunk(chunk_duration, elapsed)
+
+    def transcribe_interim(self, audio_chunk):
+        """
+        Quick greedy look at audio that isn't a full chunk yet (live interim text). Touches no context,
+        so the real decode of the same audio later is unaffected. Returns a record with 'interim': True.
+        """
+        audio = getattr(audio_chunk, 'audio', audio_chunk)
+        start = getattr(audio_chunk, 'start', self.total_processed_seconds)
+        segments, info = self.whisper.transcribe(audio, language=self.source_lang, beam_size=1, vad_filter=True,
+                                                 condition_on_previous_text=False)
+        text = "".join(seg.text for seg in segments).strip()
+        if not text: return None
+        reading = "".join(item['hira'] for item in self.kks.convert(text)) if info.language == "ja" else ""
+        return {"id": None, "start": start, "end": start + len(audio) / 16000.0, "lang": info.language,
+                "source": text, "reading": reading, "tokens": [], "translation": "", "partial": True, "interim": True}
+
+    def _segment_id(self):
+        self.next_segment_id += 1
+        return self.next_segment_id
+
+    def make_segment(self, text, start, end, lang):
+        """Segment dict handed to the later stages. Must be called in stream order (overlap dedup uses the last one)."""
+        self.last_text = text
+        return {"id": self._segment_id(), "start": start, "end": end, "text": text, "lang": lang, "trans": ""}
+
+    def make_notice(self, text, start, end):
+        """Non-speech line (e.g. a skipped-audio marker) that travels through the stages in order, untranslated"""
+        return {"id": self._segment_id(), "start": start, "end": end, "text": text, "lang": "notice", "trans": ""}
+
+    def _strip_overlap(self, text):
+        """Drops the words at the start of `text` that repeat the end of the previous segment"""
+        prev = self.last_text
+        if not prev: return text
+
+        # Spaced languages compare whole words, Japanese/Chinese compare characters
+        if " " in text or " " in prev:
+            prev_units, units, joiner, min_units = prev.split(), text.split(), " ", 1
+        else:
+            prev_units, units, joiner, min_units = list(prev), list(text), "", 2
+
+        for k in range(min(len(prev_units), len(units)), min_units - 1, -1):
+            if prev_units[-k:] == units[:k]:
+                return joiner.join(units[k:]).strip()
+        return text
+
+    # --- STAGE 2: FULL SENTENCE TRANSLATION ---
+    def translate_segments(self, segments):
+        """
+        Fills in the 'trans' field of each segment (Only if enabled). Called in stream order.
+        Japanese sentences go through translate_in_context, everything else in one batch.
+        """
+        translate_streams([(self, segments)])
+        return segments
+
+    def translate_in_context(self, seg, max_length=200):
+        """One sentence translated knowing the previous ones, see translate_wave"""
+        return self.translate_wave([(self, seg)], max_length)[0]
+
+    def translate_wave(self, items, max_length=200):
+        """
+        items: [(engine, seg)], at most one sentence per engine (stream), all sharing this engine's models.
+        Translates each sentence knowing its stream's previous ones, without translating those again.
+
+        Each hop's encoder gets the earlier sentences' input plus the new one; the decoder is forced to
+        start with the earlier sentences' output (already known, fed in one pass) and only generates
+        the continuation, which is the new sentence's translation. A pivot route does this per hop.
+        Sentences of one stream depend on each other, so only different streams share a batch.
+        """
+        items = [(engine, seg, list(engine.translation_context)) for engine, seg in items]
+        tm = self.translation_memory if len(self.hops) == 1 else None  # A pivot route would also need the middle texts
+        tm_model = self.model_id + " +ctx"
+        keys = [" ||| ".join([entry[0] for entry in context] + [seg['text']]) for _, seg, context in items]
+        cached = tm.get_many(tm_model, self.source_lang_code, self.target_lang, keys, max_length) if tm else [None] * len(items)
+        texts = [[seg['text']] + ([hit] if hit is not None else []) for (_, seg, _), hit in zip(items, cached)]
+
+        todo = [i for i, hit in enumerate(cached) if hit is None]
+        if todo:
+            t0 = time.perf_counter()
+            for h, hop in enumerate(self.hops):
+                contexts = [items[i][2] for i in todo]
+                sources = [" ".join([entry[h] for entry in ctx] + [texts[i][-1]]) for i, ctx in zip(todo, contexts)]
+                prefixes = [" ".join(entry[h + 1] for entry in ctx) for ctx in contexts]
+                with self.translator_lock:
+                    outputs = hop.translate(sources, max_length, prefixes=prefixes)
+                    counts = hop.last_token_counts or [(0, 0)] * len(todo)
+                for i, output, (generated, forced) in zip(todo, outputs, counts):
+                    texts[i].append(output.strip())
+                    self.metrics.observe("translation_tokens", generated, part="generated", hop=h)
+                    self.metrics.observe("translation_tokens", forced, part="context", hop=h)
+            if tm: tm.put_many(tm_model, self.source_lang_code, self.target_lang, [(keys[i], texts[i][-1]) for i in todo],
+                               time.perf_counter() - t0, max_length)
+
+        for (engine, seg, _), seg_texts in zip(items, texts):
+            seg['trans'] = seg_texts[-1]
+            engine.translation_context.append(seg_texts)
+        return [seg for _, seg, _ in items]
+
+    def translate_batch(self, texts, max_length=200, count_tokens=False):
+        """
+        Translates a list of strings with as few generate() calls as possible.
+        Anything already in the translation memory is skipped, duplicates are translated once.
+        Inputs are sorted by length so each padded batch wastes little compute,
+        then the outputs are put back in the original order.
+        count_tokens: record the generated tokens per sentence (translation_tokens metric).
+        """
+        tm = self.translation_memory
+        results = tm.get_many(self.model_id, self.source_lang_code, self.target_lang, texts, max_length) if tm else [None] * len(texts)
+
+        todo = sorted({texts[i] for i, r in enumerate(results) if r is None}, key=len)
+        translated = {}
+        t0 = time.perf_counter()
+
+        for b in range(0, len(todo), self.translation_batch_size):
+            batch = todo[b:b + self.translation_batch_size]
+            # A pivot route hands the whole batch from hop to hop, each hop one generate() call
+            outputs = batch
+            for h, hop in enumerate(self.hops):
+                with self.translator_lock:
+                    outputs = hop.translate(outputs, max_length)
+                    counts = hop.last_token_counts if count_tokens else []
+                for generated, _ in counts: self.metrics.observe("translation_tokens", generated, part="generated", hop=h)
+            translated.update(zip(batch, outputs))
+
+        if translated and tm:
+            tm.put_many(self.model_id, self.source_lang_code, self.target_lang, translated.items(), time.perf_counter() - t0,
+                        max_length)
+
+        return [r if r is not None else translated[text] for r, text in zip(results, texts)]
+
+    # --- STAGE 3: GLOSS + FORMATTING ---
+    def format_segments(self, segments):
+        """Turns translated segments into the display strings pushed to the GUI"""
+        return [self.format_record(record) for record in self.build_records(segments)]
+
+    def build_records(self, segments):
+        """
+        Structured result per segment (used by the exporters and the GUI formatter):
+        start/end in seconds, source text, reading, per-token gloss and sentence translation.
+        """
+        records = []
+        for seg in segments:
+            record = self._base_record(seg)
+
+            if seg['lang'] == "ja":
+                parsed = seg.get('parsed') or self.kks.convert(seg['text'])
+
+                # --- BATCH TRANSLATE WORDS (Only if enabled, and not shed by the quality controller) ---
+                translated_words = []
+                if self.display_ops['gloss'] and self.gloss_allowed:
+                    with self.metrics.timer("stage_seconds", stage="gloss"):
+                        translated_words = self.gloss_words(parsed)
+
+                record["tokens"] = [{
+                    "orig": item['orig'],
+                    "hira": item['hira'],
+                    "gloss": translated_words[i].strip() if i < len(translated_words) else "",
+                } for i, item in enumerate(parsed)]
+                record["reading"] = "".join(item['hira'] for item in parsed)
+
+            records.append(record)
+        return records
+
+    def partial_record(self, seg):
+        """Record of a segment that is decoded but not translated yet: source and reading only"""
+        record = self._base_record(seg)
+        record["partial"] = True
+        if seg['lang'] == "ja":
+            parsed = seg['parsed'] = self.kks.convert(seg['text'])  # Reused by build_records
+            record["tokens"] = [{"orig": item['orig'], "hira": item['hira'], "gloss": ""} for item in parsed]
+            record["reading"] = "".join(item['hira'] for item in parsed)
+        return record
+
+    def _base_record(self, seg):
+        return {
+            "id": seg.get('id'), "start": seg['start'], "end": seg.get('end', seg['start']), "lang": seg['lang'],
+            "source": seg['text'], "reading": "", "tokens": [], "translation": seg['trans'],
+        }
+
+    def gloss_words(self, parsed):
+        """
+        Literal meaning of each pykakasi token.
+        'dictionary' backend: local JMdict lookup, the neural model only translates the misses.
+        'neural' backend: every token goes through the translator.
+        """
+        glosses = [None] * len(parsed)
+        if self.display_ops.get('gloss_backend') == "dictionary":
+            dictionary = gloss_dictionary.get_dictionary(target_lang=self.target_lang)
+            for i, item in enumerate(parsed):
+                glosses[i] = dictionary.lookup(item['orig'], item['hira'])
+
+        missing = [i for i, g in enumerate(glosses) if g is None]
+        if missing:
+            translated = self.translate_batch([parsed[i]['orig'] for i in missing], max_length=50)
+            for i, text in zip(missing, translated):
+                glosses[i] = text
+        return glosses
 
     def _get_display_width(self, text):
         width = 0
@@ -135,40 +479,37 @@ class AIEngine:
                 width += 1
         return width
 
-    def _format_text(self, start_time, source_text, translated_text, detected_lang):
+    def format_record(self, record):
+        with self.metrics.timer("stage_seconds", stage="format"):
+            return self._format_record(record)
+
+    def _format_record(self, record):
+        start_time = record['start']
         mins, secs = int(start_time // 60), int(start_time % 60)
         timestamp = f"[{mins:02d}:{secs:02d}]"
+        # Partial records are shown before their translation exists
+        translated_text = "…" if record.get('partial') else record['translation']
 
-        if detected_lang == "ja":
-            parsed = self.kks.convert(source_text)
-            
-            # --- BATCH TRANSLATE WORDS (Only if enabled) ---
-            translated_words = []
-            if self.display_ops['gloss']:
-                words_to_translate = [item['orig'] for item in parsed]
-                if words_to_translate:
-                    batch_inputs = self.tokenizer(words_to_translate, return_tensors="pt", padding=True).to(self.device)
-                    
-                    if self.translator_type == "helsinki":
-                        batch_generated = self.translator.generate(**batch_inputs, max_length=50)
-                    else:
-                        target_id = self.tokenizer.convert_tokens_to_ids(self.nllb_target_code)
-                        batch_generated = self.translator.generate(
-                            **batch_inputs, forced_bos_token_id=target_id, max_length=50
-                        )
-                    translated_words = self.tokenizer.batch_decode(batch_generated, skip_special_tokens=True)
+        if record.get('interim'):
+            return f"{timestamp} {record['source']} …\n"
+
+        if record['lang'] == "notice":
+            return f"{timestamp} [SYSTEM] {record['source']}\n{'-'*70}\n"
 
+        if record['lang'] == "ja":
             line_kanji = ""
             line_hira = ""
             line_gloss = ""
             
             pad_jp = '\u3000' 
             pad_en = ' '      
+            # No gloss line for records built while the quality controller had the gloss layer off
+            show_gloss = self.display_ops['gloss'] and any(t['gloss'] for t in record['tokens'])
 
-            for i, word_data in enumerate(parsed):
+            for word_data in record['tokens']:
                 orig = word_data['orig']
                 hira = word_data['hira']
-                gloss = translated_words[i].strip() if i < len(translated_words) else ""
+                gloss = word_data['gloss']
 
                 w_orig = self._get_display_width(orig)
                 w_hira = self._get_display_width(hira)
@@ -178,7 +519,7 @@ class AIEngine:
                 widths = []
                 if self.display_ops['kanji']: widths.append(w_orig)
                 if self.display_ops['hira']: widths.append(w_hira)
-                if self.display_ops['gloss']: widths.append(w_gloss)
+                if show_gloss: widths.append(w_gloss)
                 
                 max_w = max(widths) + 2 if widths else 2
 
@@ -188,26 +529,31 @@ class AIEngine:
                 if self.display_ops['hira']:
                     line_hira  += hira + pad_jp * max(1, int((max_w - w_hira)/2)) + " "
                 
-                if self.display_ops['gloss']:
+                if show_gloss:
                     line_gloss += gloss.ljust(max_w, pad_en) + "  "
 
             # Construct Final String based on Toggles
             final_output = f"{timestamp}\n"
             if self.display_ops['kanji']: final_output += f"{line_kanji}\n"
             if self.display_ops['hira']:  final_output += f"{line_hira}\n"
-            if self.display_ops['gloss']: final_output += f"{line_gloss}\n"
+            if show_gloss: final_output += f"{line_gloss}\n"
             if self.display_ops['trans']: final_output += f"TRANS: {translated_text}\n"
             final_output += f"{'-'*70}\n"
             
             return final_output
 
         else:
-            return f"{timestamp}\nSRC: {source_text}\nTRANS: {translated_text}\n{'-'*70}\n"
+            return f"{timestamp}\nSRC: {record['source']}\nTRANS: {translated_text}\n{'-'*70}\n"
 
     def reset_memory(self):
-        self.context_memory = []
+        self.translation_context.clear()
+        self.last_text = ""
 
     def cleanup_cache(self):
+        if self.translation_memory:
+            st = self.translation_memory.stats()
+            print(f"[TM] {st['memory_hits']} memory hits, {st['disk_hits']} disk hits, {st['misses']} misses "
+                  f"({st['hit_rate']*100:.0f}% hit rate, ~{st['saved_seconds']:.1f}s of generate() saved)")
         if self.device == "cuda":
             torch.cuda.empty_cache()
             gc.collect()
\ No newline at end of file
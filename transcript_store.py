@@ -0,0 +1,223 @@
+"""
+Every transcribed segment, kept across sessions in a local SQLite file and searchable in milliseconds.
+
+    store = get_transcript_store()
+    session = store.start_session("https://youtube.com/...", "ja", "en", "Helsinki-NLP/opus-mt-ja-en")
+    store.add(session, record)              # any thread, never blocks: a writer thread commits in batches
+    store.search("行きましょう")             # newest matches first, across all sessions
+
+    python transcript_store.py search "one year" [--session N] [--limit 20]
+    python transcript_store.py sessions
+
+Rows are only ever appended. Each segment's `at` is an absolute time: the session's start plus the
+segment's position in the stream, so it says when the words were spoken, however far behind the
+pipeline ran. Notices (e.g. "[skipped 12 s]") aren't stored. The full-text index (FTS5, trigram tokenizer) covers source, reading and
+translation, so substrings of Japanese text match as well as English words. Queries shorter than three
+characters can't use the trigram index and fall back to a scan.
+"""
+import argparse
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+DEFAULT_DB_PATH = os.getenv("TRANSCRIPT_DB_PATH", "transcripts.db")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY, started_at REAL, source TEXT, src_lang TEXT, tgt_lang TEXT, model TEXT
+);
+CREATE TABLE IF NOT EXISTS segments (
+    id INTEGER PRIMARY KEY, session_id INTEGER, at REAL, start REAL, end REAL, lang TEXT,
+    source TEXT, reading TEXT, gloss TEXT, translation TEXT
+);
+CREATE INDEX IF NOT EXISTS segments_session ON segments (session_id, id);
+CREATE VIRTUAL TABLE IF NOT EXISTS segments_fts USING fts5(
+    source, reading, translation, content='segments', content_rowid='id', tokenize='trigram'
+);
+"""
+
+
+class TranscriptStore:
+    """
+    Writes go through a queue to one writer thread, which commits up to `batch_size` segments
+    per transaction (or whatever arrived within `flush_interval` seconds). Searches use their own
+    connection; WAL mode lets them run while the writer commits.
+    """
+
+    def __init__(self, db_path=DEFAULT_DB_PATH, batch_size=256, flush_interval=1.0):
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.written = 0
+        self._started = {}  # session id -> started_at
+        self._queue = queue.Queue()
+        self._read_lock = threading.Lock()
+
+        self.conn = self._connect()
+        self.conn.executescript(SCHEMA)
+        self.conn.commit()
+        self._writer = threading.Thread(target=self._write_loop, daemon=True)
+        self._writer.start()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, check_same_thread=False, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    # --- WRITING ---
+    def start_session(self, source, src_lang, tgt_lang, model):
+        started_at = time.time()
+        with self._read_lock:
+            cur = self.conn.execute("INSERT INTO sessions (started_at, source, src_lang, tgt_lang, model) VALUES (?, ?, ?, ?, ?)",
+                                    (started_at, source, src_lang, tgt_lang, model))
+            self.conn.commit()
+            self._started[cur.lastrowid] = started_at
+            return cur.lastrowid
+
+    def add(self, session_id, record):
+        """Queues a final record (see AIEngine.build_records); `at` = session start + the record's stream position"""
+        if record['lang'] == "notice": return
+        self._queue.put((session_id, self._session_start(session_id) + record['start'], record))
+
+    def _session_start(self, session_id):
+        started_at = self._started.get(session_id)
+        if started_at is None:
+            # Session opened by another TranscriptStore on the same file
+            with self._read_lock:
+                row = self.conn.execute("SELECT started_at FROM sessions WHERE id = ?", (session_id,)).fetchone()
+            started_at = self._started[session_id] = row["started_at"] if row else time.time()
+        return started_at
+
+    def flush(self):
+        """Blocks until everything queued so far is committed"""
+        self._queue.join()
+
+    def _write_loop(self):
+        conn = self._connect()
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0: break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            try:
+                self._write(conn, batch)
+            except sqlite3.Error as e:
+                print(f"[STORE] Could not write {len(batch)} segments: {e}")
+            finally:
+                for _ in batch: self._queue.task_done()
+
+    def _write(self, conn, batch):
+        with conn:
+            for session_id, at, r in batch:
+                cur = conn.execute(
+                    "INSERT INTO segments (session_id, at, start, end, lang, source, reading, gloss, translation) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (session_id, at, r['start'], r['end'], r['lang'], r['source'], r['reading'],
+                     json.dumps(r['tokens'], ensure_ascii=False), r['translation']))
+                conn.execute("INSERT INTO segments_fts (rowid, source, reading, translation) VALUES (?, ?, ?, ?)",
+                             (cur.lastrowid, r['source'], r['reading'], r['translation']))
+        self.written += len(batch)
+
+    # --- QUERIES ---
+    def search(self, text, limit=50, session_id=None):
+        """Segments containing `text` (case-insensitive substring of source, reading or translation), newest first"""
+        text = text.strip()
+        if not text: return []
+        where, args = "", []
+        if session_id is not None:
+            where, args = " AND s.session_id = ?", [session_id]
+
+        if len(text) >= 3:
+            phrase = '"' + text.replace('"', '""') + '"'
+            sql = ("SELECT s.*, x.source AS session_source FROM segments_fts f JOIN segments s ON s.id = f.rowid "
+                   "JOIN sessions x ON x.id = s.session_id WHERE segments_fts MATCH ?" + where + " ORDER BY f.rowid DESC LIMIT ?")
+            args = [phrase] + args + [limit]
+        else:
+            pattern = "%" + text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+            cols = " OR ".join(f"s.{c} LIKE ? ESCAPE '\\'" for c in ("source", "reading", "translation"))
+            sql = ("SELECT s.*, x.source AS session_source FROM segments s JOIN sessions x ON x.id = s.session_id "
+                   f"WHERE ({cols})" + where + " ORDER BY s.id DESC LIMIT ?")
+            args = [pattern] * 3 + args + [limit]
+
+        with self._read_lock:
+            rows = self.conn.execute(sql, args).fetchall()
+        return [self._row(r) for r in rows]
+
+    def session_segments(self, session_id, limit=None):
+        with self._read_lock:
+            rows = self.conn.execute("SELECT s.*, x.source AS session_source FROM segments s JOIN sessions x ON x.id = s.session_id "
+                                     "WHERE s.session_id = ? ORDER BY s.id LIMIT ?", (session_id, limit or -1)).fetchall()
+        return [self._row(r) for r in rows]
+
+    def sessions(self, limit=50):
+        with self._read_lock:
+            rows = self.conn.execute(
+                "SELECT x.*, COUNT(s.id) AS segments, MAX(s.end) AS duration FROM sessions x "
+                "LEFT JOIN segments s ON s.session_id = x.id GROUP BY x.id ORDER BY x.id DESC LIMIT ?", (limit,)).fetchall()
+        return [dict(r) for r in rows]
+
+    @staticmethod
+    def _row(row):
+        item = dict(row)
+        item["gloss"] = json.loads(item["gloss"] or "[]")
+        return item
+
+    def close(self):
+        self.flush()
+        with self._read_lock:
+            self.conn.close()
+
+
+def format_hit(hit):
+    at = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(hit["at"]))
+    start = int(hit["start"])
+    text = hit["source"] + (f"  ->  {hit['translation']}" if hit["translation"] else "")
+    return f"{at}  #{hit['session_id']} [{start // 3600:d}:{start % 3600 // 60:02d}:{start % 60:02d}]  {text}"
+
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_transcript_store():
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = TranscriptStore()
+        return _store
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Search past transcripts")
+    parser.add_argument("command", choices=["search", "sessions"])
+    parser.add_argument("text", nargs="?", default="")
+    parser.add_argument("--session", type=int, default=None)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--db", default=DEFAULT_DB_PATH)
+    args = parser.parse_args(argv)
+
+    store = TranscriptStore(args.db)
+    if args.command == "sessions":
+        for s in store.sessions(args.limit):
+            started = time.strftime("%Y-%m-%d %H:%M", time.localtime(s["started_at"]))
+            print(f"  #{s['id']:<5} {started}  {s['src_lang']}->{s['tgt_lang']}  {s['segments']:6d} segments  "
+                  f"{(s['duration'] or 0) / 60:7.1f} min  {s['source']}")
+        return
+
+    t0 = time.perf_counter()
+    hits = store.search(args.text, args.limit, args.session)
+    for hit in hits: print(format_hit(hit))
+    print(f"[STORE] {len(hits)} matches in {(time.perf_counter() - t0) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
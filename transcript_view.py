@@ -0,0 +1,256 @@
+"""
+Display model of the main window's transcript, built for multi-hour sessions:
+
+    post(kind, key, text)  from any thread: 'final' / 'text' blocks, 'partial' and 'interim' (see ProcessingPipeline)
+        -> pending list -> one Tk update per frame (TRANSCRIPT_FRAME_MS), superseded blocks dropped unseen
+        -> widget holds at most TRANSCRIPT_WINDOW finished blocks, older ones are trimmed off the top
+        -> every finished block is also appended to a scroll-back file, only its offset stays in memory
+
+Scrolling to the top pages older blocks back in from the file (and drops the newest ones to stay bounded).
+While the user is scrolled up, new blocks only go to the file; scrolling back down pages them in and
+follows the live end again once it is reached.
+"""
+import os
+import tempfile
+import threading
+import tkinter as tk
+from array import array
+
+from metrics import get_metrics
+
+TRANSCRIPT_WINDOW = int(os.getenv("TRANSCRIPT_WINDOW", "300"))       # finished blocks kept in the widget
+TRANSCRIPT_PAGE = int(os.getenv("TRANSCRIPT_PAGE", "100"))           # blocks paged in per scroll-back step
+TRANSCRIPT_FRAME_MS = int(os.getenv("TRANSCRIPT_FRAME_MS", "50"))    # at most one widget update per frame
+
+
+class ScrollbackStore:
+    """Append-only temp file of finished blocks; deleted on close"""
+
+    def __init__(self):
+        self._file = tempfile.TemporaryFile(prefix="transcript_")
+        self._offsets = array("q")
+        self._end = 0
+
+    def __len__(self):
+        return len(self._offsets)
+
+    def append(self, text):
+        data = text.encode("utf-8")
+        self._file.seek(self._end)
+        self._file.write(data)
+        self._offsets.append(self._end)
+        self._end += len(data)
+        return len(self._offsets) - 1
+
+    def read(self, start, stop):
+        """Blocks start..stop-1"""
+        if start >= stop: return []
+        bounds = list(self._offsets[start:stop]) + [self._offsets[stop] if stop < len(self._offsets) else self._end]
+        self._file.flush()
+        self._file.seek(bounds[0])
+        data = self._file.read(bounds[-1] - bounds[0])
+        return [data[a - bounds[0]:b - bounds[0]].decode("utf-8") for a, b in zip(bounds, bounds[1:])]
+
+    def clear(self):
+        self._file.seek(0)
+        self._file.truncate()
+        self._offsets = array("q")
+        self._end = 0
+
+    def size_bytes(self):
+        return self._end
+
+    def close(self):
+        self._file.close()
+
+
+class TranscriptView:
+    """
+    Owns the ScrolledText of the main window. Finished blocks carry the tag b<index> (index into the
+    store), so the widget always shows the contiguous range lo..hi of the store, in store order, plus,
+    while following the live end, the not yet finished partial / interim blocks after it. A finished
+    block goes in right before the first of those, so a final takes its partial's place and a system
+    line arriving meanwhile never ends up behind a partial that is finalized later.
+    """
+
+    def __init__(self, root, area, window=TRANSCRIPT_WINDOW, page=TRANSCRIPT_PAGE, frame_ms=TRANSCRIPT_FRAME_MS):
+        self.root, self.area = root, area
+        self.window, self.page, self.frame_ms = window, max(1, page), frame_ms
+        self.store = ScrollbackStore()
+        self.metrics = get_metrics()
+
+        self.lo, self.hi = 0, -1       # Store range shown in the widget
+        self.following = True          # Widget ends at the newest block and gets new ones
+        self._pending = []
+        self._lock = threading.Lock()
+        self._scheduled = False
+        self._paging = False
+
+        area.tag_configure("partial", foreground='#9e9e9e')
+        area.tag_configure("interim", foreground='#757575', font=("Yu Gothic", 14, "italic"))
+        area.configure(yscrollcommand=self._on_yscroll)
+
+    # --- PUBLIC API (any thread) ---
+    def post(self, kind, key, text):
+        """kind: 'final' / 'partial' / 'interim' (key = segment id) or 'text' (system lines, key ignored)"""
+        with self._lock:
+            self._pending.append((kind, key, text))
+            if self._scheduled: return
+            self._scheduled = True
+        self.root.after(self.frame_ms, self._flush)
+
+    def post_text(self, text):
+        self.post("text", None, text)
+
+    # --- PUBLIC API (Tk thread) ---
+    def clear(self):
+        with self._lock: self._pending = []
+        self.area.delete("1.0", tk.END)
+        for tag in self.area.tag_names():
+            if tag.startswith("seg") or (tag[:1] == "b" and tag[1:].isdigit()): self.area.tag_delete(tag)
+        self.store.clear()
+        self.lo, self.hi = 0, -1
+        self.following = True
+        self._report()
+
+    def close(self):
+        self.store.close()
+
+    # --- FRAME UPDATE ---
+    def _flush(self):
+        with self._lock:
+            batch, self._pending = self._pending, []
+            self._scheduled = False
+        if not batch: return
+
+        with self.metrics.timer("stage_seconds", stage="gui_insert"):
+            area = self.area
+            at_bottom = self._at_bottom()
+            # Scrolled up into the window: freeze it, new blocks are paged in when the user comes back down
+            if self.following and not at_bottom: self._stop_following()
+
+            finals = {key for kind, key, _ in batch if kind == "final"}
+            last = len(batch) - 1
+            for n, (kind, key, text) in enumerate(batch):
+                # Drop what a later block of this frame replaces anyway
+                if kind == "interim" and n != last: continue
+                if kind == "partial" and key in finals: continue
+
+                index = self.store.append(text) if kind in ("final", "text") else None
+                if self.following: self._render(kind, key, text, index)
+
+            if self.following:
+                self._trim_top()
+                if at_bottom: area.see(tk.END)
+        self._report()
+
+    def _render(self, kind, key, text, index):
+        area = self.area
+        # The interim line always sits at the end; anything newer takes its place
+        interim = area.tag_ranges("interim")
+        if interim: area.delete(interim[0], interim[1])
+
+        if kind == "interim":
+            area.insert(tk.END, text, ("interim",))
+            return
+        if kind == "partial":
+            area.insert(tk.END, text, (f"seg{key}", "partial"))
+            return
+
+        if kind == "final":
+            ranges = area.tag_ranges(f"seg{key}")
+            if ranges: area.delete(ranges[0], ranges[1])
+            area.tag_delete(f"seg{key}")
+        partial = area.tag_ranges("partial")
+        area.insert(area.index(partial[0]) if partial else tk.END, text, (f"b{index}",))
+        self.hi = index
+
+    def _trim_top(self):
+        area = self.area
+        while self.hi - self.lo + 1 > self.window:
+            ranges = area.tag_ranges(f"b{self.lo}")
+            if ranges: area.delete(ranges[0], ranges[1])
+            area.tag_delete(f"b{self.lo}")
+            self.lo += 1
+
+    def _trim_bottom(self):
+        area = self.area
+        while self.hi - self.lo + 1 > self.window:
+            ranges = area.tag_ranges(f"b{self.hi}")
+            if ranges: area.delete(ranges[0], ranges[1])
+            area.tag_delete(f"b{self.hi}")
+            self.hi -= 1
+
+    def _stop_following(self):
+        # Partial / interim blocks only make sense at the live end; their finals go to the store
+        for tag in ("interim", "partial"):
+            while True:
+                ranges = self.area.tag_ranges(tag)
+                if not ranges: break
+                self.area.delete(ranges[0], ranges[1])
+        for tag in self.area.tag_names():
+            if tag.startswith("seg"): self.area.tag_delete(tag)
+        self.following = False
+
+    # --- SCROLL-BACK ---
+    def _on_yscroll(self, first, last):
+        self.area.vbar.set(first, last)
+        if self._paging: return
+        first, last = float(first), float(last)
+        if first <= 0.0 and self.lo > 0:
+            self._paging = True
+            self.root.after_idle(self._page_up)
+        elif last >= 1.0 and not self.following:
+            self._paging = True
+            self.root.after_idle(self._page_down)
+
+    def _page_up(self):
+        try:
+            area = self.area
+            start = max(0, self.lo - self.page)
+            texts = self.store.read(start, self.lo)
+            if not texts: return
+            # Keep what the user is looking at in place
+            area.mark_set("view_top", area.index("@0,0"))
+            chunks = []
+            for offset, text in enumerate(texts):
+                chunks += [text, (f"b{start + offset}",)]
+            area.insert("1.0", *chunks)
+            self.lo = start
+            if self.hi - self.lo + 1 > self.window:
+                if self.following: self._stop_following()
+                self._trim_bottom()
+            area.yview("view_top")
+            area.mark_unset("view_top")
+        finally:
+            self._paging = False
+            self._report()
+
+    def _page_down(self):
+        try:
+            area = self.area
+            stop = min(len(self.store), self.hi + 1 + self.page)
+            texts = self.store.read(self.hi + 1, stop)
+            if texts:
+                area.mark_set("view_top", area.index("@0,0"))
+                chunks = []
+                for offset, text in enumerate(texts):
+                    chunks += [text, (f"b{self.hi + 1 + offset}",)]
+                area.insert(tk.END, *chunks)
+                self.hi = stop - 1
+                self._trim_top()
+                area.yview("view_top")
+                area.mark_unset("view_top")
+            if self.hi == len(self.store) - 1: self.following = True
+        finally:
+            self._paging = False
+            self._report()
+
+    # --- HELPERS ---
+    def _at_bottom(self):
+        return self.area.yview()[1] >= 0.999
+
+    def _report(self):
+        self.metrics.set("transcript_blocks", self.hi - self.lo + 1, where="window")
+        self.metrics.set("transcript_blocks", len(self.store), where="scrollback")
+        self.metrics.set("transcript_scrollback_bytes", self.store.size_bytes())
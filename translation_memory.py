@@ -0,0 +1,152 @@
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+DEFAULT_DB_PATH = os.getenv("TRANSLATION_MEMORY_PATH", "translation_memory.db")
+
+
+def normalize(text):
+    """NFKC + collapsed whitespace, so full/half-width variants and spacing share one entry"""
+    return " ".join(unicodedata.normalize("NFKC", text).split())
+
+
+class TranslationMemory:
+    """
+    Cache of finished translations, keyed by (model id, source code, target code, normalized text).
+    Calls with different `max_length` are kept apart (the model column gets a "#max<N>" suffix):
+    a gloss truncated at 50 tokens must never come back for a full sentence.
+
+    - In front: an in-memory LRU of `memory_entries` items.
+    - Behind it: a SQLite file that survives restarts. When its content grows past
+      `max_disk_mb`, the least recently used rows are deleted.
+
+    Counters (see stats()) tell how many generate() calls were avoided, and roughly how much
+    compute that was, based on the measured average cost of a miss.
+    """
+
+    def __init__(self, db_path=DEFAULT_DB_PATH, memory_entries=20000, max_disk_mb=64):
+        self.db_path = db_path
+        self.memory_entries = memory_entries
+        self.max_disk_bytes = int(max_disk_mb * 1024 * 1024)
+        self.memory = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.miss_seconds = 0.0  # Time spent generating the misses
+
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS tm (
+                model TEXT, src TEXT, tgt TEXT, source TEXT, target TEXT,
+                size INTEGER, last_used REAL,
+                PRIMARY KEY (model, src, tgt, source)
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS tm_last_used ON tm (last_used)")
+        self.conn.commit()
+        self.disk_bytes = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM tm").fetchone()[0]
+
+    @staticmethod
+    def _namespace(model, max_length):
+        return model if max_length is None else f"{model}#max{max_length}"
+
+    def get_many(self, model, src, tgt, texts, max_length=None):
+        """Returns a list aligned with `texts`: the cached translation, or None on a miss"""
+        results = [None] * len(texts)
+        now = time.time()
+        model = self._namespace(model, max_length)
+        with self._lock:
+            for i, text in enumerate(texts):
+                key = (model, src, tgt, normalize(text))
+                if key in self.memory:
+                    self.memory.move_to_end(key)
+                    results[i] = self.memory[key]
+                    self.memory_hits += 1
+                    continue
+
+                row = self.conn.execute(
+                    "SELECT target FROM tm WHERE model=? AND src=? AND tgt=? AND source=?", key
+                ).fetchone()
+                if row:
+                    results[i] = row[0]
+                    self.disk_hits += 1
+                    self._remember(key, row[0])
+                    self.conn.execute(
+                        "UPDATE tm SET last_used=? WHERE model=? AND src=? AND tgt=? AND source=?", (now,) + key
+                    )
+                else:
+                    self.misses += 1
+            self.conn.commit()
+        return results
+
+    def put_many(self, model, src, tgt, pairs, elapsed=0.0, max_length=None):
+        """Stores (source, translation) pairs. `elapsed` = time it took to generate them."""
+        now = time.time()
+        model = self._namespace(model, max_length)
+        with self._lock:
+            self.miss_seconds += elapsed
+            for source, target in pairs:
+                key = (model, src, tgt, normalize(source))
+                self._remember(key, target)
+                size = len(key[3].encode("utf-8")) + len(target.encode("utf-8"))
+                old = self.conn.execute(
+                    "SELECT size FROM tm WHERE model=? AND src=? AND tgt=? AND source=?", key
+                ).fetchone()
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO tm VALUES (?, ?, ?, ?, ?, ?, ?)", key + (target, size, now)
+                )
+                self.disk_bytes += size - (old[0] if old else 0)
+            self._evict_disk()
+            self.conn.commit()
+
+    def _remember(self, key, target):
+        self.memory[key] = target
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.memory_entries:
+            self.memory.popitem(last=False)
+
+    def _evict_disk(self):
+        while self.disk_bytes > self.max_disk_bytes:
+            # Drop the oldest ~10% at a time rather than one row per call
+            rows = self.conn.execute(
+                "SELECT rowid, size FROM tm ORDER BY last_used LIMIT (SELECT MAX(1, COUNT(*) / 10) FROM tm)"
+            ).fetchall()
+            if not rows: break
+            self.conn.executemany("DELETE FROM tm WHERE rowid=?", [(r[0],) for r in rows])
+            self.disk_bytes -= sum(r[1] for r in rows)
+
+    def stats(self):
+        with self._lock:
+            hits = self.memory_hits + self.disk_hits
+            lookups = hits + self.misses
+            avg_miss = self.miss_seconds / self.misses if self.misses else 0.0
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": hits / lookups if lookups else 0.0,
+                "saved_seconds": hits * avg_miss,
+                "memory_entries": len(self.memory),
+                "disk_bytes": self.disk_bytes,
+            }
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+
+_memory = None
+_memory_lock = threading.Lock()
+
+def get_translation_memory():
+    """Process-wide instance: shared by every AIEngine so a settings change keeps the warm LRU"""
+    global _memory
+    with _memory_lock:
+        if _memory is None:
+            _memory = TranslationMemory()
+        return _memory
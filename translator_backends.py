@@ -0,0 +1,190 @@
+"""
+Translation backends behind AIEngine's hops. Both take a list of strings and return their translations:
+
+    torch : transformers generate() (float32 on CPU, float16 on GPU), the original path
+    ct2   : CTranslate2 with an int8 converted copy of the same model (much faster on CPU)
+
+Both can force the start of the output (earlier context, see AIEngine.translate_in_context): the forced
+tokens go through the decoder in one pass and only the continuation is generated and returned.
+
+Converted models are written once to CT2_CACHE_DIR/<model>-<quantization> and reused afterwards.
+Decoding follows the model's own generation config (beam size, length penalty, ...) as generate() does.
+"""
+import json
+import os
+import shutil
+import threading
+
+TRANSLATOR_BACKEND = os.getenv("TRANSLATOR_BACKEND", "torch")  # "torch" or "ct2"
+CT2_CACHE_DIR = os.getenv("CT2_CACHE_DIR", "ct2_models")
+CT2_COMPUTE_TYPE = os.getenv("CT2_COMPUTE_TYPE")  # default: int8 on CPU, int8_float16 on GPU
+BACKENDS = ["torch", "ct2"]
+
+_convert_lock = threading.Lock()
+
+
+def ct2_compute_type(device):
+    return CT2_COMPUTE_TYPE or ("int8_float16" if device == "cuda" else "int8")
+
+def ct2_quantization(compute_type):
+    """How the converted copy is stored: int8_float16 / int8_float32 only change how an int8 copy is run"""
+    return "int8" if compute_type.startswith("int8") else compute_type
+
+
+class TorchTranslator:
+    """generate() on a transformers model; `target_token` is NLLB's forced target language code"""
+
+    def __init__(self, tokenizer, model, device, target_token=None):
+        self.tokenizer, self.model, self.device = tokenizer, model, device
+        self.target_token = target_token
+        self.last_token_counts = []  # [(generated, forced context)] per text of the last call
+
+    def translate(self, texts, max_length, prefixes=None):
+        """
+        prefixes: per text, target-language text the output is forced to start with (the translation of
+        earlier context). It is fed to the decoder in one pass instead of being generated, and only what
+        follows it is returned.
+        """
+        if not texts:
+            self.last_token_counts = []
+            return []
+        tokenizer = self.tokenizer
+        batch_inputs = tokenizer(texts, return_tensors="pt", padding=True).to(self.device)
+        if not prefixes or not any(prefixes):
+            if self.target_token:
+                target_id = tokenizer.convert_tokens_to_ids(self.target_token)
+                generated = self.model.generate(**batch_inputs, forced_bos_token_id=target_id, max_length=max_length)
+            else:
+                generated = self.model.generate(**batch_inputs, max_length=max_length)
+            self.last_token_counts = [(n, 0) for n in self._count(generated[:, 1:])]
+            return tokenizer.batch_decode(generated, skip_special_tokens=True)
+
+        start = [self.model.config.decoder_start_token_id]
+        if self.target_token: start.append(tokenizer.convert_tokens_to_ids(self.target_token))
+        forced = [start + (target_ids(tokenizer, prefix) if prefix else []) for prefix in prefixes]
+
+        # generate() can't pad forced decoder inputs, so each prefix length is its own batch
+        groups = {}
+        for i, ids in enumerate(forced): groups.setdefault(len(ids), []).append(i)
+        outputs = [None] * len(texts)
+        self.last_token_counts = [None] * len(texts)
+        for length, rows in groups.items():
+            inputs = {key: value[rows] for key, value in batch_inputs.items()}
+            decoder_input_ids = torch_tensor([forced[i] for i in rows], self.device)
+            generated = self.model.generate(**inputs, decoder_input_ids=decoder_input_ids, max_length=length + max_length - 1)
+            new = generated[:, length:]
+            for i, text, n in zip(rows, tokenizer.batch_decode(new, skip_special_tokens=True), self._count(new)):
+                outputs[i] = text
+                self.last_token_counts[i] = (n, length - len(start))
+        return outputs
+
+    def _count(self, generated):
+        """Real tokens per row: padding and </s> left out, as in CT2's hypotheses"""
+        real = (generated != self.tokenizer.pad_token_id) & (generated != self.tokenizer.eos_token_id)
+        return [int(n) for n in real.sum(dim=1)]
+
+
+class CT2Translator:
+    """
+    ctranslate2.Translator with the same tokenizer as the torch path. NLLB's forced target language
+    and the context prefix (see TorchTranslator.translate) become the target prefix.
+    Output lengths follow generate(): its max_length counts the decoder start token (and, without context,
+    NLLB's language token), and models with forced_eos_token_id spend the last position on </s>.
+    CT2's max_decoding_length counts the target prefix instead, so rows are grouped by prefix length.
+    """
+
+    def __init__(self, tokenizer, translator, options, target_token=None):
+        self.tokenizer, self.translator = tokenizer, translator
+        self.options = dict(options)
+        self.forced_eos = self.options.pop("forced_eos", False)  # Not a translate_batch() option
+        self.target_token = target_token
+        self.last_token_counts = []
+
+    def translate(self, texts, max_length, prefixes=None):
+        if not texts:
+            self.last_token_counts = []
+            return []
+        tokenizer = self.tokenizer
+        source = [tokenizer.convert_ids_to_tokens(tokenizer.encode(text)) for text in texts]
+        start = [self.target_token] if self.target_token else []
+        context = [tokenizer.convert_ids_to_tokens(target_ids(tokenizer, p)) if p else [] for p in (prefixes or [""] * len(texts))]
+        # Tokens generate() would produce after the forced part, </s> not included
+        budget = max_length - 1 - (1 if self.forced_eos else 0) - (0 if prefixes and any(prefixes) else len(start))
+
+        groups = {}
+        for i, tokens in enumerate(context): groups.setdefault(len(tokens), []).append(i)
+        outputs = [None] * len(texts)
+        self.last_token_counts = [None] * len(texts)
+        for length, rows in groups.items():
+            target_prefix = [start + context[i] for i in rows] if start or length else None
+            results = self.translator.translate_batch([source[i] for i in rows], target_prefix=target_prefix,
+                                                      max_decoding_length=len(start) + length + max(1, budget),
+                                                      max_batch_size=len(rows), **self.options)
+            for i, r in zip(rows, results):
+                new = r.hypotheses[0][len(start) + length:]
+                outputs[i] = tokenizer.decode(tokenizer.convert_tokens_to_ids(new), skip_special_tokens=True)
+                self.last_token_counts[i] = (len(new), length)
+        return outputs
+
+
+def target_ids(tokenizer, text):
+    """Token ids of target-language text, without special tokens (Marian has a separate target vocabulary)"""
+    return tokenizer(text_target=text, add_special_tokens=False)["input_ids"]
+
+def torch_tensor(rows, device):
+    import torch
+    return torch.tensor(rows, dtype=torch.long, device=device)
+
+
+# --- CONVERSION ---
+def converted_path(model_id, quantization, cache_dir=CT2_CACHE_DIR):
+    return os.path.join(cache_dir, f"{model_id.replace('/', '--')}-{quantization}")
+
+def convert(model_id, quantization="int8", cache_dir=CT2_CACHE_DIR):
+    """Path of the CTranslate2 copy of `model_id`, converting it first if it isn't cached yet"""
+    path = converted_path(model_id, quantization, cache_dir)
+    with _convert_lock:
+        if os.path.exists(os.path.join(path, "model.bin")): return path
+
+        from ctranslate2.converters import TransformersConverter
+        print(f"[CT2] Converting {model_id} to {quantization} (one-time, cached in {path})...")
+        tmp = f"{path}.tmp{os.getpid()}"
+        shutil.rmtree(tmp, ignore_errors=True)
+        TransformersConverter(model_id).convert(tmp, quantization=quantization, force=True)
+        with open(os.path.join(tmp, "generation.json"), "w") as f:
+            json.dump(generation_options(model_id), f, indent=4)
+        os.makedirs(cache_dir, exist_ok=True)
+        try:
+            os.replace(tmp, path)
+        except OSError:
+            # Another process (batch_runner worker) finished the same conversion first
+            shutil.rmtree(tmp, ignore_errors=True)
+            if not os.path.exists(os.path.join(path, "model.bin")): raise
+        return path
+
+def generation_options(model_id):
+    """translate_batch() options matching what generate() would use for this model"""
+    from transformers import AutoConfig, GenerationConfig
+    try:
+        cfg = GenerationConfig.from_pretrained(model_id)
+    except OSError:
+        # Older repos (most opus-mt ones) only have config.json; generate() falls back to it the same way
+        cfg = GenerationConfig.from_model_config(AutoConfig.from_pretrained(model_id))
+    return {
+        "beam_size": cfg.num_beams or 1,
+        "length_penalty": cfg.length_penalty if cfg.length_penalty is not None else 1.0,
+        "repetition_penalty": cfg.repetition_penalty or 1.0,
+        "no_repeat_ngram_size": cfg.no_repeat_ngram_size or 0,
+        "forced_eos": cfg.forced_eos_token_id is not None,  # Read by CT2Translator, not passed to translate_batch
+    }
+
+def load_options(path):
+    try:
+        with open(os.path.join(path, "generation.json"), "r") as f: return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"[CT2] No usable generation.json in {path} ({e}), decoding greedily (beam 1); "
+              f"delete the directory to convert again with the model's own settings.")
+        return {"beam_size": 1}
+
+def dir_size(path):
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names)